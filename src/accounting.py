@@ -0,0 +1,191 @@
+from datetime import timedelta
+import heapq
+
+MICROSECOND = timedelta(microseconds=1)
+
+class Ledger(object):
+    def __init__(self, tariff):
+        """
+        Constroi o saldo incremental dos alugueis em aberto.
+
+        Cada aluguel aberto guarda as unidades ja acumuladas e o instante em que
+        passa para a unidade seguinte. Um heap ordena esses instantes, entao
+        atualizar o saldo ate uma data so visita os alugueis que cruzaram uma
+        fronteira de unidade. Os saldos guardam quantidades inteiras de unidades
+        por (family, rate), e o valor so e calculado na leitura com Tariff.total,
+        a mesma conta de Tariff.quote: o saldo e exatamente o valor cobrado, sem
+        acumular erros de arredondamento com precos fracionarios.
+
+        Parameters
+        ----------
+            tariff : Tariff
+                Tabela de precos compilada
+            rentals : dict
+                Estado dos alugueis abertos por ID: [units, rate, code, start, clientId, family]
+            boundaries : list
+                Heap de (proxima fronteira, ID do aluguel)
+            stale : int
+                Entradas do heap de alugueis ja fechados; o heap e reconstruido
+                quando elas passam da metade
+            clients : dict
+                Unidades por (family, rate) de cada ID de cliente com aluguel aberto
+            totals : dict
+                Unidades por (family, rate) da loja
+        """
+
+        self.tariff = tariff
+        self.rentals = {}
+        self.boundaries = []
+        self.stale = 0
+        self.clients = {}
+        self.totals = {}
+
+    def add(self, clientId, family, rate, units):
+        key = (family, rate)
+
+        client = self.clients.setdefault(clientId, {})
+
+        for counts in (client, self.totals):
+            count = counts.get(key, 0) + units
+
+            if count:
+                counts[key] = count
+            else:
+                del counts[key]
+
+        if not client:
+            del self.clients[clientId]
+
+    def open(self, rent):
+        '''
+        Metodo que passa a acompanhar um aluguel aberto, que comeca valendo uma unidade.
+
+        Parameters:
+        ----------
+        rent : Rental
+            Aluguel aberto
+
+        Returns
+        -------
+        None
+        '''
+        code = self.tariff.codes[rent.model]
+
+        rate = self.tariff.rate(code, rent.start)
+
+        self.rentals[rent.id] = [1, rate, code, rent.start, rent.clientId, rent.family]
+
+        self.add(rent.clientId, rent.family, rate, 1)
+
+        heapq.heappush(self.boundaries, (rent.start + timedelta(seconds=self.tariff.unitSeconds[code]), rent.id))
+
+    def close(self, rent):
+        '''
+        Metodo que deixa de acompanhar um aluguel fechado, retirando as suas unidades
+        dos saldos. A entrada do heap fica obsoleta e e descartada quando chegar ao
+        topo, ou antes, quando as obsoletas passam da metade do heap.
+
+        Parameters:
+        ----------
+        rent : Rental
+            Aluguel fechado
+
+        Returns
+        -------
+        None
+        '''
+        state = self.rentals.pop(rent.id, None)
+
+        if state is None:
+            return
+
+        units, rate, code, start, clientId, family = state
+
+        self.add(clientId, family, rate, -units)
+
+        self.stale += 1
+
+        if self.stale * 2 > len(self.boundaries):
+            self.boundaries = [entry for entry in self.boundaries if entry[1] in self.rentals]
+
+            heapq.heapify(self.boundaries)
+
+            self.stale = 0
+
+    def advance(self, now):
+        '''
+        Metodo que atualiza as unidades dos alugueis que cruzaram uma fronteira ate agora.
+        As unidades sao recalculadas com a mesma formula usada no fechamento, entao o
+        saldo e sempre igual ao de Store.calculateRental nesse instante.
+
+        Parameters:
+        ----------
+        now : datetime
+            Instante de referencia
+
+        Returns
+        -------
+        None
+        '''
+        boundaries = self.boundaries
+
+        while boundaries and boundaries[0][0] <= now:
+            boundary, id = heapq.heappop(boundaries)
+
+            state = self.rentals.get(id)
+
+            if state is None:
+                self.stale -= 1
+                continue
+
+            units, rate, code, start, clientId, family = state
+
+            current = self.tariff.units(code, start, now)
+
+            if current != units:
+                self.add(clientId, family, rate, current - units)
+
+                state[0] = current
+
+                boundary = start + timedelta(seconds=self.tariff.unitSeconds[code] * current)
+
+            if boundary <= now:
+                boundary = now + MICROSECOND
+
+            heapq.heappush(boundaries, (boundary, id))
+
+    def balance(self, clientId, now):
+        '''
+        Metodo que informa o saldo em aberto de um cliente.
+
+        Parameters:
+        ----------
+        clientId : int
+            ID do cliente
+        now : datetime
+            Instante de referencia
+
+        Returns
+        -------
+        value (float): Saldo do cliente
+        '''
+        self.advance(now)
+
+        return self.tariff.total(self.clients.get(clientId, {}))
+
+    def total(self, now):
+        '''
+        Metodo que informa o saldo em aberto de toda a loja.
+
+        Parameters:
+        ----------
+        now : datetime
+            Instante de referencia
+
+        Returns
+        -------
+        value (float): Saldo da loja
+        '''
+        self.advance(now)
+
+        return self.tariff.total(self.totals)
@@ -0,0 +1,2 @@
+from benchmarks.workload import Workload
+from benchmarks.scenarios import SCENARIOS, runScenario
@@ -0,0 +1,110 @@
+from benchmarks.scenarios import SCENARIOS, runScenario
+from datetime import datetime
+import argparse
+import json
+import platform
+import subprocess
+import sys
+
+def currentCommit():
+    '''
+    Funcao que busca o commit atual do repositorio, para identificar os resultados.
+
+    Parameters:
+    ----------
+    None
+
+    Returns
+    -------
+    Hash do commit ou None fora de um repositorio git
+    '''
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    '''
+    Funcao que compara os resultados com os de uma execucao anterior.
+
+    Parameters:
+    ----------
+    results : list
+        Resultados desta execucao
+    baseline : dict
+        Arquivo JSON de uma execucao anterior
+    threshold : float
+        Razao a partir da qual um cenario e marcado como regressao
+
+    Returns
+    -------
+    value (int): Quantidade de regressoes
+    '''
+    previous = {(result['scenario'], result['scale']): result for result in baseline['results']}
+
+    regressions = 0
+
+    for result in results:
+        old = previous.get((result['scenario'], result['scale']))
+
+        if old is None:
+            continue
+
+        ratio = result['best'] / old['best'] if old['best'] else float('inf')
+
+        flag = ' REGRESSAO' if ratio > threshold else ''
+
+        regressions += bool(flag)
+
+        print(f'{result["scenario"]:>18} {result["scale"]:>8} {ratio:>8.2f}x{flag}')
+
+    return regressions
+
+def main(arguments):
+    names = arguments.scenarios.split(',') if arguments.scenarios else list(SCENARIOS)
+
+    unknown = [name for name in names if name not in SCENARIOS]
+
+    if unknown:
+        raise SystemExit(f'Cenarios desconhecidos: {", ".join(unknown)}')
+
+    results = []
+
+    for scale in arguments.scales:
+        for name in names:
+            result = runScenario(name, scale, arguments.repeat)
+
+            results.append(result)
+
+            print(f'{name:>18} {scale:>8} {result["best"]:>10.4f} s {result["perOperation"] * 1e6:>10.2f} us/op', file=sys.stderr)
+
+    report = {
+        'commit': currentCommit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': datetime.now().isoformat(),
+        'repeat': arguments.repeat,
+        'results': results
+    }
+
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if arguments.compare:
+        with open(arguments.compare, encoding='utf-8') as file:
+            if compare(results, json.load(file), arguments.threshold):
+                raise SystemExit(1)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks das operacoes da loja com uma carga sintetica')
+    parser.add_argument('--scales', type=lambda value: [int(scale) for scale in value.split(',')], default=[1000, 10000, 100000], help='escalas separadas por virgula')
+    parser.add_argument('--scenarios', help=f'cenarios separados por virgula, por default todos: {",".join(SCENARIOS)}')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='arquivo JSON com os resultados, por default a saida padrao')
+    parser.add_argument('--compare', help='arquivo JSON de uma execucao anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=1.2, help='razao a partir da qual um cenario e marcado como regressao')
+
+    main(parser.parse_args())
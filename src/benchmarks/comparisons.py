@@ -0,0 +1,804 @@
+from models import Store, Rental, Client
+from validation import validateMany
+from eventlog import EventLogBackend
+from concurrency import ConcurrentStore
+from billing import calculateCharges, calculateChargesParallel
+from pricing import DEFAULT_TARIFF, unitsBetween
+from accounting import Ledger
+from history import RentalHistory
+from network import StoreNetwork
+import random
+import math
+from datetime import datetime, timedelta
+import tracemalloc
+import tempfile
+import threading
+import time
+import timeit
+import re
+import os
+
+def buildStore(clients=0, bikes=0):
+    '''
+    Funcao que monta uma loja populada para os benchmarks.
+
+    Parameters:
+    ----------
+    clients : int
+        Quantidade de clientes cadastrados
+    bikes : int
+        Quantidade de bicicletas cadastradas
+
+    Returns
+    -------
+    Store populada
+    '''
+    store = Store('Loja de bikes', 'Rua Um, 123')
+
+    for i in range(clients):
+        store.addClient(f'Nome{i}', f'email{i}@mail.com', f'{i:011d}')
+
+    for i in range(bikes):
+        store.addBike('Branco')
+
+    return store
+
+def benchmarkClientLookup(sizes=(1000, 10000, 100000, 1000000), number=100000):
+    '''
+    Funcao que mede o custo das buscas de cliente por email, CPF e ID.
+
+    Parameters:
+    ----------
+    sizes : tuple
+        Quantidades de clientes cadastrados em cada rodada
+    number : int
+        Quantidade de buscas por rodada
+
+    Returns
+    -------
+    None
+    '''
+    print('=== Busca de clientes (ns por busca) ===')
+    print(f'{"clientes":>10} {"email":>10} {"cpf":>10} {"id":>10}')
+
+    for size in sizes:
+        store = buildStore(clients=size)
+
+        last = size - 1
+
+        email = timeit.timeit(lambda: store.findClientByEmail(f'email{last}@mail.com'), number=number)
+        cpf = timeit.timeit(lambda: store.findClientByCpf(f'{last:011d}'), number=number)
+        id = timeit.timeit(lambda: store.findClientById(size), number=number)
+
+        print(f'{size:>10} {email / number * 1e9:>10.0f} {cpf / number * 1e9:>10.0f} {id / number * 1e9:>10.0f}')
+
+def benchmarkAvailableBikes(sizes=(1000, 10000, 100000), quantity=5, number=10000):
+    '''
+    Funcao que mede o custo de buscar bicicletas com a frota quase toda alugada.
+
+    Parameters:
+    ----------
+    sizes : tuple
+        Quantidades de bicicletas da frota em cada rodada
+    quantity : int
+        Quantidade de bicicletas buscadas por chamada
+    number : int
+        Quantidade de buscas por rodada
+
+    Returns
+    -------
+    None
+    '''
+    print('=== Busca de bicicletas disponiveis (ns por busca) ===')
+    print(f'{"bicicletas":>10} {"busca":>10}')
+
+    for size in sizes:
+        store = buildStore(clients=1, bikes=size)
+
+        for bike in store.getAvailableBikes(size - quantity):
+            store.markBikeRented(bike)
+
+        elapsed = timeit.timeit(lambda: store.getAvailableBikes(quantity), number=number)
+
+        print(f'{size:>10} {elapsed / number * 1e9:>10.0f}')
+
+def benchmarkRentalMemory(count=10000000):
+    '''
+    Funcao que mede a memoria ocupada por alugueis como dicionarios e como Rental.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de alugueis carregados
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Memoria de {count} alugueis (bytes por registro) ===')
+
+    start = datetime(2021, 3, 1)
+
+    models = ('hourly', 'daily', 'weekly')
+
+    def asDict(i):
+        return {
+            'id': i + 1,
+            'model': models[i % 3],
+            'family': False,
+            'start': start + timedelta(seconds=i),
+            'end': start + timedelta(seconds=i + 3600),
+            'bikeId': i % 1000 + 1,
+            'clientId': i % 100000 + 1
+        }
+
+    def asRental(i):
+        return Rental(i + 1, models[i % 3], False, start + timedelta(seconds=i), start + timedelta(seconds=i + 3600), i % 1000 + 1, i % 100000 + 1)
+
+    for name, build in (('dict', asDict), ('Rental', asRental)):
+        tracemalloc.start()
+
+        rentals = [build(i) for i in range(count)]
+
+        size = tracemalloc.get_traced_memory()[0]
+
+        tracemalloc.stop()
+
+        del rentals
+
+        print(f'{name:>10} {size / count:>10.1f}')
+
+def legacyClient(id, name, email, cpf):
+    '''
+    Funcao que reproduz a validacao original do construtor de Client.
+    '''
+    if not isinstance(id, int):
+        raise TypeError('O ID do cliente deve ser um inteiro.')
+
+    if not isinstance(name, str):
+        raise TypeError('O nome do cliente deve ser string.')
+
+    if not isinstance(email, str):
+        raise TypeError('O email do cliente deve ser string.')
+
+    if not isinstance(cpf, str):
+        raise TypeError('O CPF do cliente deve ser string.')
+
+    if not re.fullmatch(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$', email):
+        raise TypeError('Email invalido.')
+
+    if not re.fullmatch(r'^[0-9]{3}[\.]?[0-9]{3}[\.]?[0-9]{3}[-]?[0-9]{2}$', cpf):
+        raise TypeError('CPF invalido.')
+
+def benchmarkClientValidation(count=200000):
+    '''
+    Funcao que compara a vazao da validacao original com a do modulo validation.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de clientes validados
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Validacao de {count} clientes (clientes por segundo) ===')
+
+    rows = [(f'Nome{i}', f'email{i}@mail.com', f'{i // 1000 % 1000:03d}.{i % 1000:03d}.{i % 997:03d}-{i % 100:02d}') for i in range(count)]
+
+    def legacy():
+        for i, (name, email, cpf) in enumerate(rows):
+            legacyClient(i, name, email, cpf)
+
+    def construct():
+        for i, (name, email, cpf) in enumerate(rows):
+            Client(i, name, email, cpf)
+
+    for name, run in (('original', legacy), ('Client', construct), ('validateMany', lambda: validateMany(rows))):
+        elapsed = timeit.timeit(run, number=1)
+
+        print(f'{name:>14} {count / elapsed:>12.0f}')
+
+def benchmarkBulkImport(count=1000000):
+    '''
+    Funcao que mede a carga de clientes e bicicletas em lote.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de clientes e de bicicletas carregados
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Carga em lote de {count} registros (segundos) ===')
+
+    store = Store('Loja de bikes', 'Rua Um, 123')
+
+    rows = ((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(count))
+
+    elapsed = timeit.timeit(lambda: store.addClients(rows), number=1)
+
+    print(f'{"clientes":>10} {elapsed:>10.2f}')
+
+    elapsed = timeit.timeit(lambda: store.addBikes('Branco' for i in range(count)), number=1)
+
+    print(f'{"bicicletas":>10} {elapsed:>10.2f}')
+
+def benchmarkRestart(history=100000, tails=(0, 1000, 10000, 100000)):
+    '''
+    Funcao que mede o tempo de reinicializacao pelo log de eventos, com um snapshot
+    cobrindo o historico e caudas de tamanhos diferentes.
+
+    Parameters:
+    ----------
+    history : int
+        Quantidade de eventos cobertos pelo snapshot
+    tails : tuple
+        Quantidades de eventos gravados depois do snapshot
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Reinicializacao com {history} eventos no snapshot (segundos) ===')
+    print(f'{"cauda":>10} {"total":>10} {"replay":>10}')
+
+    for tail in tails:
+        with tempfile.TemporaryDirectory() as directory:
+            store = Store('Loja de bikes', 'Rua Um, 123', EventLogBackend(directory, syncEvery=10000))
+
+            store.addBikes('Branco' for i in range(history))
+
+            store.backend.snapshot()
+
+            store.addBikes('Branco' for i in range(tail))
+
+            store.close()
+
+            def restart():
+                Store('Loja de bikes', 'Rua Um, 123', EventLogBackend(directory)).close()
+
+            elapsed = timeit.timeit(restart, number=1)
+
+            replayOnly = timeit.timeit(
+                lambda: store.backend.replay(store.backend.segment, {}, {}, {}),
+                number=1
+            )
+
+            print(f'{tail:>10} {elapsed:>10.3f} {replayOnly:>10.3f}')
+
+def benchmarkConcurrentRentals(threadCounts=(1, 2, 4, 8), operations=20000, bikes=1000):
+    '''
+    Funcao que mede a vazao de alugueis e devolucoes na ConcurrentStore conforme
+    o numero de threads cresce, cada thread atendendo os seus proprios clientes.
+
+    Parameters:
+    ----------
+    threadCounts : tuple
+        Quantidades de threads em cada rodada
+    operations : int
+        Quantidade total de pares aluguel/devolucao por rodada
+    bikes : int
+        Tamanho da frota
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Alugueis concorrentes (pares aluguel/devolucao por segundo) ===')
+    print(f'{"threads":>10} {"vazao":>12}')
+
+    for threads in threadCounts:
+        store = ConcurrentStore('Loja de bikes', 'Rua Um, 123')
+
+        store.addClients((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(threads * 10))
+
+        store.addBikes(['Branco'] * bikes)
+
+        def worker(thread):
+            for i in range(operations // threads):
+                email = f'email{thread * 10 + i % 10}@mail.com'
+
+                store.addRental('hourly', email, 1)
+
+                store.calculateRental(email)
+
+        workers = [threading.Thread(target=worker, args=(thread,)) for thread in range(threads)]
+
+        start = time.perf_counter()
+
+        for thread in workers:
+            thread.start()
+
+        for thread in workers:
+            thread.join()
+
+        elapsed = time.perf_counter() - start
+
+        print(f'{threads:>10} {operations / elapsed:>12.0f}')
+
+def benchmarkBatchBilling(count=1000000):
+    '''
+    Funcao que compara o calculo em lote (billing) com um laco escalar equivalente
+    ao de Store.calculateRental.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de alugueis faturados
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Faturamento de {count} alugueis (segundos) ===')
+
+    generator = random.Random(42)
+
+    clientIds = [generator.randrange(count // 10 + 1) for i in range(count)]
+    starts = [generator.randrange(10 ** 15, 2 * 10 ** 15) for i in range(count)]
+    ends = [start + generator.randrange(10 ** 12) for start in starts]
+    models = [generator.randrange(3) for i in range(count)]
+    families = [generator.random() < 0.3 for i in range(count)]
+
+    def scalar():
+        values = {}
+
+        for clientId, start, end, model, family in zip(clientIds, starts, ends, models, families):
+            units = max(1, math.ceil((end - start) / 1000000 / DEFAULT_TARIFF.unitSeconds[model]))
+
+            value, valueForFamily = values.get(clientId, (0, 0))
+
+            if family:
+                values[clientId] = (value, valueForFamily + units * DEFAULT_TARIFF.rates[model])
+            else:
+                values[clientId] = (value + units * DEFAULT_TARIFF.rates[model], valueForFamily)
+
+        return {clientId: value + (valueForFamily * 0.7) for clientId, (value, valueForFamily) in values.items()}
+
+    elapsed = timeit.timeit(scalar, number=1)
+
+    print(f'{"escalar":>10} {elapsed:>10.2f}')
+
+    elapsed = timeit.timeit(lambda: calculateCharges(clientIds, starts, ends, models, families), number=1)
+
+    print(f'{"lote":>10} {elapsed:>10.2f}')
+
+def benchmarkRunningBalance(count=100000, queries=1000):
+    '''
+    Funcao que compara o saldo incremental (Ledger) com o recalculo de todos os
+    alugueis em aberto a cada consulta do painel.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de alugueis em aberto
+    queries : int
+        Quantidade de consultas do saldo da loja, uma por minuto simulado
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Saldo de {count} alugueis em aberto, {queries} consultas (segundos) ===')
+
+    generator = random.Random(42)
+
+    base = datetime(2021, 3, 1)
+
+    rentals = [
+        Rental(id, generator.choice(DEFAULT_TARIFF.names), generator.random() < 0.3, base + timedelta(seconds=generator.randrange(86400)), None, id, generator.randrange(count // 10 + 1))
+        for id in range(count)
+    ]
+
+    moments = [base + timedelta(days=1, minutes=i) for i in range(queries)]
+
+    elapsed = timeit.timeit(lambda: [DEFAULT_TARIFF.quote(rentals, now) for now in moments], number=1)
+
+    print(f'{"recalculo":>10} {elapsed:>10.2f}')
+
+    def incremental():
+        ledger = Ledger(DEFAULT_TARIFF)
+
+        for rent in rentals:
+            ledger.open(rent)
+
+        return [ledger.total(now) for now in moments]
+
+    elapsed = timeit.timeit(incremental, number=1)
+
+    print(f'{"ledger":>10} {elapsed:>10.2f}')
+
+def benchmarkFleetQueries(count=100000, queries=1000):
+    '''
+    Funcao que compara as consultas da frota por varredura com os indices e contadores da loja.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de bicicletas na loja
+    queries : int
+        Quantidade de consultas
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== {queries} consultas em uma frota de {count} bicicletas (segundos) ===')
+
+    generator = random.Random(42)
+
+    colors = ['Branco', 'Preto', 'Vermelho', 'Azul', 'Verde']
+
+    store = Store('Loja de bikes', 'Rua Um, 123')
+
+    store.addBikes(generator.choice(colors) for i in range(count))
+
+    for bike in generator.sample(store.bikes, count // 2):
+        store.markBikeRented(bike)
+
+    def scan():
+        for i in range(queries):
+            sum(1 for bike in store.bikes if bike.color == 'Vermelho' and bike.available)
+
+    elapsed = timeit.timeit(scan, number=1)
+
+    print(f'{"varredura":>10} {elapsed:>10.4f}')
+
+    elapsed = timeit.timeit(lambda: [store.countBikes(available=True, color='Vermelho') for i in range(queries)], number=1)
+
+    print(f'{"contador":>10} {elapsed:>10.4f}')
+
+    elapsed = timeit.timeit(lambda: [store.listBikes(i % 100 + 1, 20, available=False) for i in range(queries)], number=1)
+
+    print(f'{"alugadas":>10} {elapsed:>10.4f}')
+
+    elapsed = timeit.timeit(lambda: [store.listBikes(i % 100 + 1, 20, available=True, color='Vermelho') for i in range(queries)], number=1)
+
+    print(f'{"pagina":>10} {elapsed:>10.4f}')
+
+def benchmarkHistoryRange(count=1000000):
+    '''
+    Funcao que compara a receita de um mes calculada por varredura da lista de
+    alugueis com a consulta por periodo do historico ordenado.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de alugueis encerrados, espalhados por um ano
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Receita de um mes em {count} alugueis (segundos) ===')
+
+    generator = random.Random(42)
+
+    base = datetime(2021, 1, 1)
+
+    rentals = []
+
+    for id in range(count):
+        start = base + timedelta(seconds=id * 31536000 // count)
+
+        rentals.append(Rental(id, generator.choice(DEFAULT_TARIFF.names), generator.random() < 0.3, start, start + timedelta(seconds=generator.randrange(1, 86400)), id % 1000, id % 10000))
+
+    history = RentalHistory()
+
+    for rent in rentals:
+        history.add(rent)
+
+    month, nextMonth = datetime(2021, 6, 1), datetime(2021, 7, 1)
+
+    def scan():
+        value = 0
+
+        for rent in rentals:
+            if month <= rent.start < nextMonth:
+                code = DEFAULT_TARIFF.codes[rent.model]
+
+                value += DEFAULT_TARIFF.units(code, rent.start, rent.end) * DEFAULT_TARIFF.rates[code] * (DEFAULT_TARIFF.familyFactor if rent.family else 1)
+
+        return value
+
+    elapsed = timeit.timeit(scan, number=1)
+
+    print(f'{"varredura":>10} {elapsed:>10.2f}')
+
+    elapsed = timeit.timeit(lambda: history.revenueByModel(DEFAULT_TARIFF, month, nextMonth), number=1)
+
+    print(f'{"historico":>10} {elapsed:>10.2f}')
+
+def benchmarkStoreNetwork(stores=100, rentals=20000):
+    '''
+    Funcao que mede o roteamento de uma rede de lojas e compara a receita da
+    rede calculada em serie com a calculada no pool de processos.
+
+    Parameters:
+    ----------
+    stores : int
+        Quantidade de filiais
+    rentals : int
+        Quantidade de alugueis encerrados por filial
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Rede de {stores} lojas com {rentals} alugueis cada (segundos) ===')
+
+    generator = random.Random(42)
+
+    base = datetime(2021, 1, 1)
+
+    network = StoreNetwork()
+
+    network.addClients((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(10000))
+
+    for index in range(stores):
+        store = network.addStore(f'Loja{index}', 'Rua Um, 123')
+
+        rows = []
+
+        for id in range(1, rentals + 1):
+            start = base + timedelta(seconds=generator.randrange(31536000))
+
+            rows.append((id, generator.choice(DEFAULT_TARIFF.names), generator.random() < 0.3, start, start + timedelta(seconds=generator.randrange(1, 604800)), id % 100 + 1, generator.randrange(1, 10001)))
+
+        store.restore([(id, 'Branco', True) for id in range(1, 101)], [], sorted(rows, key=lambda row: row[3]))
+
+    names = [f'Loja{generator.randrange(stores)}' for i in range(100000)]
+
+    elapsed = timeit.timeit(lambda: [network.store(name) for name in names], number=1)
+
+    print(f'{"roteamento":>12} {elapsed / len(names) * 1e9:>10.0f} ns')
+
+    def serial():
+        totals = {}
+
+        for store in network.stores.values():
+            for model, value in store.history.revenueByModel(store.tariff).items():
+                totals[model] = totals.get(model, 0) + value
+
+        return totals
+
+    elapsed = timeit.timeit(serial, number=1)
+
+    print(f'{"serie":>12} {elapsed:>10.2f}')
+
+    network.pool()
+
+    elapsed = timeit.timeit(network.revenueByModel, number=1)
+
+    print(f'{"paralelo":>12} {elapsed:>10.2f}')
+
+    network.close()
+
+def benchmarkParallelSettlement(count=2000000):
+    '''
+    Funcao que mede o fechamento em lote dividido entre 1 a N processos,
+    conferindo que o resultado e identico ao calculo serial.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de alugueis fechados
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== Fechamento de {count} alugueis por processos (segundos) ===')
+
+    generator = random.Random(42)
+
+    clientIds = [generator.randrange(count // 10 + 1) for i in range(count)]
+    starts = [generator.randrange(10 ** 15, 2 * 10 ** 15) for i in range(count)]
+    ends = [start + generator.randrange(10 ** 12) for start in starts]
+    models = [generator.randrange(3) for i in range(count)]
+    families = [generator.random() < 0.3 for i in range(count)]
+
+    serial = None
+
+    elapsed = timeit.timeit(lambda: calculateCharges(clientIds, starts, ends, models, families), number=1)
+
+    print(f'{"serie":>10} {elapsed:>10.2f}')
+
+    processes = 1
+
+    while processes <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+
+        charges = calculateChargesParallel(clientIds, starts, ends, models, families, processes=processes)
+
+        elapsed = time.perf_counter() - start
+
+        if serial is None:
+            serial = calculateCharges(clientIds, starts, ends, models, families)
+
+        print(f'{processes:>10} {elapsed:>10.2f} {"identico" if charges == serial else "DIFERENTE"}')
+
+        processes *= 2
+
+def benchmarkMetricsOverhead(count=200000):
+    '''
+    Funcao que mede o custo da instrumentacao em alugueis e devolucoes, desligada e ligada.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de pares aluguel/devolucao
+
+    Returns
+    -------
+    None
+    '''
+    print(f'=== {count} alugueis e devolucoes com e sem metricas (segundos) ===')
+
+    for label, enabled in (('desligada', False), ('ligada', True)):
+        store = buildStore(clients=1, bikes=10)
+
+        if enabled:
+            store.enableMetrics()
+
+        email = store.clients[0].email
+
+        def run():
+            for i in range(count):
+                store.addRental('hourly', email, 1)
+                store.calculateRental(email)
+
+        elapsed = timeit.timeit(run, number=1)
+
+        print(f'{label:>10} {elapsed:>10.2f}')
+
+def benchmarkBookings(bookings=100000, bikes=1000, queries=1000):
+    '''
+    Funcao que compara a busca de k bicicletas livres em uma janela pela agenda
+    de reservas com uma varredura de todas as reservas.
+
+    Parameters:
+    ----------
+    bookings : int
+        Quantidade de reservas tentadas ao longo de um ano
+    bikes : int
+        Quantidade de bicicletas na loja
+    queries : int
+        Quantidade de buscas por 5 bicicletas livres
+
+    Returns
+    -------
+    None
+    '''
+    generator = random.Random(42)
+
+    store = buildStore(clients=1, bikes=bikes)
+
+    email = store.clients[0].email
+
+    base = datetime.today() + timedelta(days=1)
+
+    windows = []
+
+    for i in range(bookings):
+        start = base + timedelta(minutes=generator.randrange(525600))
+
+        windows.append((start, start + timedelta(minutes=generator.randrange(30, 600))))
+
+    start = time.perf_counter()
+
+    for window in windows:
+        try:
+            store.bookBikes('hourly', email, 1, *window)
+        except KeyError:
+            pass
+
+    elapsed = time.perf_counter() - start
+
+    print(f'=== {len(store.schedule)} reservas em {bikes} bicicletas, {queries} buscas (segundos) ===')
+    print(f'{"reservar":>10} {elapsed:>10.2f}')
+
+    queryWindows = generator.sample(windows, queries)
+
+    booked = list(store.schedule.bookings.values())
+
+    def scan():
+        for start, end in queryWindows:
+            busy = {booking.bikeId for booking in booked if booking.start < end and start < booking.end}
+
+            [bike for bike in store.bikes if bike.id not in busy][:5]
+
+    elapsed = timeit.timeit(scan, number=1)
+
+    print(f'{"varredura":>10} {elapsed:>10.2f}')
+
+    elapsed = timeit.timeit(lambda: [store.schedule.findFree(5, start, end) for start, end in queryWindows], number=1)
+
+    print(f'{"agenda":>10} {elapsed:>10.2f}')
+
+def benchmarkCalculateTime(count=1000000, groupSize=4):
+    '''
+    Funcao que compara o calculo de unidades em ponto flutuante com o calculo
+    inteiro, direto e memorizado por (modelo, inicio) dentro de uma chamada,
+    como em Tariff.quote, em alugueis agrupados como grupos familia que
+    compartilham modelo, inicio e entrega.
+
+    Parameters:
+    ----------
+    count : int
+        Quantidade de alugueis
+    groupSize : int
+        Quantidade de alugueis de cada grupo
+
+    Returns
+    -------
+    None
+    '''
+    generator = random.Random(42)
+
+    end = datetime(2021, 3, 1)
+
+    rentals = []
+
+    for i in range(count // groupSize):
+        code = generator.randrange(3)
+
+        start = end - timedelta(microseconds=generator.randrange(30 * 86400 * 1000000))
+
+        rentals.extend([(code, start)] * groupSize)
+
+    unitSeconds = DEFAULT_TARIFF.unitSeconds
+
+    unitMicroseconds = DEFAULT_TARIFF.unitMicroseconds
+
+    print(f'=== unidades de {len(rentals)} alugueis em grupos de {groupSize} (segundos) ===')
+
+    elapsed = timeit.timeit(lambda: [max(1, math.ceil((end - start).total_seconds() / unitSeconds[code])) for code, start in rentals], number=1)
+
+    print(f'{"float":>10} {elapsed:>10.2f}')
+
+    elapsed = timeit.timeit(lambda: [unitsBetween(unitMicroseconds[code], start, end) for code, start in rentals], number=1)
+
+    print(f'{"inteiro":>10} {elapsed:>10.2f}')
+
+    def memoized():
+        computed = {}
+
+        units = []
+
+        for rent in rentals:
+            count = computed.get(rent)
+
+            if count is None:
+                count = computed[rent] = unitsBetween(unitMicroseconds[rent[0]], rent[1], end)
+
+            units.append(count)
+
+        return units
+
+    elapsed = timeit.timeit(memoized, number=1)
+
+    print(f'{"memo":>10} {elapsed:>10.2f}')
+
+if __name__ == '__main__':
+    benchmarkClientLookup()
+    benchmarkAvailableBikes()
+    benchmarkRentalMemory()
+    benchmarkClientValidation()
+    benchmarkBulkImport()
+    benchmarkRestart()
+    benchmarkConcurrentRentals()
+    benchmarkBatchBilling()
+    benchmarkRunningBalance()
+    benchmarkFleetQueries()
+    benchmarkHistoryRange()
+    benchmarkStoreNetwork()
+    benchmarkParallelSettlement()
+    benchmarkMetricsOverhead()
+    benchmarkBookings()
+    benchmarkCalculateTime()
+    benchmarkCalculateTime(groupSize=1)
@@ -0,0 +1,199 @@
+from benchmarks.workload import Workload
+from simulation import Simulator
+import random
+import timeit
+
+OPERATIONS = 1000
+
+def populated(scale, rented=0):
+    '''
+    Funcao que monta uma loja com scale clientes e bicicletas e alguns alugueis em aberto.
+
+    Parameters:
+    ----------
+    scale : int
+        Quantidade de clientes e de bicicletas
+    rented : int
+        Quantidade de clientes com um aluguel por hora em aberto
+
+    Returns
+    -------
+    Store populada
+    '''
+    store = Workload(scale, scale, 0).buildStore()
+
+    for i in range(rented):
+        store.addRental('hourly', f'email{i}@mail.com', 1)
+
+    return store
+
+def emails(scale, count, seed=42):
+    generator = random.Random(seed)
+
+    return [f'email{generator.randrange(scale)}@mail.com' for i in range(count)]
+
+def setupAddBike(scale):
+    return populated(scale), OPERATIONS
+
+def runAddBike(store):
+    for i in range(OPERATIONS):
+        store.addBike('Branco')
+
+def setupAddClient(scale):
+    return (populated(scale), scale), OPERATIONS
+
+def runAddClient(state):
+    store, scale = state
+
+    for i in range(scale, scale + OPERATIONS):
+        store.addClient(f'Nome{i}', f'email{i}@mail.com', f'{i:011d}')
+
+def setupAddRental(scale):
+    count = min(scale, OPERATIONS)
+
+    return (populated(scale), [f'email{i}@mail.com' for i in range(count)]), count
+
+def runAddRental(state):
+    store, addresses = state
+
+    for email in addresses:
+        store.addRental('hourly', email, 1)
+
+def setupCalculateRental(scale):
+    count = min(scale, OPERATIONS)
+
+    return (populated(scale, count), [f'email{i}@mail.com' for i in range(count)]), count
+
+def runCalculateRental(state):
+    store, addresses = state
+
+    for email in addresses:
+        store.calculateRental(email)
+
+def setupQuote(scale):
+    count = min(scale, OPERATIONS)
+
+    return (populated(scale, count), [f'email{i}@mail.com' for i in range(count)]), count
+
+def runQuote(state):
+    store, addresses = state
+
+    for email in addresses:
+        store.quote(email)
+
+def runBalance(state):
+    store, addresses = state
+
+    for email in addresses:
+        store.balance(email)
+
+def setupFindClientByEmail(scale):
+    return (populated(scale), emails(scale, OPERATIONS)), OPERATIONS
+
+def runFindClientByEmail(state):
+    store, addresses = state
+
+    for email in addresses:
+        store.findClientByEmail(email)
+
+def setupGetAvailableBikes(scale):
+    return populated(scale, scale // 2), OPERATIONS
+
+def runGetAvailableBikes(store):
+    for i in range(OPERATIONS):
+        store.getAvailableBikes(5)
+
+def setupListBikes(scale):
+    return populated(scale, scale // 2), 100
+
+def runListBikes(store):
+    for page in range(1, 101):
+        store.listBikes(page, 20, available=True)
+
+def setupStats(scale):
+    return populated(scale, scale // 2), OPERATIONS
+
+def runStats(store):
+    for i in range(OPERATIONS):
+        store.stats()
+
+def setupSettleAll(scale):
+    return populated(scale, scale), scale
+
+def runSettleAll(store):
+    store.settleAll()
+
+def setupWorkload(scale):
+    workload = Workload(scale, scale, scale)
+
+    return (workload, workload.buildStore()), len(workload)
+
+def runWorkload(state):
+    workload, store = state
+
+    workload.replay(store)
+
+def setupSimulation(scale):
+    return Simulator(scale, scale, 7, scale / 10), round(scale / 10 * 24 * 7)
+
+def runSimulation(simulator):
+    simulator.run()
+
+SCENARIOS = {
+    'addBike': (setupAddBike, runAddBike),
+    'addClient': (setupAddClient, runAddClient),
+    'addRental': (setupAddRental, runAddRental),
+    'calculateRental': (setupCalculateRental, runCalculateRental),
+    'quote': (setupQuote, runQuote),
+    'balance': (setupQuote, runBalance),
+    'findClientByEmail': (setupFindClientByEmail, runFindClientByEmail),
+    'getAvailableBikes': (setupGetAvailableBikes, runGetAvailableBikes),
+    'listBikes': (setupListBikes, runListBikes),
+    'stats': (setupStats, runStats),
+    'settleAll': (setupSettleAll, runSettleAll),
+    'workload': (setupWorkload, runWorkload),
+    'simulation': (setupSimulation, runSimulation)
+}
+
+def runScenario(name, scale, repeat=5):
+    '''
+    Funcao que mede um cenario em uma escala. Cada repeticao monta um estado
+    novo, fora da medicao, e mede apenas a execucao das operacoes.
+
+    Parameters:
+    ----------
+    name : str
+        Nome do cenario em SCENARIOS
+    scale : int
+        Quantidade de clientes e de bicicletas da loja
+    repeat : int, optional
+        Quantidade de repeticoes
+
+    Returns
+    -------
+    Dicionario com o cenario, a escala, as operacoes medidas e os tempos em segundos
+    '''
+    setup, run = SCENARIOS[name]
+
+    times = []
+
+    for i in range(repeat):
+        state, operations = setup(scale)
+
+        start = timeit.default_timer()
+
+        run(state)
+
+        times.append(timeit.default_timer() - start)
+
+    best = min(times)
+
+    return {
+        'scenario': name,
+        'scale': scale,
+        'operations': operations,
+        'repeat': repeat,
+        'best': best,
+        'mean': sum(times) / len(times),
+        'perOperation': best / operations if operations else 0.0
+    }
@@ -0,0 +1,138 @@
+from models import Store
+from pricing import DEFAULT_TARIFF
+import random
+
+COLORS = ('Branco', 'Preto', 'Vermelho', 'Azul', 'Verde')
+
+class Workload(object):
+    def __init__(self, clients, bikes, operations, seed=42, familyShare=0.1, returnShare=0.45, modelWeights=(0.6, 0.3, 0.1)):
+        """
+        Constroi uma carga sintetica e reproduzivel para a loja.
+
+        A sequencia de operacoes e gerada simulando a loja: um aluguel so e
+        gerado quando ha bicicletas livres e o cliente nao tem alugueis em
+        aberto, e uma devolucao so e gerada para um cliente com alugueis em
+        aberto, entao a carga inteira roda sem erros. A mesma semente gera
+        sempre a mesma carga.
+
+        Parameters
+        ----------
+            clients : int
+                Quantidade de clientes
+            bikes : int
+                Quantidade de bicicletas
+            operations : int
+                Quantidade de alugueis e devolucoes; so fica menor se nao houver clientes ou bicicletas
+            seed : int, optional
+                Semente do gerador
+            familyShare : float, optional
+                Fracao dos alugueis que sao da promocao familia
+            returnShare : float, optional
+                Probabilidade de a proxima operacao ser uma devolucao, quando houver alugueis em aberto
+            modelWeights : tuple, optional
+                Pesos dos modelos da tabela de precos padrao (hora, dia, semana)
+            clientRows : list
+                Tuplas (name, email, cpf) dos clientes
+            bikeColors : list
+                Cores das bicicletas
+            operationList : list
+                ('rent', model, email, quantity, family) ou ('return', email)
+        """
+
+        generator = random.Random(seed)
+
+        self.seed = seed
+        self.clientRows = [(f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(clients)]
+        self.bikeColors = [generator.choice(COLORS) for i in range(bikes)]
+        self.operationList = []
+
+        free = bikes
+        renting = []
+        positions = {}
+        idle = list(range(clients))
+
+        for i in range(operations):
+            family = generator.random() < familyShare
+
+            quantity = generator.randint(DEFAULT_TARIFF.familyMin, DEFAULT_TARIFF.familyMax) if family else generator.choice((1, 1, 1, 2))
+
+            if not renting and free < quantity:
+                family, quantity = False, 1
+
+            if renting and (generator.random() < returnShare or not idle or free < quantity):
+                index = generator.randrange(len(renting))
+
+                client = renting[index]
+
+                renting[index] = renting[-1]
+                renting.pop()
+
+                free += positions.pop(client)
+
+                idle.append(client)
+
+                self.operationList.append(('return', self.clientRows[client][1]))
+            elif idle and free >= quantity:
+                index = generator.randrange(len(idle))
+
+                client = idle[index]
+
+                idle[index] = idle[-1]
+                idle.pop()
+
+                free -= quantity
+
+                positions[client] = quantity
+
+                renting.append(client)
+
+                model = generator.choices(DEFAULT_TARIFF.names, modelWeights)[0]
+
+                self.operationList.append(('rent', model, self.clientRows[client][1], quantity, family))
+
+    def __len__(self):
+        return len(self.operationList)
+
+    def buildStore(self, backend=None):
+        '''
+        Metodo que monta uma loja com os clientes e bicicletas da carga.
+
+        Parameters:
+        ----------
+        backend : MemoryBackend, optional
+            Armazenamento persistente da loja
+
+        Returns
+        -------
+        Store populada
+        '''
+        store = Store('Loja de bikes', 'Rua Um, 123', backend)
+
+        store.addClients(self.clientRows)
+
+        store.addBikes(self.bikeColors)
+
+        return store
+
+    def replay(self, store):
+        '''
+        Metodo que executa as operacoes da carga em uma loja.
+
+        Parameters:
+        ----------
+        store : Store
+            Loja montada por buildStore
+
+        Returns
+        -------
+        value (float): Soma dos valores cobrados nas devolucoes
+        '''
+        total = 0
+
+        for operation in self.operationList:
+            if operation[0] == 'rent':
+                store.addRental(*operation[1:])
+            else:
+                total += store.calculateRental(operation[1])
+
+        return total
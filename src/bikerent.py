@@ -0,0 +1,282 @@
+import argparse
+import json
+import shlex
+import sys
+
+OPERATIONS = {
+    'addBike': lambda store, color: store.addBike(color),
+    'addClient': lambda store, name, email, cpf: store.addClient(name, email, cpf),
+    'updateClient': lambda store, email, name=None, newEmail=None, cpf=None: store.updateClient(email, name, newEmail, cpf),
+    'removeClient': lambda store, email: store.removeClient(email),
+    'addRental': lambda store, model, email, quantity, family=False: store.addRental(model, email, quantity, family),
+    'calculateRental': lambda store, email: store.calculateRental(email),
+    'returnBikes': lambda store, email, bikeIds: store.returnBikes(email, bikeIds),
+    'returnRental': lambda store, rentalId: store.returnRental(rentalId),
+    'quote': lambda store, email: store.quote(email),
+    'balance': lambda store, email: store.balance(email),
+    'totalBalance': lambda store: store.totalBalance(),
+    'settleAll': lambda store: store.settleAll(),
+    'stats': lambda store: store.stats(),
+    'metrics': lambda store: None if store.metrics is None else store.metrics.snapshot(),
+    'listBikes': lambda store, page=None, pageSize=20, available=None, color=None: [
+        bike.asDict() for bike in (store.iterBikes(available, color) if page is None else store.listBikes(page, pageSize, available, color))
+    ],
+    'showBikes': lambda store, page=None, pageSize=20, available=None, color=None, format='grid': store.showBikes(page, pageSize, available, color, format)
+}
+
+def addCommands(parser):
+    '''
+    Funcao que cadastra no parser um subcomando para cada operacao.
+
+    Parameters:
+    ----------
+    parser : argparse.ArgumentParser
+        Parser que recebe os subcomandos
+
+    Returns
+    -------
+    None
+    '''
+    commands = parser.add_subparsers(dest='op', metavar='comando')
+
+    command = commands.add_parser('addBike', help='adiciona uma bicicleta')
+    command.add_argument('color')
+
+    command = commands.add_parser('addClient', help='adiciona um cliente')
+    command.add_argument('name')
+    command.add_argument('email')
+    command.add_argument('cpf')
+
+    command = commands.add_parser('updateClient', help='altera o cadastro de um cliente')
+    command.add_argument('email')
+    command.add_argument('--name')
+    command.add_argument('--new-email', dest='newEmail')
+    command.add_argument('--cpf')
+
+    command = commands.add_parser('removeClient', help='remove um cliente')
+    command.add_argument('email')
+
+    command = commands.add_parser('addRental', help='aluga bicicletas para um cliente')
+    command.add_argument('model')
+    command.add_argument('email')
+    command.add_argument('quantity', type=int)
+    command.add_argument('--family', action='store_true')
+
+    command = commands.add_parser('returnBikes', help='encerra os alugueis de algumas bicicletas de um cliente')
+    command.add_argument('email')
+    command.add_argument('bikeIds', type=int, nargs='+')
+
+    command = commands.add_parser('returnRental', help='encerra um aluguel pelo ID')
+    command.add_argument('rentalId', type=int)
+
+    for op, description in (('calculateRental', 'encerra e calcula os alugueis de um cliente'), ('quote', 'calcula os alugueis de um cliente sem encerrar'), ('balance', 'saldo em aberto de um cliente')):
+        command = commands.add_parser(op, help=description)
+        command.add_argument('email')
+
+    commands.add_parser('totalBalance', help='saldo em aberto da loja')
+    commands.add_parser('settleAll', help='encerra todos os alugueis em aberto')
+    commands.add_parser('stats', help='contadores da loja')
+    commands.add_parser('metrics', help='medicoes das operacoes')
+
+    for op, description in (('listBikes', 'lista as bicicletas em JSON'), ('showBikes', 'exibe as bicicletas')):
+        command = commands.add_parser(op, help=description)
+        command.add_argument('--page', type=int)
+        command.add_argument('--page-size', dest='pageSize', type=int, default=20)
+        command.add_argument('--color')
+
+        availability = command.add_mutually_exclusive_group()
+        availability.add_argument('--available', dest='available', action='store_const', const=True)
+        availability.add_argument('--rented', dest='available', action='store_const', const=False)
+
+        if op == 'showBikes':
+            command.add_argument('--format', choices=('grid', 'plain', 'jsonl'), default='grid')
+
+def buildParser():
+    parser = argparse.ArgumentParser(prog='bikerent', description='Linha de comando da loja de bicicletas')
+    parser.add_argument('--db', help='arquivo SQLite, por default a loja fica em memoria')
+    parser.add_argument('--store-name', dest='storeName', default='Loja de bikes')
+    parser.add_argument('--store-address', dest='storeAddress', default='')
+    parser.add_argument('--metrics', action='store_true', help='mede as operacoes da loja')
+    parser.add_argument('--batch', metavar='ARQUIVO', help='executa um script de comandos ou um fluxo JSONL de operacoes, - para a entrada padrao')
+
+    addCommands(parser)
+
+    return parser
+
+class ScriptParser(argparse.ArgumentParser):
+    def error(self, message):
+        raise ValueError(message)
+
+def scriptParser():
+    parser = ScriptParser(prog='bikerent', add_help=False)
+
+    addCommands(parser)
+
+    return parser
+
+def openStore(arguments):
+    '''
+    Funcao que abre a loja. Os modulos da loja sao importados apenas aqui, para
+    que a ajuda e os erros de uso nao paguem o custo de importacao.
+
+    Parameters:
+    ----------
+    arguments : argparse.Namespace
+        Opcoes globais da linha de comando
+
+    Returns
+    -------
+    Store
+    '''
+    from models import Store
+    from persistence import SQLiteBackend
+
+    backend = SQLiteBackend(arguments.db, wal=True) if arguments.db else None
+
+    store = Store(arguments.storeName, arguments.storeAddress, backend)
+
+    if arguments.metrics:
+        store.enableMetrics()
+
+    return store
+
+def execute(store, op, args):
+    operation = OPERATIONS.get(op)
+
+    if operation is None:
+        raise KeyError('Operacao nao cadastrada.')
+
+    return operation(store, **args)
+
+def errorMessage(error):
+    message = error.args[0] if error.args else type(error).__name__
+
+    return str(message)
+
+def show(result, file):
+    if result is None:
+        return
+
+    if isinstance(result, (dict, list)):
+        print(json.dumps(result), file=file)
+    else:
+        print(result, file=file)
+
+def runBatch(store, lines, file=None, errors=None):
+    '''
+    Funcao que executa um lote de operacoes em uma unica loja. Cada linha e um
+    comando no mesmo formato dos subcomandos (addRental hourly email@mail.com 1)
+    ou uma operacao JSON no formato do servidor ({"op": ..., "args": {...}}).
+    Linhas JSON recebem uma resposta JSON por linha; comandos imprimem o
+    resultado como os subcomandos. Linhas vazias e comentarios (#) sao ignorados
+    e uma linha com erro nao interrompe o lote.
+
+    Parameters:
+    ----------
+    store : Store
+        Loja que executa as operacoes
+    lines : iterable
+        Linhas do lote
+    file : file, optional
+        Saida dos resultados, por default sys.stdout
+    errors : file, optional
+        Saida dos erros dos comandos, por default sys.stderr
+
+    Returns
+    -------
+    value (int): Quantidade de linhas com erro
+    '''
+    if file is None:
+        file = sys.stdout
+
+    if errors is None:
+        errors = sys.stderr
+
+    parser = scriptParser()
+
+    failed = 0
+
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+
+        if not line or line.startswith('#'):
+            continue
+
+        if line.startswith('{'):
+            try:
+                request = json.loads(line)
+
+                response = {'ok': True, 'result': execute(store, request['op'], request.get('args', {}))}
+            except Exception as error:
+                failed += 1
+
+                response = {'ok': False, 'error': errorMessage(error)}
+
+            file.write(json.dumps(response) + '\n')
+
+            continue
+
+        try:
+            args = vars(parser.parse_args(shlex.split(line)))
+
+            op = args.pop('op')
+
+            if op is None:
+                raise ValueError('Comando vazio.')
+
+            show(execute(store, op, args), file)
+        except Exception as error:
+            failed += 1
+
+            print(f'linha {number}: {errorMessage(error)}', file=errors)
+
+    return failed
+
+def main(argv=None):
+    '''
+    Funcao de entrada da linha de comando. Executa um subcomando ou um lote
+    (--batch) e fecha a loja.
+
+    Parameters:
+    ----------
+    argv : list, optional
+        Argumentos, por default sys.argv[1:]
+
+    Returns
+    -------
+    value (int): Codigo de saida
+    '''
+    parser = buildParser()
+
+    arguments = parser.parse_args(argv)
+
+    if arguments.batch is None and arguments.op is None:
+        parser.error('informe um comando ou --batch')
+
+    store = openStore(arguments)
+
+    try:
+        if arguments.batch is not None:
+            if arguments.batch == '-':
+                failed = runBatch(store, sys.stdin)
+            else:
+                with open(arguments.batch, encoding='utf-8') as lines:
+                    failed = runBatch(store, lines)
+
+            return 1 if failed else 0
+
+        args = {key: value for key, value in vars(arguments).items() if key not in ('db', 'storeName', 'storeAddress', 'metrics', 'batch', 'op')}
+
+        try:
+            show(execute(store, arguments.op, args), sys.stdout)
+        except Exception as error:
+            print(errorMessage(error), file=sys.stderr)
+
+            return 1
+
+        return 0
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,333 @@
+from pricing import DEFAULT_TARIFF
+from datetime import datetime
+from array import array
+import importlib.util
+import os
+
+class LazyModule(object):
+    def __init__(self, name):
+        """
+        Constroi um modulo opcional importado apenas no primeiro acesso a um
+        atributo, para que importar a loja nao pague a importacao do NumPy.
+
+        Parameters
+        ----------
+            name : str
+                Nome do modulo
+        """
+
+        self.name = name
+
+    def __getattr__(self, attribute):
+        return getattr(importlib.import_module(self.name), attribute)
+
+numpy = LazyModule('numpy') if importlib.util.find_spec('numpy') else None
+
+EPOCH = datetime(1970, 1, 1)
+
+def toMicroseconds(date):
+    '''
+    Funcao que converte uma data em microssegundos desde 1970, sem perda de precisao.
+
+    Parameters:
+    ----------
+    date : datetime
+        Data a ser convertida
+
+    Returns
+    -------
+    value (int): Microssegundos desde 1970-01-01
+    '''
+    delta = date - EPOCH
+
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def calculateUnits(starts, ends, models, tariff=DEFAULT_TARIFF):
+    '''
+    Funcao que calcula em lote a quantidade de unidades de tempo de cada aluguel,
+    com as mesmas regras de Store.calculateTime: arredonda para cima e cobra no
+    minimo uma unidade. A divisao e inteira, como em pricing.unitsBetween, entao
+    os resultados sao exatos e iguais aos do calculo aluguel a aluguel.
+
+    Parameters:
+    ----------
+    starts : sequence
+        Inicios dos alugueis em microssegundos desde 1970
+    ends : sequence
+        Entregas dos alugueis em microssegundos desde 1970
+    models : sequence
+        Codigos dos modelos de aluguel na tabela de precos
+    tariff : Tariff, optional
+        Tabela de precos compilada, por default a tabela padrao
+
+    Returns
+    -------
+    Array (ou lista, sem NumPy) com as unidades de cada aluguel
+    '''
+    if numpy is None:
+        units = []
+
+        for start, end, model in zip(starts, ends, models):
+            if end < start:
+                raise ValueError('A data de entrega deve ser depois da data de empréstimo.')
+
+            units.append(max(1, -((start - end) // tariff.unitMicroseconds[model])))
+
+        return units
+
+    starts = numpy.asarray(starts, dtype=numpy.int64)
+    ends = numpy.asarray(ends, dtype=numpy.int64)
+    models = numpy.asarray(models, dtype=numpy.intp)
+
+    elapsed = ends - starts
+
+    if (elapsed < 0).any():
+        raise ValueError('A data de entrega deve ser depois da data de empréstimo.')
+
+    units = -(-elapsed // numpy.array(tariff.unitMicroseconds, dtype=numpy.int64)[models])
+
+    return numpy.maximum(units, 1)
+
+def isWeekend(microseconds):
+    '''
+    Funcao que informa se um instante cai no sabado ou no domingo, sabendo que
+    1970-01-01 foi uma quinta-feira.
+
+    Parameters:
+    ----------
+    microseconds : int ou array
+        Instantes em microssegundos desde 1970
+
+    Returns
+    -------
+    True (ou array de booleanos) para os instantes no fim de semana
+    '''
+    return (microseconds // 86400000000 + 3) % 7 >= 5
+
+def calculateCharges(clientIds, starts, ends, models, families, tariff=DEFAULT_TARIFF):
+    '''
+    Funcao que calcula em lote o valor devido por cliente. As unidades inteiras
+    de cada cliente sao somadas por (family, rate) e cobradas como em Tariff.total,
+    com os precos em ordem crescente e o desconto aplicado uma vez sobre a soma da
+    promocao familia, entao o valor e identico, bit a bit, ao de Tariff.quote e
+    Store.calculateRental para os mesmos alugueis, mesmo com precos fracionarios
+    ou de fim de semana.
+
+    Parameters:
+    ----------
+    clientIds : sequence
+        ID do cliente de cada aluguel
+    starts : sequence
+        Inicios dos alugueis em microssegundos desde 1970
+    ends : sequence
+        Entregas dos alugueis em microssegundos desde 1970
+    models : sequence
+        Codigos dos modelos de aluguel na tabela de precos
+    families : sequence
+        Informa se cada aluguel e da promocao familia
+    tariff : Tariff, optional
+        Tabela de precos compilada, por default a tabela padrao
+
+    Returns
+    -------
+    Dicionario com o valor devido por ID de cliente
+    '''
+    units = calculateUnits(starts, ends, models, tariff)
+
+    if numpy is None:
+        groups = {}
+
+        for clientId, start, unit, model, isFamily in zip(clientIds, starts, units, models, families):
+            rates = tariff.weekendRates if tariff.hasWeekendRates and isWeekend(start) else tariff.rates
+
+            counts = groups.setdefault(clientId, {})
+
+            key = (bool(isFamily), rates[model])
+
+            counts[key] = counts.get(key, 0) + unit
+
+        return {clientId: tariff.total(counts) for clientId, counts in groups.items()}
+
+    clientIds = numpy.asarray(clientIds, dtype=numpy.int64)
+    models = numpy.asarray(models, dtype=numpy.intp)
+    families = numpy.asarray(families, dtype=bool)
+
+    if clientIds.size == 0:
+        return {}
+
+    clients, positions = numpy.unique(clientIds, return_inverse=True)
+
+    rates = sorted(set(tariff.rates + tariff.weekendRates))
+
+    ranks = numpy.array([rates.index(rate) for rate in tariff.rates], dtype=numpy.intp)[models]
+
+    if tariff.hasWeekendRates:
+        weekend = isWeekend(numpy.asarray(starts, dtype=numpy.int64))
+
+        ranks = numpy.where(weekend, numpy.array([rates.index(rate) for rate in tariff.weekendRates], dtype=numpy.intp)[models], ranks)
+
+    groups = (positions * 2 + families) * len(rates) + ranks
+
+    counts = numpy.bincount(groups, weights=units, minlength=clients.size * 2 * len(rates)).reshape(clients.size, 2, len(rates))
+
+    regular = numpy.zeros(clients.size)
+    family = numpy.zeros(clients.size)
+
+    for rank, rate in enumerate(rates):
+        regular += counts[:, 0, rank] * rate
+        family += counts[:, 1, rank] * rate
+
+    totals = regular + family * tariff.familyFactor
+
+    return dict(zip(clients.tolist(), totals.tolist()))
+
+def calculateRevenue(starts, ends, models, families, tariff=DEFAULT_TARIFF):
+    '''
+    Funcao que calcula em lote a receita de alugueis encerrados por modelo, com
+    as mesmas regras de history.sumRevenue: o desconto da promocao familia e
+    aplicado a cada aluguel e os valores sao somados na ordem recebida.
+
+    Parameters:
+    ----------
+    starts : sequence
+        Inicios dos alugueis em microssegundos desde 1970
+    ends : sequence
+        Entregas dos alugueis em microssegundos desde 1970
+    models : sequence
+        Codigos dos modelos de aluguel na tabela de precos
+    families : sequence
+        Informa se cada aluguel e da promocao familia
+    tariff : Tariff, optional
+        Tabela de precos compilada, por default a tabela padrao
+
+    Returns
+    -------
+    Dicionario com a receita por codigo de modelo
+    '''
+    units = calculateUnits(starts, ends, models, tariff)
+
+    if numpy is None:
+        totals = {}
+
+        for start, unit, model, isFamily in zip(starts, units, models, families):
+            rates = tariff.weekendRates if tariff.hasWeekendRates and isWeekend(start) else tariff.rates
+
+            value = unit * rates[model]
+
+            if isFamily:
+                value *= tariff.familyFactor
+
+            totals[model] = totals.get(model, 0) + value
+
+        return totals
+
+    models = numpy.asarray(models, dtype=numpy.intp)
+    families = numpy.asarray(families, dtype=bool)
+
+    rates = numpy.array(tariff.rates)[models]
+
+    if tariff.hasWeekendRates:
+        weekend = isWeekend(numpy.asarray(starts, dtype=numpy.int64))
+
+        rates = numpy.where(weekend, numpy.array(tariff.weekendRates)[models], rates)
+
+    values = numpy.where(families, units * rates * tariff.familyFactor, units * rates)
+
+    counts = numpy.bincount(models, minlength=len(tariff.names))
+
+    totals = numpy.bincount(models, weights=values, minlength=len(tariff.names))
+
+    return {code: total for code, (count, total) in enumerate(zip(counts.tolist(), totals.tolist())) if count}
+
+def chargePartition(partition):
+    '''
+    Funcao executada nos processos do pool que calcula os valores de uma particao.
+
+    Parameters:
+    ----------
+    partition : tuple
+        (clientIds, starts, ends, models, families, tariff)
+
+    Returns
+    -------
+    Dicionario com o valor devido por ID de cliente da particao
+    '''
+    return calculateCharges(*partition)
+
+def partitionRentals(clientIds, starts, ends, models, families, parts):
+    '''
+    Funcao que divide os alugueis em particoes compactas por cliente: todos os
+    alugueis de um cliente ficam na particao clientId % parts, na mesma ordem
+    relativa, entao cada soma por cliente e feita exatamente como no calculo serial.
+
+    Parameters:
+    ----------
+    clientIds, starts, ends, models, families : sequence
+        Colunas dos alugueis, como em calculateCharges
+    parts : int
+        Quantidade de particoes
+
+    Returns
+    -------
+    Lista de tuplas (clientIds, starts, ends, models, families), em arrays do NumPy
+    ou, sem NumPy, em array.array
+    '''
+    if numpy is None:
+        partitions = [(array('q'), array('q'), array('q'), array('q'), array('b')) for part in range(parts)]
+
+        for clientId, start, end, model, family in zip(clientIds, starts, ends, models, families):
+            partition = partitions[clientId % parts]
+
+            partition[0].append(clientId)
+            partition[1].append(start)
+            partition[2].append(end)
+            partition[3].append(model)
+            partition[4].append(family)
+
+        return partitions
+
+    columns = (
+        numpy.asarray(clientIds, dtype=numpy.int64),
+        numpy.asarray(starts, dtype=numpy.int64),
+        numpy.asarray(ends, dtype=numpy.int64),
+        numpy.asarray(models, dtype=numpy.int8),
+        numpy.asarray(families, dtype=bool)
+    )
+
+    owners = columns[0] % parts
+
+    return [tuple(column[owners == part] for column in columns) for part in range(parts)]
+
+def calculateChargesParallel(clientIds, starts, ends, models, families, tariff=DEFAULT_TARIFF, processes=None):
+    '''
+    Funcao que calcula em paralelo o valor devido por cliente, dividindo os
+    clientes entre processos. O resultado e identico ao de calculateCharges.
+
+    Parameters:
+    ----------
+    clientIds, starts, ends, models, families : sequence
+        Colunas dos alugueis, como em calculateCharges
+    tariff : Tariff, optional
+        Tabela de precos compilada, por default a tabela padrao
+    processes : int, optional
+        Quantidade de processos, por default a quantidade de CPUs
+
+    Returns
+    -------
+    Dicionario com o valor devido por ID de cliente, ordenado pelo ID
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = processes or os.cpu_count() or 1
+
+    partitions = partitionRentals(clientIds, starts, ends, models, families, processes)
+
+    with ProcessPoolExecutor(processes) as executor:
+        results = list(executor.map(chargePartition, [partition + (tariff,) for partition in partitions]))
+
+    charges = {}
+
+    for result in results:
+        charges.update(result)
+
+    return dict(sorted(charges.items()))
@@ -0,0 +1,203 @@
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+class BookingSchedule(object):
+    def __init__(self):
+        """
+        Constroi a agenda de reservas das bicicletas.
+
+        As reservas de uma bicicleta nunca se sobrepoem, entao ficam em listas
+        ordenadas pelo inicio em que os fins tambem estao em ordem. Saber se uma
+        bicicleta esta livre em [start, end) e uma busca binaria: basta olhar a
+        ultima reserva que comeca antes de end. As bicicletas sem nenhuma reserva
+        ficam a parte, e estao livres em qualquer janela sem precisar de busca.
+
+        Parameters
+        ----------
+            bookings : dict
+                Reservas (Booking) indexadas pelo ID
+            starts : dict
+                Inicios das reservas de cada bicicleta, em ordem
+            ends : dict
+                Fins das reservas de cada bicicleta, na mesma ordem
+            byBike : dict
+                Reservas de cada bicicleta, na mesma ordem
+            unbooked : dict
+                IDs das bicicletas sem reservas, como conjunto ordenado
+        """
+
+        self.bookings = {}
+        self.starts = {}
+        self.ends = {}
+        self.byBike = {}
+        self.unbooked = {}
+
+    def __len__(self):
+        return len(self.bookings)
+
+    def isFree(self, bikeId, start, end):
+        '''
+        Metodo que informa se uma bicicleta nao tem reservas em uma janela.
+
+        Parameters:
+        ----------
+        bikeId : int
+            ID da bicicleta
+        start : datetime
+            Inicio da janela
+        end : datetime
+            Fim da janela (excluso)
+
+        Returns
+        -------
+        True se a bicicleta estiver livre
+        '''
+        starts = self.starts.get(bikeId)
+
+        if not starts:
+            return True
+
+        index = bisect_left(starts, end)
+
+        return index == 0 or self.ends[bikeId][index - 1] <= start
+
+    def addBike(self, bikeId):
+        '''
+        Metodo que passa a considerar uma bicicleta nas buscas de bicicletas livres.
+
+        Parameters:
+        ----------
+        bikeId : int
+            ID da bicicleta
+
+        Returns
+        -------
+        None
+        '''
+        if bikeId not in self.starts:
+            self.unbooked[bikeId] = None
+
+    def findFree(self, quantity, start, end):
+        '''
+        Metodo que busca bicicletas sem reservas em uma janela, parando assim que
+        encontra a quantidade pedida. Primeiro usa as bicicletas que nao tem
+        nenhuma reserva, em O(1) cada; so depois confere, por busca binaria, as
+        que tem reservas. O custo e O(k) enquanto houver k bicicletas sem reservas
+        e, com a frota toda reservada, O(b log r), em que b sao as bicicletas com
+        reservas percorridas ate achar as k livres (no pior caso, toda a frota) e
+        r as reservas de cada uma.
+
+        Parameters:
+        ----------
+        quantity : int
+            Quantidade de bicicletas
+        start : datetime
+            Inicio da janela
+        end : datetime
+            Fim da janela (excluso)
+
+        Returns
+        -------
+        Lista com ate quantity IDs de bicicletas
+        '''
+        free = list(islice(self.unbooked, quantity))
+
+        if len(free) == quantity:
+            return free
+
+        for bikeId in self.starts:
+            if self.isFree(bikeId, start, end):
+                free.append(bikeId)
+
+                if len(free) == quantity:
+                    break
+
+        return free
+
+    def nextBooking(self, bikeId, after):
+        '''
+        Metodo que busca a primeira reserva de uma bicicleta que termina depois de uma data.
+
+        Parameters:
+        ----------
+        bikeId : int
+            ID da bicicleta
+        after : datetime
+            Data de referencia
+
+        Returns
+        -------
+        Reserva (Booking) ou None
+        '''
+        ends = self.ends.get(bikeId)
+
+        if not ends:
+            return None
+
+        index = bisect_right(ends, after)
+
+        if index == len(ends):
+            return None
+
+        return self.byBike[bikeId][index]
+
+    def add(self, booking):
+        '''
+        Metodo que inclui uma reserva na agenda da sua bicicleta.
+
+        Parameters:
+        ----------
+        booking : Booking
+            Reserva a ser incluida
+
+        Returns
+        -------
+        None
+        '''
+        if not self.isFree(booking.bikeId, booking.start, booking.end):
+            raise KeyError('Bicicleta indisponivel.')
+
+        starts = self.starts.setdefault(booking.bikeId, [])
+
+        index = bisect_left(starts, booking.start)
+
+        starts.insert(index, booking.start)
+        self.ends.setdefault(booking.bikeId, []).insert(index, booking.end)
+        self.byBike.setdefault(booking.bikeId, []).insert(index, booking)
+
+        self.unbooked.pop(booking.bikeId, None)
+
+        self.bookings[booking.id] = booking
+
+    def remove(self, id):
+        '''
+        Metodo que retira uma reserva da agenda.
+
+        Parameters:
+        ----------
+        id : int
+            ID da reserva
+
+        Returns
+        -------
+        Reserva (Booking) retirada
+        '''
+        booking = self.bookings.pop(id, None)
+
+        if booking is None:
+            raise KeyError('Reserva nao cadastrada.')
+
+        index = bisect_left(self.starts[booking.bikeId], booking.start)
+
+        del self.starts[booking.bikeId][index]
+        del self.ends[booking.bikeId][index]
+        del self.byBike[booking.bikeId][index]
+
+        if not self.starts[booking.bikeId]:
+            del self.starts[booking.bikeId]
+            del self.ends[booking.bikeId]
+            del self.byBike[booking.bikeId]
+
+            self.unbooked[booking.bikeId] = None
+
+        return booking
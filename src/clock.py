@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+class SystemClock(object):
+    def now(self):
+        '''
+        Metodo que informa a data e hora atuais do sistema.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        datetime
+        '''
+        return datetime.today()
+
+class ManualClock(object):
+    def __init__(self, start=None):
+        """
+        Constroi um relogio que so anda quando mandado, para testes e simulacoes.
+
+        Parameters
+        ----------
+            start : datetime, optional
+                Data inicial, por default a data atual do sistema
+            current : datetime
+                Data informada por now
+        """
+
+        self.current = start if start is not None else datetime.today()
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds=0, **delta):
+        '''
+        Metodo que adianta o relogio.
+
+        Parameters:
+        ----------
+        seconds : float, optional
+            Segundos a adiantar
+        delta : dict
+            Outros argumentos de timedelta (minutes, hours, days...)
+
+        Returns
+        -------
+        datetime: Nova data do relogio
+        '''
+        self.set(self.current + timedelta(seconds=seconds, **delta))
+
+        return self.current
+
+    def set(self, date):
+        '''
+        Metodo que leva o relogio para uma data, que nao pode ser anterior a atual.
+
+        Parameters:
+        ----------
+        date : datetime
+            Nova data
+
+        Returns
+        -------
+        None
+        '''
+        if date < self.current:
+            raise ValueError('O relogio nao pode voltar no tempo.')
+
+        self.current = date
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,247 @@
+from models import Store
+from contextlib import ExitStack
+import threading
+
+class LockedBackend(object):
+    def __init__(self, backend):
+        """
+        Constroi um involucro que serializa as chamadas a um backend (ou a outro
+        objeto, como o Ledger) que nao e seguro para uso por varias threads.
+
+        Parameters
+        ----------
+            backend : MemoryBackend
+                Backend protegido
+        """
+
+        self.backend = backend
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        if not callable(method):
+            return method
+
+        def locked(*args, **kwargs):
+            with self.lock:
+                return method(*args, **kwargs)
+
+        return locked
+
+class ConcurrentStore(Store):
+    def __init__(self, name, address, backend=None, tariff=None, clock=None):
+        """
+        Constroi uma loja que pode ser usada por varias threads ao mesmo tempo.
+
+        A reserva de bicicletas e atomica sob poolLock, e cada cliente tem o seu
+        proprio lock, de forma que alugueis e devolucoes de clientes diferentes
+        nao esperam uns pelos outros alem das secoes criticas curtas do conjunto
+        de bicicletas e da geracao de IDs. Cadastros de clientes usam registryLock.
+        A ordem de aquisicao e sempre registryLock, lock do cliente, poolLock.
+
+        Parameters
+        ----------
+            name : str
+                Nome da loja
+            address : str
+                Endereco da loja
+            backend : MemoryBackend, optional
+                Armazenamento persistente da loja
+            tariff : Tariff, optional
+                Tabela de precos compilada, por default a tabela padrao
+            clock : SystemClock, optional
+                Relogio da loja, por default o relogio do sistema
+        """
+
+        self.poolLock = threading.RLock()
+        self.idLock = threading.Lock()
+        self.rentalsLock = threading.Lock()
+        self.registryLock = threading.RLock()
+        self.clientLocksLock = threading.Lock()
+        self.clientLocks = {}
+
+        super().__init__(name, address, backend, tariff, clock=clock)
+
+        self.backend = LockedBackend(self.backend)
+        self.ledger = LockedBackend(self.ledger)
+
+    def clientLock(self, id):
+        '''
+        Metodo que busca o lock de um cliente, criando-o na primeira vez.
+
+        Parameters:
+        ----------
+        id : int
+            ID do cliente
+
+        Returns
+        -------
+        Lock do cliente
+        '''
+        with self.clientLocksLock:
+            lock = self.clientLocks.get(id)
+
+            if lock is None:
+                lock = self.clientLocks[id] = threading.Lock()
+
+            return lock
+
+    def addBike(self, cor):
+        with self.poolLock:
+            super().addBike(cor)
+
+    def addBikes(self, colors):
+        colors = list(colors)
+
+        with self.poolLock:
+            super().addBikes(colors)
+
+    def addClient(self, name, email, cpf):
+        with self.registryLock:
+            super().addClient(name, email, cpf)
+
+    def addClients(self, rows):
+        with self.registryLock:
+            return super().addClients(rows)
+
+    def updateClient(self, email, name=None, newEmail=None, cpf=None):
+        with self.registryLock:
+            super().updateClient(email, name, newEmail, cpf)
+
+    def removeClient(self, email):
+        with self.registryLock:
+            client = self.findClientByEmail(email)
+
+            if not client:
+                raise KeyError('Cliente nao cadastrado.')
+
+            with self.clientLock(client.id):
+                super().removeClient(email)
+
+    def addRental(self, model, email, quantity, family=False):
+        client = self.findClientByEmail(email)
+
+        if not client:
+            return super().addRental(model, email, quantity, family)
+
+        with self.clientLock(client.id):
+            super().addRental(model, email, quantity, family)
+
+    def calculateRental(self, email):
+        client = self.findClientByEmail(email)
+
+        if not client:
+            return super().calculateRental(email)
+
+        with self.clientLock(client.id):
+            return super().calculateRental(email)
+
+    def quote(self, email):
+        client = self.findClientByEmail(email)
+
+        if not client:
+            return super().quote(email)
+
+        with self.clientLock(client.id):
+            return super().quote(email)
+
+    def returnBikes(self, email, bikeIds):
+        client = self.findClientByEmail(email)
+
+        if not client:
+            return super().returnBikes(email, bikeIds)
+
+        with self.clientLock(client.id):
+            return super().returnBikes(email, bikeIds)
+
+    def returnRental(self, rentalId):
+        rent = self.findRentalById(rentalId)
+
+        if rent is None:
+            return super().returnRental(rentalId)
+
+        with self.clientLock(rent.clientId):
+            return super().returnRental(rentalId)
+
+    def settleAll(self, processes=None):
+        '''
+        Metodo que fecha todos os alugueis em aberto com a loja parada: segura
+        registryLock, os locks de todos os clientes (em ordem de ID) e poolLock,
+        na ordem documentada, para que nenhum aluguel seja aberto ou fechado
+        enquanto openRentals e lido e esvaziado.
+
+        Parameters:
+        ----------
+        processes : int, optional
+            Quantidade de processos do calculo, como em Store.settleAll
+        
+        Returns
+        -------
+        Dicionario com o valor devido por ID de cliente
+        '''
+        with self.registryLock, ExitStack() as stack:
+            for id in sorted(self.clientIndex.byId):
+                stack.enter_context(self.clientLock(id))
+
+            with self.poolLock:
+                return super().settleAll(processes)
+
+    def bookBikes(self, model, email, quantity, start, end, family=False):
+        with self.poolLock:
+            return super().bookBikes(model, email, quantity, start, end, family)
+
+    def cancelBooking(self, id):
+        with self.poolLock:
+            super().cancelBooking(id)
+
+    def pickUpBooking(self, id):
+        booking = self.schedule.bookings.get(id)
+
+        if booking is None:
+            return super().pickUpBooking(id)
+
+        with self.clientLock(booking.clientId), self.poolLock:
+            return super().pickUpBooking(id)
+
+    def getAvailableBikes(self, quantity, until=None):
+        with self.poolLock:
+            return super().getAvailableBikes(quantity, until)
+
+    def reserveBikes(self, quantity, until=None):
+        with self.poolLock:
+            return super().reserveBikes(quantity, until)
+
+    def iterBikes(self, available=None, color=None):
+        with self.poolLock:
+            bikes = list(super().iterBikes(available, color))
+
+        return iter(bikes)
+
+    def listBikes(self, page=1, pageSize=20, available=None, color=None):
+        with self.poolLock:
+            return super().listBikes(page, pageSize, available, color)
+
+    def countBikes(self, available=None, color=None):
+        with self.poolLock:
+            return super().countBikes(available, color)
+
+    def stats(self):
+        with self.poolLock:
+            return super().stats()
+
+    def markBikeAvailable(self, bike):
+        with self.poolLock:
+            super().markBikeAvailable(bike)
+
+    def recordRental(self, rent):
+        with self.rentalsLock:
+            super().recordRental(rent)
+
+    def archive(self, before=None):
+        with self.rentalsLock:
+            return super().archive(before)
+
+    def newRentalId(self):
+        with self.idLock:
+            return super().newRentalId()
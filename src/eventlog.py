@@ -0,0 +1,336 @@
+from persistence import MemoryBackend
+from datetime import datetime
+import json
+import os
+
+class EventLogBackend(MemoryBackend):
+    def __init__(self, directory, syncEvery=100, snapshotEvery=None):
+        """
+        Constroi um backend que grava as alteracoes da loja em um log de eventos
+        append-only, com snapshots periodicos para acelerar a reinicializacao.
+
+        Parameters
+        ----------
+            directory : str
+                Diretorio onde ficam os segmentos do log e o snapshot
+            syncEvery : int
+                Quantidade de eventos acumulados antes de um fsync
+            snapshotEvery : int
+                Quantidade de eventos entre snapshots automaticos, por default so
+                sao gerados snapshots quando snapshot() e chamado
+            segment : int
+                Numero do segmento do log que recebe os eventos
+            pending : int
+                Eventos escritos desde o ultimo fsync
+            sinceSnapshot : int
+                Eventos escritos desde o ultimo snapshot
+        """
+
+        if not isinstance(syncEvery, int) or syncEvery < 1:
+            raise ValueError('O intervalo de sincronizacao deve ser um inteiro positivo.')
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.syncEvery = syncEvery
+        self.snapshotEvery = snapshotEvery
+        self.store = None
+        self.file = None
+        self.segment = 1
+        self.pending = 0
+        self.sinceSnapshot = 0
+
+    def segmentPath(self, segment):
+        return os.path.join(self.directory, f'events-{segment:08d}.log')
+
+    def snapshotPath(self):
+        return os.path.join(self.directory, 'snapshot.json')
+
+    def segments(self):
+        '''
+        Metodo que lista os segmentos do log existentes no diretorio.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        Lista ordenada com os numeros dos segmentos
+        '''
+        return sorted(
+            int(name[7:15]) for name in os.listdir(self.directory)
+            if name.startswith('events-') and name.endswith('.log')
+        )
+
+    def load(self, store):
+        '''
+        Metodo que restaura a loja a partir do ultimo snapshot e dos eventos
+        gravados depois dele.
+
+        Parameters:
+        ----------
+        store : Store
+            Loja vazia que recebe os dados
+
+        Returns
+        -------
+        None
+        '''
+        bikes = {}
+
+        clients = {}
+
+        rentals = {}
+
+        bookings = {}
+
+        nextBookingId = 1
+
+        if os.path.exists(self.snapshotPath()):
+            with open(self.snapshotPath(), encoding='utf-8') as file:
+                snapshot = json.load(file)
+
+            self.segment = snapshot['segment']
+
+            for id, color, available in snapshot['bikes']:
+                bikes[id] = [id, color, available]
+
+            for id, name, email, cpf in snapshot['clients']:
+                clients[id] = [id, name, email, cpf]
+
+            for id, model, family, start, end, bikeId, clientId in snapshot['rentals']:
+                rentals[id] = [id, model, family, start, end, bikeId, clientId]
+
+            for id, model, family, start, end, bikeId, clientId in snapshot.get('bookings', []):
+                bookings[id] = [id, model, family, start, end, bikeId, clientId]
+
+            nextBookingId = snapshot.get('nextBookingId', 1)
+
+        for segment in self.segments():
+            if segment >= self.segment:
+                nextBookingId = max(nextBookingId, self.replay(segment, bikes, clients, rentals, bookings))
+
+                self.segment = segment
+
+        store.restore(
+            [tuple(bike) for _, bike in sorted(bikes.items())],
+            [tuple(client) for _, client in sorted(clients.items())],
+            [
+                (id, model, family, datetime.fromisoformat(start), end and datetime.fromisoformat(end), bikeId, clientId)
+                for _, (id, model, family, start, end, bikeId, clientId) in sorted(rentals.items())
+            ],
+            [
+                (id, model, family, datetime.fromisoformat(start), datetime.fromisoformat(end), bikeId, clientId)
+                for _, (id, model, family, start, end, bikeId, clientId) in sorted(bookings.items())
+            ],
+            nextBookingId
+        )
+
+        self.store = store
+
+        self.file = open(self.segmentPath(self.segment), 'a', encoding='utf-8')
+
+    def replay(self, segment, bikes, clients, rentals, bookings):
+        '''
+        Metodo que aplica os eventos de um segmento aos dados carregados. Uma linha
+        final incompleta, deixada por uma queda no meio da escrita, e descartada.
+
+        Parameters:
+        ----------
+        segment : int
+            Numero do segmento
+        bikes : dict
+            Bicicletas indexadas pelo ID
+        clients : dict
+            Clientes indexados pelo ID
+        rentals : dict
+            Alugueis indexados pelo ID
+        bookings : dict
+            Reservas ativas indexadas pelo ID
+
+        Returns
+        -------
+        value (int): ID seguinte ao da ultima reserva criada no segmento, ou 1
+        '''
+        path = self.segmentPath(segment)
+
+        valid = 0
+
+        nextBookingId = 1
+
+        with open(path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+
+                event = json.loads(line)
+
+                kind = event[0]
+
+                if kind == 'bikeAdded':
+                    bikes[event[1]] = [event[1], event[2], True]
+                elif kind == 'clientAdded' or kind == 'clientUpdated':
+                    clients[event[1]] = event[1:]
+                elif kind == 'clientRemoved':
+                    del clients[event[1]]
+                elif kind == 'rentalOpened':
+                    rentals[event[1]] = event[1:5] + [None] + event[5:]
+
+                    bikes[event[5]][2] = False
+                elif kind == 'rentalClosed':
+                    rent = rentals[event[1]]
+
+                    rent[4] = event[2]
+
+                    bikes[rent[5]][2] = True
+                elif kind == 'bookingAdded':
+                    bookings[event[1]] = event[1:]
+
+                    nextBookingId = max(nextBookingId, event[1] + 1)
+                elif kind == 'bookingRemoved':
+                    del bookings[event[1]]
+
+                valid += len(line)
+
+        if valid != os.path.getsize(path):
+            with open(path, 'r+b') as file:
+                file.truncate(valid)
+
+        return nextBookingId
+
+    def append(self, event):
+        '''
+        Metodo que escreve um evento no log, sincronizando o arquivo a cada lote
+        e gerando um snapshot quando o intervalo configurado e atingido.
+
+        Parameters:
+        ----------
+        event : list
+            Tipo do evento seguido dos seus dados
+
+        Returns
+        -------
+        None
+        '''
+        self.file.write(json.dumps(event, separators=(',', ':')) + '\n')
+
+        self.pending += 1
+
+        self.sinceSnapshot += 1
+
+        if self.pending >= self.syncEvery:
+            self.flush()
+
+        if self.snapshotEvery is not None and self.sinceSnapshot >= self.snapshotEvery:
+            self.snapshot()
+
+    def flush(self):
+        '''
+        Metodo que grava em disco os eventos pendentes.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        if self.file is None:
+            return
+
+        self.file.flush()
+
+        os.fsync(self.file.fileno())
+
+        self.pending = 0
+
+    def snapshot(self):
+        '''
+        Metodo que grava o estado atual da loja e inicia um novo segmento do log.
+        Os segmentos cobertos pelo snapshot sao apagados.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        self.flush()
+
+        self.file.close()
+
+        self.segment += 1
+
+        self.file = open(self.segmentPath(self.segment), 'a', encoding='utf-8')
+
+        store = self.store
+
+        snapshot = {
+            'segment': self.segment,
+            'bikes': [(bike.id, bike.color, bike.available) for bike in store.bikes],
+            'clients': [(client.id, client.name, client.email, client.cpf) for client in store.clients],
+            'rentals': [
+                (rent.id, rent.model, rent.family, rent.start.isoformat(), rent.end and rent.end.isoformat(), rent.bikeId, rent.clientId)
+                for rent in store.history
+            ],
+            'bookings': [
+                (booking.id, booking.model, booking.family, booking.start.isoformat(), booking.end.isoformat(), booking.bikeId, booking.clientId)
+                for booking in store.schedule.bookings.values()
+            ],
+            'nextBookingId': store.nextBookingId
+        }
+
+        temporary = self.snapshotPath() + '.tmp'
+
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(snapshot, file, separators=(',', ':'))
+
+            file.flush()
+
+            os.fsync(file.fileno())
+
+        os.replace(temporary, self.snapshotPath())
+
+        for segment in self.segments():
+            if segment < self.segment:
+                os.remove(self.segmentPath(segment))
+
+        self.sinceSnapshot = 0
+
+    def close(self):
+        if self.file is None:
+            return
+
+        self.flush()
+
+        self.file.close()
+
+        self.file = None
+
+    def bikeAdded(self, bike):
+        self.append(['bikeAdded', bike.id, bike.color])
+
+    def clientAdded(self, client):
+        self.append(['clientAdded', client.id, client.name, client.email, client.cpf])
+
+    def clientUpdated(self, client):
+        self.append(['clientUpdated', client.id, client.name, client.email, client.cpf])
+
+    def clientRemoved(self, client):
+        self.append(['clientRemoved', client.id])
+
+    def rentalOpened(self, rent):
+        self.append(['rentalOpened', rent.id, rent.model, rent.family, rent.start.isoformat(), rent.bikeId, rent.clientId])
+
+    def rentalClosed(self, rent):
+        self.append(['rentalClosed', rent.id, rent.end.isoformat()])
+
+    def bookingAdded(self, booking):
+        self.append(['bookingAdded', booking.id, booking.model, booking.family, booking.start.isoformat(), booking.end.isoformat(), booking.bikeId, booking.clientId])
+
+    def bookingRemoved(self, booking):
+        self.append(['bookingRemoved', booking.id])
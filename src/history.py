@@ -0,0 +1,190 @@
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+startOf = attrgetter('start')
+
+def sumRevenue(rentals, tariff, group):
+    '''
+    Funcao que soma a receita dos alugueis encerrados de uma sequencia, agrupada
+    por uma chave, sem montar listas. O desconto da promocao familia e aplicado
+    a cada aluguel.
+
+    Parameters:
+    ----------
+    rentals : iterable
+        Alugueis (Rental); os que estao em aberto sao ignorados
+    tariff : Tariff
+        Tabela de precos compilada
+    group : function
+        Funcao que recebe um aluguel e devolve a chave do grupo
+
+    Returns
+    -------
+    Dicionario com a receita por chave
+    '''
+    codes = tariff.codes
+
+    totals = {}
+
+    for rent in rentals:
+        if rent.end is None:
+            continue
+
+        code = codes[rent.model]
+
+        value = tariff.units(code, rent.start, rent.end) * tariff.rate(code, rent.start)
+
+        if rent.family:
+            value *= tariff.familyFactor
+
+        key = group(rent)
+
+        totals[key] = totals.get(key, 0) + value
+
+    return totals
+
+class RentalHistory(object):
+    def __init__(self):
+        """
+        Constroi o historico de alugueis ordenado pela data de inicio.
+
+        Os alugueis chegam quase sempre em ordem de inicio, entao incluir um
+        aluguel e normalmente so um append; um aluguel fora de ordem e inserido
+        na posicao certa com bisect. Consultas por periodo fazem duas buscas
+        binarias e percorrem apenas o trecho pedido.
+
+        Parameters
+        ----------
+            rentals : list
+                Alugueis (Rental) ordenados pelo inicio
+            byBike : dict
+                Alugueis de cada bicicleta, ordenados pelo inicio
+            byClient : dict
+                Alugueis de cada cliente, ordenados pelo inicio
+        """
+
+        self.rentals = []
+        self.byBike = {}
+        self.byClient = {}
+
+    def __len__(self):
+        return len(self.rentals)
+
+    def __iter__(self):
+        return iter(self.rentals)
+
+    def insert(self, rentals, rent):
+        if not rentals or rentals[-1].start <= rent.start:
+            rentals.append(rent)
+        else:
+            rentals.insert(bisect_right(rentals, rent.start, key=startOf), rent)
+
+    def add(self, rent):
+        '''
+        Metodo que inclui um aluguel no historico.
+
+        Parameters:
+        ----------
+        rent : Rental
+            Aluguel a ser incluido
+
+        Returns
+        -------
+        None
+        '''
+        self.insert(self.rentals, rent)
+        self.insert(self.byBike.setdefault(rent.bikeId, []), rent)
+        self.insert(self.byClient.setdefault(rent.clientId, []), rent)
+
+    def slice(self, rentals, start, end):
+        low = 0 if start is None else bisect_left(rentals, start, key=startOf)
+        high = len(rentals) if end is None else bisect_left(rentals, end, key=startOf)
+
+        for index in range(low, high):
+            yield rentals[index]
+
+    def between(self, start=None, end=None):
+        '''
+        Metodo que percorre os alugueis iniciados em um periodo, na ordem do inicio.
+
+        Parameters:
+        ----------
+        start : datetime, optional
+            Inicio do periodo (incluso), por default desde o primeiro aluguel
+        end : datetime, optional
+            Fim do periodo (excluso), por default ate o ultimo aluguel
+
+        Returns
+        -------
+        Gerador de alugueis (Rental)
+        '''
+        return self.slice(self.rentals, start, end)
+
+    def forBike(self, bikeId, start=None, end=None):
+        '''
+        Metodo que percorre os alugueis de uma bicicleta, na ordem do inicio.
+
+        Parameters:
+        ----------
+        bikeId : int
+            ID da bicicleta
+        start : datetime, optional
+            Inicio do periodo (incluso)
+        end : datetime, optional
+            Fim do periodo (excluso)
+
+        Returns
+        -------
+        Gerador de alugueis (Rental)
+        '''
+        return self.slice(self.byBike.get(bikeId, []), start, end)
+
+    def forClient(self, clientId, start=None, end=None):
+        '''
+        Metodo que percorre os alugueis de um cliente, na ordem do inicio.
+
+        Parameters:
+        ----------
+        clientId : int
+            ID do cliente
+        start : datetime, optional
+            Inicio do periodo (incluso)
+        end : datetime, optional
+            Fim do periodo (excluso)
+
+        Returns
+        -------
+        Gerador de alugueis (Rental)
+        '''
+        return self.slice(self.byClient.get(clientId, []), start, end)
+
+    def revenue(self, tariff, group, start=None, end=None):
+        '''
+        Metodo que soma a receita dos alugueis encerrados iniciados em um periodo,
+        agrupada por uma chave, percorrendo apenas o trecho do historico.
+
+        Parameters:
+        ----------
+        tariff : Tariff
+            Tabela de precos compilada
+        group : function
+            Funcao que recebe um aluguel e devolve a chave do grupo
+        start : datetime, optional
+            Inicio do periodo (incluso)
+        end : datetime, optional
+            Fim do periodo (excluso)
+
+        Returns
+        -------
+        Dicionario com a receita por chave
+        '''
+        return sumRevenue(self.between(start, end), tariff, group)
+
+    def revenueByDay(self, tariff, start=None, end=None):
+        return self.revenue(tariff, lambda rent: rent.start.date(), start, end)
+
+    def revenueByModel(self, tariff, start=None, end=None):
+        return self.revenue(tariff, attrgetter('model'), start, end)
+
+    def revenueByFamily(self, tariff, start=None, end=None):
+        return self.revenue(tariff, lambda rent: 'family' if rent.family else 'regular', start, end)
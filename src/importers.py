@@ -0,0 +1,114 @@
+import json
+import csv
+
+def readRows(path):
+    '''
+    Funcao que le um arquivo CSV (com cabecalho) ou JSONL linha a linha.
+
+    Parameters:
+    ----------
+    path : str
+        Caminho do arquivo, o formato e definido pela extensao (.csv ou .jsonl)
+
+    Returns
+    -------
+    Gerador de dicionarios, um por linha de dados, ou None para linhas ilegiveis
+    '''
+    with open(path, newline='', encoding='utf-8') as file:
+        if path.endswith('.jsonl'):
+            for line in file:
+                if not line.strip():
+                    continue
+
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+
+                yield row if isinstance(row, dict) else None
+        else:
+            yield from csv.DictReader(file)
+
+def readClients(path):
+    '''
+    Funcao que le clientes de um arquivo com as colunas name, email e cpf.
+
+    Parameters:
+    ----------
+    path : str
+        Caminho do arquivo CSV ou JSONL
+
+    Returns
+    -------
+    Gerador de tuplas (name, email, cpf), ou None para linhas incompletas
+    '''
+    for row in readRows(path):
+        try:
+            yield (row['name'], row['email'], row['cpf'])
+        except (TypeError, KeyError):
+            yield None
+
+def readBikes(path):
+    '''
+    Funcao que le bicicletas de um arquivo com a coluna color.
+
+    Parameters:
+    ----------
+    path : str
+        Caminho do arquivo CSV ou JSONL
+
+    Returns
+    -------
+    Gerador com a cor de cada bicicleta, ou None para linhas ilegiveis ou sem cor
+    '''
+    for row in readRows(path):
+        if row is not None and isinstance(row.get('color'), str):
+            yield row['color']
+        else:
+            yield None
+
+def importClients(store, path):
+    '''
+    Funcao que carrega os clientes de um arquivo em uma loja.
+
+    Parameters:
+    ----------
+    store : Store
+        Loja que recebe os clientes
+    path : str
+        Caminho do arquivo CSV ou JSONL
+
+    Returns
+    -------
+    Lista de tuplas (indice, mensagem) com as linhas de dados rejeitadas
+    '''
+    return store.addClients(readClients(path))
+
+def importBikes(store, path):
+    '''
+    Funcao que carrega as bicicletas de um arquivo em uma loja.
+
+    Parameters:
+    ----------
+    store : Store
+        Loja que recebe as bicicletas
+    path : str
+        Caminho do arquivo CSV ou JSONL
+
+    Returns
+    -------
+    Lista de tuplas (indice, mensagem) com as linhas de dados rejeitadas
+    '''
+    rejected = []
+
+    colors = []
+
+    for index, color in enumerate(readBikes(path)):
+        if color is None:
+            rejected.append((index, 'Linha invalida.'))
+        else:
+            colors.append(color)
+
+    store.addBikes(colors)
+
+    return rejected
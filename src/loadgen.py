@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import json
+import time
+
+async def request(reader, writer, op, **args):
+    '''
+    Funcao que envia uma requisicao ao servidor e espera a resposta.
+
+    Parameters:
+    ----------
+    reader : asyncio.StreamReader
+        Leitura da conexao
+    writer : asyncio.StreamWriter
+        Escrita da conexao
+    op : str
+        Nome da operacao
+    args : dict
+        Argumentos da operacao
+
+    Returns
+    -------
+    Dicionario com a resposta
+    '''
+    writer.write(json.dumps({'op': op, 'args': args}).encode() + b'\n')
+
+    await writer.drain()
+
+    return json.loads(await reader.readline())
+
+async def session(host, port, index, operations, latencies, errors):
+    '''
+    Funcao que simula um terminal: cadastra um cliente e alterna alugueis e devolucoes.
+
+    Parameters:
+    ----------
+    host : str
+        Endereco do servidor
+    port : int
+        Porta do servidor
+    index : int
+        Numero do terminal, usado para gerar o cliente
+    operations : int
+        Quantidade de pares aluguel/devolucao
+    latencies : list
+        Lista que recebe a latencia de cada requisicao, em segundos
+    errors : list
+        Lista que recebe as mensagens das requisicoes que falharam
+
+    Returns
+    -------
+    None
+    '''
+    reader, writer = await asyncio.open_connection(host, port)
+
+    email = f'carga{index}@mail.com'
+
+    await request(reader, writer, 'addClient', name=f'Carga{index}', email=email, cpf=f'{index:011d}')
+
+    await request(reader, writer, 'addBike', color='Branco')
+
+    for i in range(operations):
+        for op, args in (('addRental', {'model': 'hourly', 'email': email, 'quantity': 1}), ('calculateRental', {'email': email})):
+            start = time.perf_counter()
+
+            response = await request(reader, writer, op, **args)
+
+            latencies.append(time.perf_counter() - start)
+
+            if not response['ok']:
+                errors.append(response['error'])
+
+    writer.close()
+
+    await writer.wait_closed()
+
+def percentile(values, fraction):
+    '''
+    Funcao que calcula um percentil de uma lista ordenada.
+
+    Parameters:
+    ----------
+    values : list
+        Valores ordenados
+    fraction : float
+        Percentil entre 0 e 1
+
+    Returns
+    -------
+    Valor do percentil
+    '''
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def main(arguments):
+    latencies = []
+
+    errors = []
+
+    start = time.perf_counter()
+
+    await asyncio.gather(*(
+        session(arguments.host, arguments.port, index, arguments.operations, latencies, errors)
+        for index in range(arguments.offset, arguments.offset + arguments.connections)
+    ))
+
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    print(f'requisicoes: {len(latencies)}')
+    print(f'erros: {len(errors)}')
+    print(f'req/s: {len(latencies) / elapsed:.0f}')
+    print(f'p50: {percentile(latencies, 0.50) * 1000:.3f} ms')
+    print(f'p99: {percentile(latencies, 0.99) * 1000:.3f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gerador de carga para o servidor da loja')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--operations', type=int, default=200, help='pares aluguel/devolucao por conexao')
+    parser.add_argument('--offset', type=int, default=0, help='primeiro numero de cliente, para rodar contra o mesmo servidor mais de uma vez')
+
+    asyncio.run(main(parser.parse_args()))
@@ -1,4 +1,6 @@
 from models import Store
+from persistence import SQLiteBackend
+from itertools import islice
 
 def operationsMenu():
     print(f'========== Menu ==========')
@@ -7,6 +9,7 @@ def operationsMenu():
     print(f'[3] Exibir biciletas')
     print(f'[4] Adicionar aluguel')
     print(f'[5] Calcular aluguel')
+    print(f'[6] Exibir metricas')
     print(f'[0] Sair')
     print(f'==========================')
 
@@ -18,7 +21,14 @@ def main():
 
         store_address = input('Qual o endereco da loja? ')
 
-        store = Store(store_name, store_address)
+        database = input('Qual o arquivo do banco de dados? [vazio para manter em memoria] ')
+
+        backend = SQLiteBackend(database, wal=True) if database else None
+
+        store = Store(store_name, store_address, backend)
+
+        if input('Deseja medir as operacoes da loja? [s/n] ') == 's':
+            store.enableMetrics()
 
     while option == 's':
         operationsMenu()
@@ -28,7 +38,7 @@ def main():
         try:
             option = int(option_as_string)
         except:
-            print('A entrada deve ser um inteiro entre 0 e 5')
+            print('A entrada deve ser um inteiro entre 0 e 6')
 
         if option == 1:
             color = input('Qual a cor? ')
@@ -49,9 +59,27 @@ def main():
             except Exception as error:
                 print(str(error))
         elif option == 3:
+            color = input('Filtrar por cor? [vazio para todas] ') or None
+
+            availability = input('Filtrar por disponibilidade? [s/n/vazio para todas] ')
+
+            available = {'s': True, 'n': False}.get(availability)
+
             print(f'=== Estoque de bicicletas ===')
-            
-            store.showBikes()
+
+            rows = store.iterBikes(available, color)
+
+            while True:
+                bikes = list(islice(rows, 20))
+
+                if not bikes:
+                    print('Nenhuma bicicleta encontrada.')
+                    break
+
+                store.showBikes(bikes=bikes)
+
+                if len(bikes) < 20 or input('Proxima pagina? [s/n] ') != 's':
+                    break
         elif option == 4:
             model = input('Qual modelo do aluguel? ')
 
@@ -75,14 +103,24 @@ def main():
                 value = store.calculateRental(email)
             except Exception as error:
                 print(str(error))
-
-            print(f'O valor do aluguel e R$ {value}')
+            else:
+                print(f'O valor do aluguel e R$ {value}')
+        elif option == 6:
+            if store.metrics is None:
+                print('A medicao das operacoes esta desligada.')
+            elif input('Qual o formato? [prometheus/json] ') == 'json':
+                print(store.metrics.json())
+            else:
+                print(store.metrics.prometheus())
         elif option != 0:
             print('Opcao nao cadastrada. Tente novamente.')
 
         if option == 0:
             option = 'n'
+
+            store.close()
         else:
             option = 's'
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+from bisect import bisect_left
+from functools import wraps
+import json
+import threading
+import time
+
+INSTRUMENTED_OPERATIONS = (
+    'addBike',
+    'addClient',
+    'addRental',
+    'calculateRental',
+    'returnBikes',
+    'returnRental',
+    'quote',
+    'settleAll',
+    'findClientByEmail',
+    'getAvailableBikes'
+)
+
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+class Metrics(object):
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Constroi os contadores de instrumentacao das operacoes de uma loja.
+
+        Cada operacao tem um histograma de latencia com limites fixos, a
+        quantidade de chamadas, o tempo total e a quantidade de linhas
+        percorridas (por exemplo, quantas bicicletas getAvailableBikes olhou).
+
+        Parameters
+        ----------
+            buckets : tuple, optional
+                Limites superiores dos intervalos do histograma, em segundos
+            operations : dict
+                Por operacao, [contagens por intervalo, chamadas, tempo total, linhas percorridas]
+        """
+
+        self.buckets = tuple(buckets)
+        self.operations = {}
+        self.lock = threading.Lock()
+
+    def counters(self, operation):
+        counters = self.operations.get(operation)
+
+        if counters is None:
+            counters = self.operations[operation] = [[0] * (len(self.buckets) + 1), 0, 0.0, 0]
+
+        return counters
+
+    def observe(self, operation, seconds):
+        '''
+        Metodo que registra a duracao de uma chamada.
+
+        Parameters:
+        ----------
+        operation : str
+            Nome da operacao
+        seconds : float
+            Duracao da chamada
+
+        Returns
+        -------
+        None
+        '''
+        with self.lock:
+            counters = self.counters(operation)
+
+            counters[0][bisect_left(self.buckets, seconds)] += 1
+            counters[1] += 1
+            counters[2] += seconds
+
+    def scanned(self, operation, rows):
+        '''
+        Metodo que registra quantas linhas uma chamada percorreu.
+
+        Parameters:
+        ----------
+        operation : str
+            Nome da operacao
+        rows : int
+            Quantidade de linhas percorridas
+
+        Returns
+        -------
+        None
+        '''
+        with self.lock:
+            self.counters(operation)[3] += rows
+
+    def timed(self, operation, method):
+        '''
+        Metodo que envolve um metodo para registrar a duracao de cada chamada.
+
+        Parameters:
+        ----------
+        operation : str
+            Nome da operacao
+        method : function
+            Metodo ja ligado a loja
+
+        Returns
+        -------
+        Funcao com a mesma assinatura do metodo
+        '''
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.observe(operation, time.perf_counter() - start)
+
+        return timed
+
+    def snapshot(self):
+        '''
+        Metodo que copia os contadores em um dicionario serializavel, com os
+        intervalos do histograma acumulados como no Prometheus.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        Dicionario com os contadores de cada operacao
+        '''
+        with self.lock:
+            operations = {operation: (list(counts), calls, total, rows) for operation, (counts, calls, total, rows) in self.operations.items()}
+
+        snapshot = {}
+
+        for operation, (counts, calls, total, rows) in sorted(operations.items()):
+            cumulative = 0
+
+            buckets = {}
+
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+
+                buckets[str(bound)] = cumulative
+
+            snapshot[operation] = {'count': calls, 'sum': total, 'buckets': buckets, 'scannedRows': rows}
+
+        return snapshot
+
+    def json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def prometheus(self):
+        '''
+        Metodo que exporta os contadores no formato texto do Prometheus.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        Texto com as metricas
+        '''
+        snapshot = self.snapshot()
+
+        lines = [
+            '# HELP bikestore_operation_seconds Duracao das operacoes da loja.',
+            '# TYPE bikestore_operation_seconds histogram'
+        ]
+
+        for operation, values in snapshot.items():
+            for bound, count in values['buckets'].items():
+                lines.append(f'bikestore_operation_seconds_bucket{{operation="{operation}",le="{bound}"}} {count}')
+
+            lines.append(f'bikestore_operation_seconds_sum{{operation="{operation}"}} {values["sum"]}')
+            lines.append(f'bikestore_operation_seconds_count{{operation="{operation}"}} {values["count"]}')
+
+        lines.append('# HELP bikestore_scanned_rows_total Linhas percorridas pelas operacoes da loja.')
+        lines.append('# TYPE bikestore_scanned_rows_total counter')
+
+        for operation, values in snapshot.items():
+            lines.append(f'bikestore_scanned_rows_total{{operation="{operation}"}} {values["scannedRows"]}')
+
+        return '\n'.join(lines) + '\n'
@@ -1,9 +1,177 @@
-from tabulate import tabulate
-from datetime import datetime
-import re
-import math
+from datetime import timedelta
+from collections import OrderedDict
+from bisect import bisect_left, insort
+import json
+import sys
+from validation import clientError
+from persistence import MemoryBackend
+from billing import calculateCharges, calculateChargesParallel, toMicroseconds
+from pricing import DEFAULT_TARIFF
+from accounting import Ledger
+from history import RentalHistory
+from metrics import Metrics, INSTRUMENTED_OPERATIONS
+from booking import BookingSchedule
+from clock import SYSTEM_CLOCK
+
+class Record(object):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def keys(self):
+        '''
+        Metodo que lista os campos do registro, como em um dicionario.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        Tupla com os nomes dos campos
+        '''
+        return self.__slots__
+
+    def get(self, key, default=None):
+        '''
+        Metodo que busca um campo do registro, como em um dicionario.
+
+        Parameters:
+        ----------
+        key : str
+            Nome do campo
+        default : optional
+            Valor retornado se o campo nao existir
+        
+        Returns
+        -------
+        Valor do campo ou default
+        '''
+        if key not in self.__slots__:
+            return default
+
+        return getattr(self, key)
+
+    def asDict(self):
+        '''
+        Metodo que converte o registro em dicionario.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        Dicionario com os campos do registro
+        '''
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.asDict()})'
+
+class Bike(Record):
+    __slots__ = ('id', 'color', 'available')
+
+    def __init__(self, id, color, available=True):
+        """
+        Constroi todos atributos do objeto bike.
+
+        Parameters
+        ----------
+            id : int
+                ID da bicicleta
+            color : str
+                Cor da bicicleta
+            available : bool
+                Informa se a bicicleta esta disponivel
+        """
+
+        self.id = id
+        self.color = color
+        self.available = available
+
+class Rental(Record):
+    __slots__ = ('id', 'model', 'family', 'start', 'end', 'bikeId', 'clientId')
+
+    def __init__(self, id, model, family, start, end, bikeId, clientId):
+        """
+        Constroi todos atributos do objeto rental.
+
+        Parameters
+        ----------
+            id : int
+                ID do aluguel
+            model : str
+                Modelo do aluguel: hourly/daily/weekly
+            family : bool
+                Informa se o aluguel e da promocao familia
+            start : datetime
+                Data de inicio
+            end : datetime
+                Data de entrega ou None enquanto estiver aberto
+            bikeId : int
+                ID da bicicleta alugada
+            clientId : int
+                ID do cliente
+        """
+
+        self.id = id
+        self.model = model
+        self.family = family
+        self.start = start
+        self.end = end
+        self.bikeId = bikeId
+        self.clientId = clientId
+
+class Booking(Record):
+    __slots__ = ('id', 'model', 'family', 'start', 'end', 'bikeId', 'clientId')
+
+    def __init__(self, id, model, family, start, end, bikeId, clientId):
+        """
+        Constroi todos atributos do objeto booking.
+
+        Parameters
+        ----------
+            id : int
+                ID da reserva
+            model : str
+                Modelo do aluguel que sera aberto na retirada
+            family : bool
+                Informa se a reserva e da promocao familia
+            start : datetime
+                Inicio da janela reservada
+            end : datetime
+                Fim da janela reservada (excluso)
+            bikeId : int
+                ID da bicicleta reservada
+            clientId : int
+                ID do cliente
+        """
+
+        self.id = id
+        self.model = model
+        self.family = family
+        self.start = start
+        self.end = end
+        self.bikeId = bikeId
+        self.clientId = clientId
 
 class Client(object):
+    __slots__ = ('id', 'name', 'email', 'cpf')
+
     def __init__(self, id, name, email, cpf):
         """
         Constroi todos atributos do objeto client.
@@ -23,24 +191,10 @@ class Client(object):
         if not isinstance(id, int):
             raise TypeError('O ID do cliente deve ser um inteiro.')
 
-        if not isinstance(name, str):
-            raise TypeError('O nome do cliente deve ser string.')
-            
-        if not isinstance(email, str):
-            raise TypeError('O email do cliente deve ser string.')
-
-        if not isinstance(cpf, str):
-            raise TypeError('O CPF do cliente deve ser string.')
-
-        regexEmail = '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$'
+        error = clientError(name, email, cpf)
 
-        if not re.fullmatch(regexEmail, email):
-            raise TypeError('Email invalido.')
-
-        regexCpf = '^[0-9]{3}[\.]?[0-9]{3}[\.]?[0-9]{3}[-]?[0-9]{2}$'
-
-        if not re.fullmatch(regexCpf, cpf):
-            raise TypeError('CPF invalido.')
+        if error is not None:
+            raise TypeError(error)
 
         self.id = id
         self.name = name
@@ -50,268 +204,1673 @@ class Client(object):
     def __repr__(self):
         return f'Client(id:{self.id}, name:{self.name}, email:{self.email}, cpf:{self.cpf})'
 
-class Store(object):
-    def __init__(self, name, address):
+def normalizeCpf(cpf):
+    '''
+    Funcao que remove a pontuacao de um CPF.
+
+    Parameters:
+    ----------
+    cpf : str
+        CPF com ou sem pontuacao
+    
+    Returns
+    -------
+    CPF contendo apenas os digitos
+    '''
+    return cpf.replace('.', '').replace('-', '')
+
+class ClientIndex(object):
+    def __init__(self):
         """
-        Constroi todos atributos do objeto store.
+        Constroi os indices de clientes.
 
         Parameters
         ----------
-            name : str
-                Nome da loja
-            address : str
-                Endereco da loja
-            clients : list
-                Lista de clientes cadastrados na loja
-            rentals : list
-                Lista de alugueis cadastrados na loja
-                    {
-                        model: hora/dia/semana
-                        family: booleano que representa se o aluguel e da promocao familia
-                        start: data inicio
-                        end: data entrega
-                        bikeId: indice na lista de bikes
-                        clientId: indice do clients
-                    }
-            bikes : list
-                Lista de biciletas cadastradas na loja
-                    {
-                        color: cor da bike
-                        available: booleano que informa se esta disponivel
-                    }
+            byId : dict
+                Clientes indexados pelo ID
+            byEmail : dict
+                Clientes indexados pelo email
+            byCpf : dict
+                Clientes indexados pelo CPF normalizado
+            nextId : int
+                ID do proximo cliente cadastrado
         """
 
-        if not isinstance(name, str):
-            raise TypeError('O nome da loja deve ser string.')
-            
-        if not isinstance(address, str):
-            raise TypeError('O endereco da loja deve ser string.')
+        self.byId = {}
+        self.byEmail = {}
+        self.byCpf = {}
+        self.nextId = 1
 
-        self.name = name
-        self.address = address
-        self.clients = []
-        self.rentals = []
-        self.bikes = []
-    
-    def addBike(self, cor):
+    def __len__(self):
+        return len(self.byId)
+
+    def add(self, client):
         '''
-        Metodo que adiciona uma bicicleta a loja.
+        Metodo que indexa um cliente.
 
         Parameters:
         ----------
-        cor : str
-            Cor da bicicleta
+        client : Client
+            Cliente a ser indexado
+        
+        Returns
+        -------
+        None
         '''
-        self.bikes.append({
-            'id': len(self.bikes) + 1,
-            'color': cor,
-            'available': True
-        })
-    
-    def addClient(self, name, email, cpf):
+        if client.email in self.byEmail:
+            raise TypeError('Cliente ja cadastrado.')
+
+        cpf = normalizeCpf(client.cpf)
+
+        if cpf in self.byCpf:
+            raise TypeError('CPF ja cadastrado.')
+
+        self.byId[client.id] = client
+        self.byEmail[client.email] = client
+        self.byCpf[cpf] = client
+
+    def remove(self, client):
         '''
-        Metodo que adiciona um cliente.
+        Metodo que remove um cliente dos indices.
 
         Parameters:
         ----------
-        name : str
-            Nome do cliente
+        client : Client
+            Cliente a ser removido
+        
+        Returns
+        -------
+        None
+        '''
+        del self.byId[client.id]
+        del self.byEmail[client.email]
+        del self.byCpf[normalizeCpf(client.cpf)]
+
+    def update(self, client, email, cpf):
+        '''
+        Metodo que reindexa um cliente que teve email ou CPF alterado.
+
+        Parameters:
+        ----------
+        client : Client
+            Cliente ja indexado
         email : str
-            Email do cliente
+            Novo email do cliente
+        cpf : str
+            Novo CPF do cliente
         
         Returns
         -------
         None
         '''
-        if self.findClientByEmail(email):
+        other = self.byEmail.get(email)
+
+        if other is not None and other is not client:
             raise TypeError('Cliente ja cadastrado.')
 
-        self.clients.append(Client(len(self.clients) + 1, name, email, cpf))
+        other = self.byCpf.get(normalizeCpf(cpf))
 
-    
-    def addRental(self, model, email, quantity, family=False):
+        if other is not None and other is not client:
+            raise TypeError('CPF ja cadastrado.')
+
+        del self.byEmail[client.email]
+        del self.byCpf[normalizeCpf(client.cpf)]
+
+        self.byEmail[email] = client
+        self.byCpf[normalizeCpf(cpf)] = client
+
+class SortedIds(object):
+    LOAD = 1000
+
+    def __init__(self):
+        """
+        Constroi um conjunto ordenado de IDs dividido em blocos ordenados de ate
+        2 * LOAD IDs. Inserir e remover custam O(log n + LOAD), em vez de mover a
+        lista inteira, e uma fatia pula blocos inteiros, em O(n / LOAD + tamanho).
+
+        Parameters
+        ----------
+            blocks : list
+                Blocos ordenados de IDs
+            maxes : list
+                Maior ID de cada bloco
+            size : int
+                Quantidade de IDs
+        """
+
+        self.blocks = []
+        self.maxes = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def add(self, id):
         '''
-        Metodo que adiciona um aluguel.
+        Metodo que insere um ID, dividindo o bloco quando ele fica grande demais.
 
         Parameters:
         ----------
-        model : str
-            Modelo de aluguel que pode ser por hora ("hourly"), diário ("daily") ou semanal ("weekly")
-        email : str
-            Email do cliente
-        quantity : int
-            Quantidade de alugueis
-        family : boolean, optional
-            Informa se o aluguel e da promocao em familia, por default e falso
+        id : int
+            ID a ser inserido
         
         Returns
         -------
         None
         '''
-        if not model in ['hourly', 'daily', 'weekly']:
-            raise ValueError('Tipo de aluguel invalido.')
-        
-        if not isinstance(quantity, int):
-            raise TypeError('A quantidade de alugueis deve ser inteira.')
+        self.size += 1
 
-        bikesAvailable = self.getAvailableBikes(quantity)
+        if not self.blocks:
+            self.blocks.append([id])
+            self.maxes.append(id)
+            return
 
-        if len(bikesAvailable) < quantity:
-            raise KeyError('Bicicleta indisponivel.')
+        index = min(bisect_left(self.maxes, id), len(self.blocks) - 1)
 
-        existsClient = self.findClientByEmail(email)
+        block = self.blocks[index]
 
-        if not existsClient:
-            raise KeyError('Cliente nao cadastrado.')
-        
-        if family and not (quantity >= 3 and quantity <= 5):
-            raise ValueError('Aluguel para familia deve ser de 3 a 5 emprestimos.')
-        
-        for bike in bikesAvailable:
-            bike['available'] = False
+        insort(block, id)
 
-            self.rentals.append({
-                'model': model,
-                'family': family,
-                'start': datetime.today(),
-                'end': None,
-                'bikeId': bike['id'],
-                'clientId': existsClient.id
-            })
+        self.maxes[index] = block[-1]
 
-    def getAvailableBikes(self, quantity):
+        if len(block) > 2 * self.LOAD:
+            self.blocks[index:index + 1] = [block[:self.LOAD], block[self.LOAD:]]
+            self.maxes[index:index + 1] = [block[self.LOAD - 1], block[-1]]
+
+    def discard(self, id):
         '''
-        Metodo que busca as bicicletas disponiveis.
+        Metodo que retira um ID presente no conjunto.
 
         Parameters:
         ----------
-        quantity : int
-            Quantidade de bicicletas que deseja buscar
+        id : int
+            ID a ser retirado
         
         Returns
         -------
-        Lista de dicionarios que representam as bicicletas
+        None
         '''
-        bikes = []
+        index = bisect_left(self.maxes, id)
 
-        for bike in self.bikes:
-            if len(bikes) == quantity:
-                return bikes
-            
-            if bike['available']:
-                bikes.append(bike)
-        
-        return bikes
-    
-    def findClientByEmail(self, email):
+        block = self.blocks[index]
+
+        del block[bisect_left(block, id)]
+
+        self.size -= 1
+
+        if block:
+            self.maxes[index] = block[-1]
+        else:
+            del self.blocks[index]
+            del self.maxes[index]
+
+    def slice(self, start, stop):
         '''
-        Metodo que busca um cliente a partir do seu email.
+        Metodo que busca os IDs entre duas posicoes, como ids[start:stop] em uma lista.
 
         Parameters:
         ----------
-        email : str
-            Email do cliente
+        start : int
+            Primeira posicao
+        stop : int
+            Posicao final (exclusa)
         
         Returns
         -------
-        Cliente encontrado ou None
+        Lista de IDs
         '''
-        for client in self.clients:
-            if client.email == email:
-                return client
-        
-        return None
+        ids = []
+
+        for block in self.blocks:
+            if start >= len(block):
+                start -= len(block)
+                stop -= len(block)
+                continue
+
+            if stop <= 0:
+                break
+
+            ids.extend(block[start:stop])
+
+            start = 0
+            stop -= len(block)
+
+        return ids
+
+class FleetIndex(object):
+    def __init__(self):
+        """
+        Constroi os indices secundarios e os contadores da frota.
+
+        Parameters
+        ----------
+            byColor : dict
+                Bicicletas indexadas pela cor e depois pelo ID, na ordem do ID
+            rented : dict
+                Bicicletas alugadas indexadas pelo ID
+            ids : dict
+                IDs em ordem (SortedIds) indexados por (cor, disponivel), em que cor
+                None vale para todas as cores e disponivel None para todas as bicicletas
+            totalByColor : dict
+                Quantidade de bicicletas por cor
+            availableByColor : dict
+                Quantidade de bicicletas disponiveis por cor
+        """
 
-    def showBikes(self):
+        self.byColor = {}
+        self.rented = {}
+        self.ids = {}
+        self.totalByColor = {}
+        self.availableByColor = {}
+
+    def add(self, bike):
         '''
-        Metodo que imprime todas as bicicletas do estoque.
+        Metodo que indexa uma bicicleta nova.
 
         Parameters:
         ----------
-        None
+        bike : Bike
+            Bicicleta a ser indexada
         
         Returns
         -------
         None
         '''
-        print(tabulate(self.bikes, headers="keys", tablefmt="fancy_grid"))
+        self.byColor.setdefault(bike.color, {})[bike.id] = bike
+        self.insert((bike.color, None), bike.id)
+        self.insert((None, True), bike.id)
+        self.insert((bike.color, True), bike.id)
+        self.totalByColor[bike.color] = self.totalByColor.get(bike.color, 0) + 1
+        self.availableByColor[bike.color] = self.availableByColor.get(bike.color, 0) + 1
 
-    def calculateRental(self, email):
+        if not bike.available:
+            self.rent(bike)
+
+    def rent(self, bike):
         '''
-        Metodo que calcula o valor de todos os alugueis de um cliente.
+        Metodo que move uma bicicleta para o conjunto de alugadas.
 
         Parameters:
         ----------
-        email : str
-            Email do cliente
+        bike : Bike
+            Bicicleta alugada
         
         Returns
         -------
-        value (float): Valor do aluguel
+        None
         '''
-        client = self.findClientByEmail(email)
+        if bike.id in self.rented:
+            return
 
-        rentals = [rent for rent in self.rentals if not rent['end'] and rent['clientId'] == client.id]
+        self.rented[bike.id] = bike
+        self.ids[(None, True)].discard(bike.id)
+        self.ids[(bike.color, True)].discard(bike.id)
+        self.insert((None, False), bike.id)
+        self.insert((bike.color, False), bike.id)
+        self.availableByColor[bike.color] -= 1
 
-        bikes = [bike for bike in self.bikes for rent in self.rentals if rent['bikeId'] == bike['id'] and rent['clientId'] == client.id]
+    def release(self, bike):
+        '''
+        Metodo que tira uma bicicleta do conjunto de alugadas.
 
-        for bike in bikes:
-            bike['available'] = True
+        Parameters:
+        ----------
+        bike : Bike
+            Bicicleta devolvida
+        
+        Returns
+        -------
+        None
+        '''
+        if self.rented.pop(bike.id, None) is None:
+            return
 
-        value = 0
+        self.ids[(None, False)].discard(bike.id)
+        self.ids[(bike.color, False)].discard(bike.id)
+        self.insert((None, True), bike.id)
+        self.insert((bike.color, True), bike.id)
+        self.availableByColor[bike.color] += 1
 
-        valueForFamily = 0
+    def insert(self, key, id):
+        ids = self.ids.get(key)
 
-        for rent in rentals:
-            rent['end'] = datetime.today()
-
-            if rent['model'] == 'hourly':
-                if rent['family']:
-                    valueForFamily += self.calculateTime(rent['model'], rent['start'], rent['end']) * 5
-                else:
-                    value += self.calculateTime(rent['model'], rent['start'], rent['end']) * 5
-            elif rent['model'] == 'daily':
-                if rent['family']:
-                    valueForFamily += self.calculateTime(rent['model'], rent['start'], rent['end']) * 25
-                else:
-                    value += self.calculateTime(rent['model'], rent['start'], rent['end']) * 25
-            elif rent['model'] == 'weekly':
-                if rent['family']:
-                    valueForFamily += self.calculateTime(rent['model'], rent['start'], rent['end']) * 100
-                else:
-                    value += self.calculateTime(rent['model'], rent['start'], rent['end']) * 100
-
-        return value + (valueForFamily * 0.7)
-    
-    def calculateTime(self, model, start, end):
+        if ids is None:
+            ids = self.ids[key] = SortedIds()
+
+        ids.add(id)
+
+    def select(self, available=None, color=None):
         '''
-        Metodo que calcula o tempo do aluguel.
+        Metodo que busca os IDs das bicicletas de um filtro, em ordem, sem percorrer a frota.
 
         Parameters:
         ----------
-        model : str
-            Modelo de aluguel que pode ser por hora ("hourly"), diário ("daily") ou semanal ("weekly")
-        start : date
-            Data de inicio do aluguel
-        end : date
-            Data de termino
+        available : boolean, optional
+            Filtra as bicicletas disponiveis (True) ou alugadas (False), por default todas
+        color : str, optional
+            Filtra as bicicletas de uma cor, por default todas
         
         Returns
         -------
-        value (int): Valor que representa a quantidade de tempo do aluguel
+        SortedIds com os IDs, que nao deve ser alterado
         '''
-        if end < start:
-            raise ValueError('A data de entrega deve ser depois da data de empréstimo.')
+        ids = self.ids.get((color, available))
 
-        value = 0
+        return ids if ids is not None else SortedIds()
 
-        if model == 'hourly':
-            value = math.ceil((end - start).total_seconds()/ 3600)
-        elif model == 'daily':
-            value = math.ceil((end - start).total_seconds()/ 86400)
-        elif model == 'weekly':
-            value = math.ceil((end - start).total_seconds()/ 604800)
-        
-        if value < 1:
-            return 1
-        return value
\ No newline at end of file
+class Store(object):
+    def __init__(self, name, address, backend=None, tariff=None, directory=None, clock=None):
+        """
+        Constroi todos atributos do objeto store.
+
+        Parameters
+        ----------
+            name : str
+                Nome da loja
+            address : str
+                Endereco da loja
+            backend : MemoryBackend, optional
+                Armazenamento persistente da loja, por default os dados ficam apenas em memoria
+            tariff : Tariff, optional
+                Tabela de precos compilada, por default a tabela padrao
+            directory : Store, optional
+                Loja cujo cadastro de clientes (clients e clientIndex) e compartilhado com esta
+            clock : SystemClock, optional
+                Relogio usado em todas as datas da loja, por default o relogio do sistema
+            clients : list
+                Lista de clientes cadastrados na loja
+            clientIndex : ClientIndex
+                Indices dos clientes por ID, email e CPF
+            rentals : list
+                Lista de alugueis (Rental) recentes da loja; os encerrados saem dela em archive
+                    {
+                        id: identificador do aluguel
+                        model: hora/dia/semana
+                        family: booleano que representa se o aluguel e da promocao familia
+                        start: data inicio
+                        end: data entrega
+                        bikeId: indice na lista de bikes
+                        clientId: indice do clients
+                    }
+            bikes : list
+                Lista de biciletas (Bike) cadastradas na loja
+                    {
+                        color: cor da bike
+                        available: booleano que informa se esta disponivel
+                    }
+            availableBikes : OrderedDict
+                Bicicletas disponiveis indexadas pelo ID, na ordem em que ficaram disponiveis
+            openRentals : dict
+                Alugueis em aberto de cada cliente, indexados pelo ID do cliente e,
+                dentro dele, pelo ID do aluguel, na ordem em que foram abertos
+            rentalIndex : dict
+                Todos os alugueis (Rental) indexados pelo ID, inclusive os arquivados
+            openByBike : dict
+                Aluguel em aberto de cada bicicleta alugada, indexado pelo ID da bicicleta
+            history : RentalHistory
+                Todos os alugueis da loja ordenados pelo inicio, para relatorios
+            fleetIndex : FleetIndex
+                Indices da frota por cor e por situacao, com os contadores
+            ledger : Ledger
+                Saldo incremental dos alugueis em aberto, por cliente e da loja
+            metrics : Metrics
+                Instrumentacao das operacoes, None enquanto estiver desligada
+            schedule : BookingSchedule
+                Reservas de bicicletas para janelas futuras
+        """
+
+        if not isinstance(name, str):
+            raise TypeError('O nome da loja deve ser string.')
+            
+        if not isinstance(address, str):
+            raise TypeError('O endereco da loja deve ser string.')
+
+        self.name = name
+        self.address = address
+        self.clients = [] if directory is None else directory.clients
+        self.clientIndex = ClientIndex() if directory is None else directory.clientIndex
+        self.rentals = []
+        self.history = RentalHistory()
+        self.bikes = []
+        self.availableBikes = OrderedDict()
+        self.fleetIndex = FleetIndex()
+        self.openRentals = {}
+        self.rentalIndex = {}
+        self.openByBike = {}
+        self.nextRentalId = 1
+        self.tariff = tariff if tariff is not None else DEFAULT_TARIFF
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.ledger = Ledger(self.tariff)
+        self.metrics = None
+        self.schedule = BookingSchedule()
+        self.nextBookingId = 1
+        self.backend = backend if backend is not None else MemoryBackend()
+
+        self.backend.load(self)
+
+    def restore(self, bikes, clients, rentals, bookings=(), nextBookingId=None):
+        '''
+        Metodo que reconstroi a loja e seus indices a partir de dados persistidos,
+        sem registrar as operacoes novamente no backend.
+
+        Parameters:
+        ----------
+        bikes : iterable
+            Tuplas (id, color, available) ordenadas pelo ID
+        clients : iterable
+            Tuplas (id, name, email, cpf) ordenadas pelo ID
+        rentals : iterable
+            Tuplas (id, model, family, start, end, bikeId, clientId) ordenadas pelo ID
+        bookings : iterable, optional
+            Reservas ativas, em tuplas (id, model, family, start, end, bikeId, clientId)
+        nextBookingId : int, optional
+            ID da proxima reserva, por default o seguinte ao da ultima reserva ativa
+        
+        Returns
+        -------
+        None
+        '''
+        for id, color, available in bikes:
+            bike = Bike(id, color, available)
+
+            self.bikes.append(bike)
+
+            self.fleetIndex.add(bike)
+
+            self.schedule.addBike(id)
+
+            if available:
+                self.availableBikes[id] = bike
+
+        for id, name, email, cpf in clients:
+            client = Client(id, name, email, cpf)
+
+            self.clientIndex.add(client)
+
+            self.clients.append(client)
+
+            self.clientIndex.nextId = id + 1
+
+        for id, model, family, start, end, bikeId, clientId in rentals:
+            rent = Rental(id, model, family, start, end, bikeId, clientId)
+
+            self.recordRental(rent)
+
+            if end is None:
+                self.openRentals.setdefault(clientId, {})[rent.id] = rent
+
+                self.openByBike[bikeId] = rent
+
+                self.ledger.open(rent)
+
+            self.nextRentalId = id + 1
+
+            self.clientIndex.nextId = max(self.clientIndex.nextId, clientId + 1)
+
+        for id, model, family, start, end, bikeId, clientId in bookings:
+            self.schedule.add(Booking(id, model, family, start, end, bikeId, clientId))
+
+            self.nextBookingId = max(self.nextBookingId, id + 1)
+
+        if nextBookingId is not None:
+            self.nextBookingId = max(self.nextBookingId, nextBookingId)
+
+    def enableMetrics(self, metrics=None):
+        '''
+        Metodo que liga a instrumentacao das operacoes da loja. Os metodos medidos
+        sao envolvidos apenas nesta instancia, entao com a instrumentacao desligada
+        as chamadas nao pagam nada alem de um teste de None nas contagens de linhas.
+
+        Parameters:
+        ----------
+        metrics : Metrics, optional
+            Contadores a serem usados, por default contadores novos
+        
+        Returns
+        -------
+        Metrics
+        '''
+        self.disableMetrics()
+
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        for operation in INSTRUMENTED_OPERATIONS:
+            setattr(self, operation, self.metrics.timed(operation, getattr(self, operation)))
+
+        return self.metrics
+
+    def disableMetrics(self):
+        '''
+        Metodo que desliga a instrumentacao das operacoes da loja.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        None
+        '''
+        for operation in INSTRUMENTED_OPERATIONS:
+            self.__dict__.pop(operation, None)
+
+        self.metrics = None
+
+    def close(self):
+        '''
+        Metodo que grava as operacoes pendentes e fecha o backend.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        None
+        '''
+        self.backend.close()
+    
+    def addBike(self, cor):
+        '''
+        Metodo que adiciona uma bicicleta a loja.
+
+        Parameters:
+        ----------
+        cor : str
+            Cor da bicicleta
+        '''
+        bike = Bike(len(self.bikes) + 1, cor)
+
+        self.bikes.append(bike)
+
+        self.fleetIndex.add(bike)
+
+        self.schedule.addBike(bike.id)
+
+        self.availableBikes[bike.id] = bike
+
+        self.backend.bikeAdded(bike)
+    
+    def addClient(self, name, email, cpf):
+        '''
+        Metodo que adiciona um cliente.
+
+        Parameters:
+        ----------
+        name : str
+            Nome do cliente
+        email : str
+            Email do cliente
+        cpf : str
+            CPF do cliente
+        
+        Returns
+        -------
+        None
+        '''
+        if self.findClientByEmail(email):
+            raise TypeError('Cliente ja cadastrado.')
+
+        client = Client(self.clientIndex.nextId, name, email, cpf)
+
+        self.clientIndex.add(client)
+
+        self.clients.append(client)
+
+        self.clientIndex.nextId += 1
+
+        self.backend.clientAdded(client)
+
+    def addBikes(self, colors):
+        '''
+        Metodo que adiciona varias bicicletas a loja de uma vez.
+
+        Parameters:
+        ----------
+        colors : iterable
+            Cores das bicicletas
+        
+        Returns
+        -------
+        None
+        '''
+        nextId = len(self.bikes) + 1
+
+        bikes = [Bike(id, color) for id, color in enumerate(colors, nextId)]
+
+        self.bikes.extend(bikes)
+
+        self.availableBikes.update((bike.id, bike) for bike in bikes)
+
+        for bike in bikes:
+            self.fleetIndex.add(bike)
+
+            self.schedule.addBike(bike.id)
+
+            self.backend.bikeAdded(bike)
+
+    def addClients(self, rows):
+        '''
+        Metodo que adiciona varios clientes de uma vez, rejeitando as linhas invalidas
+        ou repetidas sem interromper a carga.
+
+        Parameters:
+        ----------
+        rows : iterable
+            Tuplas (name, email, cpf) com os dados de cada cliente
+        
+        Returns
+        -------
+        Lista de tuplas (indice, mensagem) com as linhas rejeitadas
+        '''
+        byEmail = self.clientIndex.byEmail
+
+        byCpf = self.clientIndex.byCpf
+
+        rejected = []
+
+        clients = []
+
+        nextId = self.clientIndex.nextId
+
+        for index, row in enumerate(rows):
+            try:
+                name, email, cpf = row
+            except (TypeError, ValueError):
+                rejected.append((index, 'Linha invalida.'))
+                continue
+
+            try:
+                client = Client(nextId, name, email, cpf)
+            except TypeError as error:
+                rejected.append((index, error.args[0]))
+                continue
+
+            if email in byEmail:
+                rejected.append((index, 'Cliente ja cadastrado.'))
+                continue
+
+            if normalizeCpf(cpf) in byCpf:
+                rejected.append((index, 'CPF ja cadastrado.'))
+                continue
+
+            self.clientIndex.add(client)
+
+            clients.append(client)
+
+            nextId += 1
+
+        self.clients.extend(clients)
+
+        self.clientIndex.nextId = nextId
+
+        for client in clients:
+            self.backend.clientAdded(client)
+
+        return rejected
+
+    def updateClient(self, email, name=None, newEmail=None, cpf=None):
+        '''
+        Metodo que atualiza os dados de um cliente.
+
+        Parameters:
+        ----------
+        email : str
+            Email atual do cliente
+        name : str, optional
+            Novo nome do cliente
+        newEmail : str, optional
+            Novo email do cliente
+        cpf : str, optional
+            Novo CPF do cliente
+        
+        Returns
+        -------
+        None
+        '''
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+
+        updated = Client(
+            client.id,
+            client.name if name is None else name,
+            client.email if newEmail is None else newEmail,
+            client.cpf if cpf is None else cpf
+        )
+
+        self.clientIndex.update(client, updated.email, updated.cpf)
+
+        client.name = updated.name
+        client.email = updated.email
+        client.cpf = updated.cpf
+
+        self.backend.clientUpdated(client)
+
+    def removeClient(self, email):
+        '''
+        Metodo que remove um cliente sem alugueis em aberto.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+        
+        Returns
+        -------
+        None
+        '''
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+
+        if self.openRentals.get(client.id):
+            raise ValueError('Cliente possui alugueis em aberto.')
+
+        self.clientIndex.remove(client)
+
+        self.clients.remove(client)
+
+        self.backend.clientRemoved(client)
+
+
+    def addRental(self, model, email, quantity, family=False):
+        '''
+        Metodo que adiciona um aluguel.
+
+        Parameters:
+        ----------
+        model : str
+            Modelo de aluguel que pode ser por hora ("hourly"), diário ("daily") ou semanal ("weekly")
+        email : str
+            Email do cliente
+        quantity : int
+            Quantidade de alugueis
+        family : boolean, optional
+            Informa se o aluguel e da promocao em familia, por default e falso
+        
+        Returns
+        -------
+        None
+        '''
+        if not model in self.tariff.codes:
+            raise ValueError('Tipo de aluguel invalido.')
+        
+        if not isinstance(quantity, int):
+            raise TypeError('A quantidade de alugueis deve ser inteira.')
+
+        now = self.clock.now()
+
+        until = now + timedelta(seconds=self.tariff.unitSeconds[self.tariff.codes[model]])
+
+        existsClient = self.findClientByEmail(email)
+
+        if not existsClient:
+            raise KeyError('Cliente nao cadastrado.')
+        
+        if family and not (quantity >= self.tariff.familyMin and quantity <= self.tariff.familyMax):
+            raise ValueError(f'Aluguel para familia deve ser de {self.tariff.familyMin} a {self.tariff.familyMax} emprestimos.')
+
+        bikesAvailable = self.reserveBikes(quantity, until)
+
+        for bike in bikesAvailable:
+            self.openRental(model, family, bike, existsClient.id, now)
+
+    def openRental(self, model, family, bike, clientId, start=None):
+        '''
+        Metodo que abre o aluguel de uma bicicleta ja reservada.
+
+        Parameters:
+        ----------
+        model : str
+            Modelo de aluguel
+        family : boolean
+            Informa se o aluguel e da promocao em familia
+        bike : Bike
+            Bicicleta ja retirada do conjunto de disponiveis
+        clientId : int
+            ID do cliente
+        start : datetime, optional
+            Inicio do aluguel, por default agora; os alugueis de um mesmo pedido
+            comecam juntos
+        
+        Returns
+        -------
+        None
+        '''
+        rent = Rental(self.newRentalId(), model, family, start if start is not None else self.clock.now(), None, bike.id, clientId)
+
+        self.recordRental(rent)
+
+        self.openRentals.setdefault(clientId, {})[rent.id] = rent
+
+        self.openByBike[bike.id] = rent
+
+        self.ledger.open(rent)
+
+        self.backend.rentalOpened(rent)
+
+    def bookBikes(self, model, email, quantity, start, end, family=False):
+        '''
+        Metodo que reserva bicicletas para uma janela futura. As bicicletas alugadas
+        no momento tambem podem ser reservadas; se ainda nao tiverem voltado na
+        retirada, outra bicicleta livre e entregue no lugar.
+
+        Parameters:
+        ----------
+        model : str
+            Modelo do aluguel que sera aberto na retirada
+        email : str
+            Email do cliente
+        quantity : int
+            Quantidade de bicicletas
+        start : datetime
+            Inicio da janela
+        end : datetime
+            Fim da janela (excluso)
+        family : boolean, optional
+            Informa se a reserva e da promocao em familia, por default e falso
+        
+        Returns
+        -------
+        Lista com os IDs das reservas
+        '''
+        if not model in self.tariff.codes:
+            raise ValueError('Tipo de aluguel invalido.')
+        
+        if not isinstance(quantity, int):
+            raise TypeError('A quantidade de alugueis deve ser inteira.')
+
+        if end <= start:
+            raise ValueError('A data de entrega deve ser depois da data de empréstimo.')
+
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+        
+        if family and not (quantity >= self.tariff.familyMin and quantity <= self.tariff.familyMax):
+            raise ValueError(f'Aluguel para familia deve ser de {self.tariff.familyMin} a {self.tariff.familyMax} emprestimos.')
+
+        bikeIds = self.schedule.findFree(quantity, start, end)
+
+        if len(bikeIds) < quantity:
+            raise KeyError('Bicicleta indisponivel.')
+
+        ids = []
+
+        for bikeId in bikeIds:
+            booking = Booking(self.nextBookingId, model, family, start, end, bikeId, client.id)
+
+            self.nextBookingId += 1
+
+            self.schedule.add(booking)
+
+            self.backend.bookingAdded(booking)
+
+            ids.append(booking.id)
+
+        return ids
+
+    def cancelBooking(self, id):
+        '''
+        Metodo que cancela uma reserva.
+
+        Parameters:
+        ----------
+        id : int
+            ID da reserva
+        
+        Returns
+        -------
+        None
+        '''
+        booking = self.schedule.remove(id)
+
+        self.backend.bookingRemoved(booking)
+
+    def pickUpBooking(self, id):
+        '''
+        Metodo que transforma uma reserva em aluguel, a partir de agora. Se a
+        bicicleta reservada ainda estiver alugada, ou tiver outra reserva antes do
+        fim da janela, outra bicicleta livre ate o fim da janela e entregue no lugar.
+
+        Parameters:
+        ----------
+        id : int
+            ID da reserva
+        
+        Returns
+        -------
+        value (int): ID da bicicleta entregue
+        '''
+        booking = self.schedule.remove(id)
+
+        now = self.clock.now()
+
+        until = max(booking.end, now + timedelta(microseconds=1))
+
+        bike = self.findBikeById(booking.bikeId)
+
+        if not bike.available or not self.schedule.isFree(bike.id, now, until):
+            bikes = self.getAvailableBikes(1, until)
+
+            if not bikes:
+                self.schedule.add(booking)
+
+                raise KeyError('Bicicleta indisponivel.')
+
+            bike = bikes[0]
+
+        self.backend.bookingRemoved(booking)
+
+        self.markBikeRented(bike)
+
+        self.openRental(booking.model, booking.family, bike, booking.clientId)
+
+        return bike.id
+
+    def recordRental(self, rent):
+        '''
+        Metodo que registra um aluguel na lista de recentes e no historico.
+
+        Parameters:
+        ----------
+        rent : Rental
+            Aluguel a ser registrado
+        
+        Returns
+        -------
+        None
+        '''
+        self.rentals.append(rent)
+
+        self.rentalIndex[rent.id] = rent
+
+        self.history.add(rent)
+
+    def archive(self, before=None):
+        '''
+        Metodo que retira da lista de recentes os alugueis encerrados, que continuam
+        disponiveis no historico.
+
+        Parameters:
+        ----------
+        before : datetime, optional
+            Arquiva apenas os alugueis entregues antes desta data, por default todos os encerrados
+        
+        Returns
+        -------
+        value (int): Quantidade de alugueis arquivados
+        '''
+        rentals = [
+            rent for rent in self.rentals
+            if rent.end is None or (before is not None and rent.end >= before)
+        ]
+
+        archived = len(self.rentals) - len(rentals)
+
+        self.rentals[:] = rentals
+
+        return archived
+
+    def reserveBikes(self, quantity, until=None):
+        '''
+        Metodo que retira do conjunto de disponiveis as bicicletas de um aluguel.
+
+        Parameters:
+        ----------
+        quantity : int
+            Quantidade de bicicletas
+        until : datetime, optional
+            Ignora as bicicletas com reservas entre agora e esta data
+        
+        Returns
+        -------
+        Lista de bicicletas (Bike) reservadas
+        '''
+        bikes = self.getAvailableBikes(quantity, until)
+
+        if len(bikes) < quantity:
+            raise KeyError('Bicicleta indisponivel.')
+
+        for bike in bikes:
+            self.markBikeRented(bike)
+
+        return bikes
+
+    def newRentalId(self):
+        '''
+        Metodo que gera o ID do proximo aluguel.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        value (int): ID do aluguel
+        '''
+        id = self.nextRentalId
+
+        self.nextRentalId += 1
+
+        return id
+
+    def getAvailableBikes(self, quantity, until=None):
+        '''
+        Metodo que busca as bicicletas disponiveis.
+
+        Parameters:
+        ----------
+        quantity : int
+            Quantidade de bicicletas que deseja buscar
+        until : datetime, optional
+            Ignora as bicicletas com reservas entre agora e esta data
+        
+        Returns
+        -------
+        Lista de bicicletas (Bike)
+        '''
+        bikes = []
+
+        stale = []
+
+        booked = 0
+
+        if until is not None and self.schedule:
+            now = self.clock.now()
+        else:
+            until = None
+
+        for bike in self.availableBikes.values():
+            if len(bikes) == quantity:
+                break
+
+            if not bike.available:
+                stale.append(bike)
+            elif until is not None and not self.schedule.isFree(bike.id, now, until):
+                booked += 1
+            else:
+                bikes.append(bike)
+
+        for bike in stale:
+            self.markBikeRented(bike)
+
+        if self.metrics is not None:
+            self.metrics.scanned('getAvailableBikes', len(bikes) + len(stale) + booked)
+        
+        return bikes
+
+    def findBikeById(self, id):
+        '''
+        Metodo que busca uma bicicleta a partir do seu ID.
+
+        Parameters:
+        ----------
+        id : int
+            ID da bicicleta
+        
+        Returns
+        -------
+        Bicicleta (Bike) ou None
+        '''
+        if 1 <= id <= len(self.bikes):
+            return self.bikes[id - 1]
+
+        return None
+
+    def availableCount(self):
+        '''
+        Metodo que informa quantas bicicletas estao disponiveis.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        value (int): Quantidade de bicicletas disponiveis
+        '''
+        return len(self.bikes) - len(self.fleetIndex.rented)
+
+    def countBikes(self, available=None, color=None):
+        '''
+        Metodo que conta as bicicletas do estoque a partir dos contadores da frota, sem percorre-la.
+
+        Parameters:
+        ----------
+        available : boolean, optional
+            Conta as bicicletas disponiveis (True) ou alugadas (False), por default todas
+        color : str, optional
+            Conta as bicicletas de uma cor, por default todas
+        
+        Returns
+        -------
+        value (int): Quantidade de bicicletas
+        '''
+        index = self.fleetIndex
+
+        if color is None:
+            total = len(self.bikes)
+            free = total - len(index.rented)
+        else:
+            total = index.totalByColor.get(color, 0)
+            free = index.availableByColor.get(color, 0)
+
+        if available is None:
+            return total
+
+        if available:
+            return free
+
+        return total - free
+
+    def stats(self):
+        '''
+        Metodo que resume a frota, os clientes e os alugueis em aberto.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        Dicionario com os contadores da loja
+        '''
+        index = self.fleetIndex
+
+        return {
+            'bikes': len(self.bikes),
+            'available': len(self.bikes) - len(index.rented),
+            'rented': len(index.rented),
+            'byColor': {
+                color: {'bikes': total, 'available': index.availableByColor[color], 'rented': total - index.availableByColor[color]}
+                for color, total in index.totalByColor.items()
+            },
+            'clients': len(self.clientIndex),
+            'openRentals': len(self.ledger.rentals)
+        }
+
+    def markBikeRented(self, bike):
+        '''
+        Metodo que retira uma bicicleta do conjunto de disponiveis.
+
+        Parameters:
+        ----------
+        bike : Bike
+            Bicicleta alugada
+        
+        Returns
+        -------
+        None
+        '''
+        bike.available = False
+
+        self.availableBikes.pop(bike.id, None)
+
+        self.fleetIndex.rent(bike)
+
+    def markBikeAvailable(self, bike):
+        '''
+        Metodo que devolve uma bicicleta ao conjunto de disponiveis.
+
+        Parameters:
+        ----------
+        bike : Bike
+            Bicicleta devolvida
+        
+        Returns
+        -------
+        None
+        '''
+        bike.available = True
+
+        self.availableBikes[bike.id] = bike
+
+        self.fleetIndex.release(bike)
+    
+    def findClientByEmail(self, email):
+        '''
+        Metodo que busca um cliente a partir do seu email.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+        
+        Returns
+        -------
+        Cliente encontrado ou None
+        '''
+        return self.clientIndex.byEmail.get(email)
+
+    def findClientByCpf(self, cpf):
+        '''
+        Metodo que busca um cliente a partir do seu CPF, com ou sem pontuacao.
+
+        Parameters:
+        ----------
+        cpf : str
+            CPF do cliente
+        
+        Returns
+        -------
+        Cliente encontrado ou None
+        '''
+        return self.clientIndex.byCpf.get(normalizeCpf(cpf))
+
+    def findClientById(self, id):
+        '''
+        Metodo que busca um cliente a partir do seu ID.
+
+        Parameters:
+        ----------
+        id : int
+            ID do cliente
+        
+        Returns
+        -------
+        Cliente encontrado ou None
+        '''
+        return self.clientIndex.byId.get(id)
+
+    def findRentalById(self, id):
+        '''
+        Metodo que busca um aluguel, aberto ou encerrado, a partir do seu ID.
+
+        Parameters:
+        ----------
+        id : int
+            ID do aluguel
+        
+        Returns
+        -------
+        Aluguel (Rental) encontrado ou None
+        '''
+        return self.rentalIndex.get(id)
+
+    def iterBikes(self, available=None, color=None):
+        '''
+        Metodo que percorre as bicicletas do estoque na ordem do ID, sem montar uma lista.
+        Com algum filtro so os IDs em ordem do filtro sao percorridos, entao o
+        custo e proporcional ao resultado.
+
+        Parameters:
+        ----------
+        available : boolean, optional
+            Filtra as bicicletas disponiveis (True) ou alugadas (False), por default todas
+        color : str, optional
+            Filtra as bicicletas de uma cor, por default todas
+        
+        Returns
+        -------
+        Gerador de bicicletas (Bike)
+        '''
+        if available is None and color is None:
+            yield from self.bikes
+
+            return
+
+        for id in self.fleetIndex.select(available, color):
+            yield self.bikes[id - 1]
+
+    def listBikes(self, page=1, pageSize=20, available=None, color=None):
+        '''
+        Metodo que busca uma pagina das bicicletas do estoque. A pagina e cortada
+        direto dos IDs em ordem do filtro, sem percorrer as bicicletas anteriores.
+
+        Parameters:
+        ----------
+        page : int, optional
+            Numero da pagina, comecando em 1
+        pageSize : int, optional
+            Quantidade de bicicletas por pagina
+        available : boolean, optional
+            Filtra as bicicletas disponiveis (True) ou alugadas (False), por default todas
+        color : str, optional
+            Filtra as bicicletas de uma cor, por default todas
+        
+        Returns
+        -------
+        Lista de bicicletas (Bike)
+        '''
+        if not isinstance(page, int) or not isinstance(pageSize, int) or page < 1 or pageSize < 1:
+            raise ValueError('A pagina e o tamanho da pagina devem ser inteiros positivos.')
+
+        offset = (page - 1) * pageSize
+
+        if available is None and color is None:
+            return self.bikes[offset:offset + pageSize]
+
+        return [self.bikes[id - 1] for id in self.fleetIndex.select(available, color).slice(offset, offset + pageSize)]
+
+    def showBikes(self, page=None, pageSize=20, available=None, color=None, format='grid', file=None, bikes=None):
+        '''
+        Metodo que imprime as bicicletas do estoque. Nos formatos plain e jsonl as
+        linhas sao escritas uma a uma, a medida que sao encontradas.
+
+        Parameters:
+        ----------
+        page : int, optional
+            Numero da pagina, por default todas as bicicletas
+        pageSize : int, optional
+            Quantidade de bicicletas por pagina
+        available : boolean, optional
+            Filtra as bicicletas disponiveis (True) ou alugadas (False), por default todas
+        color : str, optional
+            Filtra as bicicletas de uma cor, por default todas
+        format : str, optional
+            "grid" (tabela), "plain" (colunas separadas por tab) ou "jsonl" (um JSON por linha)
+        file : file, optional
+            Saida, por default sys.stdout
+        bikes : iterable, optional
+            Bicicletas ja buscadas a serem impressas no lugar da consulta por
+            pagina e filtros
+        
+        Returns
+        -------
+        None
+        '''
+        if format not in ('grid', 'plain', 'jsonl'):
+            raise ValueError('Formato de saida invalido.')
+
+        if file is None:
+            file = sys.stdout
+
+        if bikes is None and page is None:
+            bikes = self.iterBikes(available, color)
+        elif bikes is None:
+            bikes = self.listBikes(page, pageSize, available, color)
+
+        if format == 'grid':
+            from tabulate import tabulate
+
+            print(tabulate([bike.asDict() for bike in bikes], headers="keys", tablefmt="fancy_grid"), file=file)
+        elif format == 'plain':
+            file.write('id\tcolor\tavailable\n')
+
+            for bike in bikes:
+                file.write(f'{bike.id}\t{bike.color}\t{bike.available}\n')
+        else:
+            for bike in bikes:
+                file.write(json.dumps(bike.asDict()) + '\n')
+
+    def calculateRental(self, email):
+        '''
+        Metodo que calcula o valor de todos os alugueis de um cliente.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+        
+        Returns
+        -------
+        value (float): Valor do aluguel
+        '''
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+
+        rentals = self.openRentals.pop(client.id, {}).values()
+
+        if self.metrics is not None:
+            self.metrics.scanned('calculateRental', len(rentals))
+
+        end = self.clock.now()
+
+        value = self.tariff.quote(rentals, end)
+
+        for rent in rentals:
+            self.closeRental(rent, end)
+
+        return value
+
+    def returnBikes(self, email, bikeIds):
+        '''
+        Metodo que encerra e calcula apenas os alugueis de algumas bicicletas de um
+        cliente, como uma familia que devolve 2 de 4 bicicletas. Cada bicicleta e
+        cobrada pelo seu proprio tempo; o desconto familia foi garantido quando o
+        grupo foi alugado, entao vale para as bicicletas devolvidas e continua
+        valendo para as que ficaram. Devolver o grupo em partes custa
+        aproximadamente o mesmo que devolve-lo de uma vez nos mesmos instantes:
+        o desconto e aplicado a cada devolucao, e em ponto flutuante
+        a * 0.7 + b * 0.7 pode diferir de (a + b) * 0.7 no ultimo bit.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+        bikeIds : iterable
+            IDs das bicicletas devolvidas
+        
+        Returns
+        -------
+        value (float): Valor dos alugueis encerrados
+        '''
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+
+        rentals = {}
+
+        for bikeId in bikeIds:
+            rent = self.openByBike.get(bikeId)
+
+            if rent is None or rent.clientId != client.id:
+                raise KeyError('Bicicleta nao alugada pelo cliente.')
+
+            rentals[rent.id] = rent
+
+        return self.closeRentals(client.id, rentals)
+
+    def returnRental(self, rentalId):
+        '''
+        Metodo que encerra e calcula um unico aluguel a partir do seu ID.
+
+        Parameters:
+        ----------
+        rentalId : int
+            ID do aluguel
+        
+        Returns
+        -------
+        value (float): Valor do aluguel
+        '''
+        rent = self.findRentalById(rentalId)
+
+        if rent is None:
+            raise KeyError('Aluguel nao cadastrado.')
+
+        if rent.end is not None:
+            raise ValueError('Aluguel ja encerrado.')
+
+        return self.closeRentals(rent.clientId, {rent.id: rent})
+
+    def closeRentals(self, clientId, rentals):
+        '''
+        Metodo que encerra agora alguns dos alugueis em aberto de um cliente e
+        mantem os demais abertos. Os alugueis encerrados saem de openRentals pelo
+        ID, sem percorrer os demais alugueis do cliente.
+
+        Parameters:
+        ----------
+        clientId : int
+            ID do cliente
+        rentals : dict
+            Alugueis (Rental) em aberto do cliente, indexados pelo ID
+        
+        Returns
+        -------
+        value (float): Valor dos alugueis encerrados
+        '''
+        end = self.clock.now()
+
+        value = self.tariff.quote(rentals.values(), end)
+
+        for rent in rentals.values():
+            self.closeRental(rent, end)
+
+        remaining = self.openRentals.get(clientId, {})
+
+        for id in rentals:
+            remaining.pop(id, None)
+
+        if not remaining:
+            self.openRentals.pop(clientId, None)
+
+        return value
+
+    def closeRental(self, rent, end):
+        '''
+        Metodo que encerra um aluguel ja retirado de openRentals, devolvendo a
+        bicicleta e atualizando a contabilidade e o backend.
+
+        Parameters:
+        ----------
+        rent : Rental
+            Aluguel em aberto
+        end : datetime
+            Data de entrega
+        
+        Returns
+        -------
+        None
+        '''
+        rent.end = end
+
+        self.openByBike.pop(rent.bikeId, None)
+
+        self.ledger.close(rent)
+
+        self.markBikeAvailable(self.findBikeById(rent.bikeId))
+
+        self.backend.rentalClosed(rent)
+
+    def quote(self, email):
+        '''
+        Metodo que calcula quanto um cliente deve neste momento, sem fechar os seus alugueis.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+        
+        Returns
+        -------
+        value (float): Valor do aluguel
+        '''
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+
+        return self.tariff.quote(self.openRentals.get(client.id, {}).values(), self.clock.now())
+
+    def balance(self, email):
+        '''
+        Metodo que informa o saldo em aberto de um cliente a partir da contabilidade
+        incremental, sem percorrer os seus alugueis. O valor e o mesmo que
+        calculateRental cobraria neste momento.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+        
+        Returns
+        -------
+        value (float): Saldo do cliente
+        '''
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+
+        return self.ledger.balance(client.id, self.clock.now())
+
+    def totalBalance(self):
+        '''
+        Metodo que informa o saldo em aberto de todos os clientes da loja.
+
+        Parameters:
+        ----------
+        None
+        
+        Returns
+        -------
+        value (float): Saldo da loja
+        '''
+        return self.ledger.total(self.clock.now())
+    
+    def settleAll(self, processes=None):
+        '''
+        Metodo que fecha de uma vez todos os alugueis em aberto da loja, no
+        fechamento do dia, calculando os valores em lote. Os valores sao todos
+        calculados antes de qualquer aluguel ser fechado, entao uma falha no
+        calculo nao deixa a loja pela metade.
+
+        Parameters:
+        ----------
+        processes : int, optional
+            Quantidade de processos que dividem os clientes entre si; por default
+            o calculo e feito neste processo. O resultado e o mesmo nos dois casos.
+        
+        Returns
+        -------
+        Dicionario com o valor devido por ID de cliente
+        '''
+        end = self.clock.now()
+
+        rentals = [rent for rentals in self.openRentals.values() for rent in rentals.values()]
+
+        if self.metrics is not None:
+            self.metrics.scanned('settleAll', len(rentals))
+
+        columns = (
+            [rent.clientId for rent in rentals],
+            [toMicroseconds(rent.start) for rent in rentals],
+            [toMicroseconds(end)] * len(rentals),
+            [self.tariff.codes[rent.model] for rent in rentals],
+            [rent.family for rent in rentals]
+        )
+
+        if processes is None:
+            charges = calculateCharges(*columns, self.tariff)
+        else:
+            charges = calculateChargesParallel(*columns, self.tariff, processes)
+
+        self.openRentals = {}
+
+        for rent in rentals:
+            self.closeRental(rent, end)
+
+        return charges
+
+    def calculateTime(self, model, start, end):
+        '''
+        Metodo que calcula o tempo do aluguel.
+
+        Parameters:
+        ----------
+        model : str
+            Modelo de aluguel que pode ser por hora ("hourly"), diário ("daily") ou semanal ("weekly")
+        start : date
+            Data de inicio do aluguel
+        end : date
+            Data de termino
+        
+        Returns
+        -------
+        value (int): Valor que representa a quantidade de tempo do aluguel
+        '''
+        return self.tariff.units(self.tariff.code(model), start, end)
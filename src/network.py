@@ -0,0 +1,314 @@
+from models import Store
+from billing import calculateRevenue, toMicroseconds
+from array import array
+
+def storeRevenue(tariff, starts, ends, models, families):
+    '''
+    Funcao executada nos processos do pool que soma a receita de uma loja por modelo.
+
+    Parameters:
+    ----------
+    tariff : Tariff
+        Tabela de precos da loja
+    starts, ends : array
+        Inicios e entregas dos alugueis encerrados em microssegundos desde 1970
+    models : array
+        Codigos dos modelos dos alugueis
+    families : array
+        Informa se cada aluguel e da promocao familia
+
+    Returns
+    -------
+    Dicionario com a receita por modelo
+    '''
+    revenue = calculateRevenue(starts, ends, models, families, tariff)
+
+    return {tariff.names[code]: value for code, value in revenue.items()}
+
+class StoreNetwork(object):
+    def __init__(self, backend=None, processes=None, clock=None):
+        """
+        Constroi uma rede de lojas com um cadastro de clientes compartilhado.
+
+        Cada loja (filial) guarda as suas bicicletas e alugueis, mas todas usam
+        os mesmos clients e clientIndex da loja de cadastro (directory), entao
+        um cliente cadastrado em qualquer filial e encontrado em todas pelos
+        indices de email, CPF e ID. As filiais ficam em um dicionario pelo nome.
+        Consultas agregadas de toda a rede sao distribuidas por filial em um
+        pool de processos.
+
+        Parameters
+        ----------
+            backend : MemoryBackend, optional
+                Armazenamento persistente do cadastro de clientes
+            processes : int, optional
+                Quantidade de processos do pool, por default a quantidade de CPUs
+            clock : SystemClock, optional
+                Relogio compartilhado pelas filiais, por default o relogio do sistema
+            directory : Store
+                Loja sem bicicletas que guarda o cadastro de clientes
+            stores : dict
+                Filiais indexadas pelo nome
+            executor : ProcessPoolExecutor
+                Pool de processos, criado na primeira consulta agregada
+        """
+
+        self.clock = clock
+        self.directory = Store('Cadastro de clientes', '', backend, clock=clock)
+        self.stores = {}
+        self.processes = processes
+        self.executor = None
+
+    def addStore(self, name, address, backend=None, tariff=None):
+        '''
+        Metodo que adiciona uma filial a rede.
+
+        Parameters:
+        ----------
+        name : str
+            Nome da filial
+        address : str
+            Endereco da filial
+        backend : MemoryBackend, optional
+            Armazenamento persistente da filial
+        tariff : Tariff, optional
+            Tabela de precos da filial, por default a tabela padrao
+
+        Returns
+        -------
+        Filial (Store)
+        '''
+        if name in self.stores:
+            raise TypeError('Loja ja cadastrada.')
+
+        store = self.stores[name] = Store(name, address, backend, tariff, self.directory, self.clock)
+
+        return store
+
+    def store(self, name):
+        '''
+        Metodo que busca uma filial pelo nome.
+
+        Parameters:
+        ----------
+        name : str
+            Nome da filial
+
+        Returns
+        -------
+        Filial (Store)
+        '''
+        store = self.stores.get(name)
+
+        if store is None:
+            raise KeyError('Loja nao cadastrada.')
+
+        return store
+
+    def addClient(self, name, email, cpf):
+        self.directory.addClient(name, email, cpf)
+
+    def addClients(self, rows):
+        return self.directory.addClients(rows)
+
+    def updateClient(self, email, name=None, newEmail=None, cpf=None):
+        self.directory.updateClient(email, name, newEmail, cpf)
+
+    def findClientByEmail(self, email):
+        return self.directory.findClientByEmail(email)
+
+    def removeClient(self, email):
+        '''
+        Metodo que remove um cliente sem alugueis em aberto em nenhuma filial.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+
+        Returns
+        -------
+        None
+        '''
+        client = self.findClientByEmail(email)
+
+        if not client:
+            raise KeyError('Cliente nao cadastrado.')
+
+        if any(store.openRentals.get(client.id) for store in self.stores.values()):
+            raise ValueError('Cliente possui alugueis em aberto.')
+
+        self.directory.removeClient(email)
+
+    def addBike(self, storeName, cor):
+        self.store(storeName).addBike(cor)
+
+    def addRental(self, storeName, model, email, quantity, family=False):
+        self.store(storeName).addRental(model, email, quantity, family)
+
+    def calculateRental(self, storeName, email):
+        return self.store(storeName).calculateRental(email)
+
+    def balance(self, email):
+        '''
+        Metodo que informa o saldo em aberto de um cliente somando todas as filiais.
+
+        Parameters:
+        ----------
+        email : str
+            Email do cliente
+
+        Returns
+        -------
+        value (float): Saldo do cliente
+        '''
+        return sum(store.balance(email) for store in self.stores.values())
+
+    def stats(self):
+        '''
+        Metodo que resume a rede somando os contadores de cada filial.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        Dicionario com os contadores da rede
+        '''
+        totals = {'stores': len(self.stores), 'bikes': 0, 'available': 0, 'rented': 0, 'clients': len(self.directory.clientIndex), 'openRentals': 0}
+
+        for store in self.stores.values():
+            stats = store.stats()
+
+            for key in ('bikes', 'available', 'rented', 'openRentals'):
+                totals[key] += stats[key]
+
+        return totals
+
+    def pool(self):
+        '''
+        Metodo que busca o pool de processos, criando-o na primeira vez.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        ProcessPoolExecutor
+        '''
+        if self.executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.executor = ProcessPoolExecutor(self.processes)
+
+        return self.executor
+
+    def revenueByStore(self, start=None, end=None):
+        '''
+        Metodo que calcula em paralelo a receita de cada filial por modelo, com os
+        alugueis encerrados iniciados em um periodo. Cada filial envia ao pool
+        apenas as colunas compactas (revenueColumns) do trecho pedido do seu
+        historico, e os processos fazem o calculo em lote com calculateRevenue.
+
+        Parameters:
+        ----------
+        start : datetime, optional
+            Inicio do periodo (incluso)
+        end : datetime, optional
+            Fim do periodo (excluso)
+
+        Returns
+        -------
+        Dicionario com a receita por modelo de cada filial
+        '''
+        names = list(self.stores)
+
+        tariffs = [self.stores[name].tariff for name in names]
+
+        columns = [self.revenueColumns(self.stores[name], start, end) for name in names]
+
+        return dict(zip(names, self.pool().map(storeRevenue, tariffs, *zip(*columns))))
+
+    def revenueColumns(self, store, start=None, end=None):
+        '''
+        Metodo que monta as colunas compactas dos alugueis encerrados de uma filial
+        iniciados em um periodo: datas em microssegundos e modelos por codigo, em
+        array.array, que vao ao pool como bytes, sem objetos datetime.
+
+        Parameters:
+        ----------
+        store : Store
+            Filial
+        start : datetime, optional
+            Inicio do periodo (incluso)
+        end : datetime, optional
+            Fim do periodo (excluso)
+
+        Returns
+        -------
+        Tupla (starts, ends, models, families)
+        '''
+        codes = store.tariff.codes
+
+        starts = array('q')
+        ends = array('q')
+        models = array('b')
+        families = array('b')
+
+        for rent in store.history.between(start, end):
+            if rent.end is None:
+                continue
+
+            starts.append(toMicroseconds(rent.start))
+            ends.append(toMicroseconds(rent.end))
+            models.append(codes[rent.model])
+            families.append(rent.family)
+
+        return starts, ends, models, families
+
+    def revenueByModel(self, start=None, end=None):
+        '''
+        Metodo que calcula a receita de toda a rede por modelo.
+
+        Parameters:
+        ----------
+        start : datetime, optional
+            Inicio do periodo (incluso)
+        end : datetime, optional
+            Fim do periodo (excluso)
+
+        Returns
+        -------
+        Dicionario com a receita por modelo
+        '''
+        totals = {}
+
+        for revenue in self.revenueByStore(start, end).values():
+            for model, value in revenue.items():
+                totals[model] = totals.get(model, 0) + value
+
+        return totals
+
+    def close(self):
+        '''
+        Metodo que encerra o pool de processos e fecha o cadastro e as filiais.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        if self.executor is not None:
+            self.executor.shutdown()
+
+            self.executor = None
+
+        for store in self.stores.values():
+            store.close()
+
+        self.directory.close()
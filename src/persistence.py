@@ -0,0 +1,214 @@
+from datetime import datetime
+import sqlite3
+
+class MemoryBackend(object):
+    '''
+    Backend padrao da loja: nao persiste nada e mantem os dados apenas em memoria.
+    Os outros backends sobrescrevem os metodos abaixo, que sao chamados pela Store
+    a cada alteracao.
+    '''
+
+    def load(self, store):
+        pass
+
+    def bikeAdded(self, bike):
+        pass
+
+    def clientAdded(self, client):
+        pass
+
+    def clientUpdated(self, client):
+        pass
+
+    def clientRemoved(self, client):
+        pass
+
+    def rentalOpened(self, rent):
+        pass
+
+    def rentalClosed(self, rent):
+        pass
+
+    def bookingAdded(self, booking):
+        pass
+
+    def bookingRemoved(self, booking):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class SQLiteBackend(MemoryBackend):
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS bikes (id INTEGER PRIMARY KEY, color TEXT NOT NULL, available INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS clients (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL, cpf TEXT NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS rentals (id INTEGER PRIMARY KEY, model TEXT NOT NULL, family INTEGER NOT NULL, start TEXT NOT NULL, end TEXT, bikeId INTEGER NOT NULL, clientId INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS bookings (id INTEGER PRIMARY KEY, model TEXT NOT NULL, family INTEGER NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL, bikeId INTEGER NOT NULL, clientId INTEGER NOT NULL, active INTEGER NOT NULL)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS clientsEmail ON clients (email)',
+        'CREATE INDEX IF NOT EXISTS rentalsBikeId ON rentals (bikeId)',
+        'CREATE INDEX IF NOT EXISTS rentalsClientId ON rentals (clientId)'
+    )
+
+    def __init__(self, path=':memory:', batchSize=1000, wal=False):
+        """
+        Constroi um backend que grava a loja em um banco SQLite.
+
+        Parameters
+        ----------
+            path : str
+                Caminho do arquivo do banco, por default o banco fica em memoria
+            batchSize : int
+                Quantidade de operacoes acumuladas antes de gravar uma transacao
+            wal : bool
+                Ativa o modo WAL, que permite leitores concorrentes durante as escritas
+        """
+
+        if not isinstance(batchSize, int) or batchSize < 1:
+            raise ValueError('O tamanho do lote deve ser um inteiro positivo.')
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.batchSize = batchSize
+        self.pending = []
+
+        if wal:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+
+        with self.connection:
+            for statement in self.SCHEMA:
+                self.connection.execute(statement)
+
+    def load(self, store):
+        '''
+        Metodo que carrega na loja os dados gravados no banco.
+
+        Parameters:
+        ----------
+        store : Store
+            Loja vazia que recebe os dados
+
+        Returns
+        -------
+        None
+        '''
+        cursor = self.connection.cursor()
+
+        bikes = cursor.execute('SELECT id, color, available FROM bikes ORDER BY id')
+
+        bikes = [(id, color, bool(available)) for id, color, available in bikes]
+
+        clients = cursor.execute('SELECT id, name, email, cpf FROM clients ORDER BY id').fetchall()
+
+        rentals = cursor.execute('SELECT id, model, family, start, end, bikeId, clientId FROM rentals ORDER BY id')
+
+        rentals = [
+            (id, model, bool(family), datetime.fromisoformat(start), end and datetime.fromisoformat(end), bikeId, clientId)
+            for id, model, family, start, end, bikeId, clientId in rentals
+        ]
+
+        bookings = cursor.execute('SELECT id, model, family, start, end, bikeId, clientId FROM bookings WHERE active = 1 ORDER BY id')
+
+        bookings = [
+            (id, model, bool(family), datetime.fromisoformat(start), datetime.fromisoformat(end), bikeId, clientId)
+            for id, model, family, start, end, bikeId, clientId in bookings
+        ]
+
+        lastBookingId, = cursor.execute('SELECT MAX(id) FROM bookings').fetchone()
+
+        store.restore(bikes, clients, rentals, bookings, (lastBookingId or 0) + 1)
+
+    def write(self, statement, parameters):
+        '''
+        Metodo que acumula uma escrita e grava o lote quando ele fica cheio.
+
+        Parameters:
+        ----------
+        statement : str
+            Comando SQL
+        parameters : tuple
+            Parametros do comando
+
+        Returns
+        -------
+        None
+        '''
+        self.pending.append((statement, parameters))
+
+        if len(self.pending) >= self.batchSize:
+            self.flush()
+
+    def flush(self):
+        '''
+        Metodo que grava as escritas pendentes em uma unica transacao, agrupando
+        comandos iguais consecutivos em um executemany.
+
+        Parameters:
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        if not self.pending:
+            return
+
+        pending = self.pending
+
+        self.pending = []
+
+        with self.connection:
+            start = 0
+
+            while start < len(pending):
+                statement = pending[start][0]
+
+                end = start
+
+                while end < len(pending) and pending[end][0] == statement:
+                    end += 1
+
+                self.connection.executemany(statement, [parameters for _, parameters in pending[start:end]])
+
+                start = end
+
+    def close(self):
+        self.flush()
+
+        self.connection.close()
+
+    def bikeAdded(self, bike):
+        self.write('INSERT INTO bikes (id, color, available) VALUES (?, ?, ?)', (bike.id, bike.color, int(bike.available)))
+
+    def clientAdded(self, client):
+        self.write('INSERT INTO clients (id, name, email, cpf) VALUES (?, ?, ?, ?)', (client.id, client.name, client.email, client.cpf))
+
+    def clientUpdated(self, client):
+        self.write('UPDATE clients SET name = ?, email = ?, cpf = ? WHERE id = ?', (client.name, client.email, client.cpf, client.id))
+
+    def clientRemoved(self, client):
+        self.write('DELETE FROM clients WHERE id = ?', (client.id,))
+
+    def rentalOpened(self, rent):
+        self.write(
+            'INSERT INTO rentals (id, model, family, start, end, bikeId, clientId) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (rent.id, rent.model, int(rent.family), rent.start.isoformat(), None, rent.bikeId, rent.clientId)
+        )
+
+        self.write('UPDATE bikes SET available = 0 WHERE id = ?', (rent.bikeId,))
+
+    def rentalClosed(self, rent):
+        self.write('UPDATE rentals SET end = ? WHERE id = ?', (rent.end.isoformat(), rent.id))
+
+        self.write('UPDATE bikes SET available = 1 WHERE id = ?', (rent.bikeId,))
+
+    def bookingAdded(self, booking):
+        self.write(
+            'INSERT INTO bookings (id, model, family, start, end, bikeId, clientId, active) VALUES (?, ?, ?, ?, ?, ?, ?, 1)',
+            (booking.id, booking.model, int(booking.family), booking.start.isoformat(), booking.end.isoformat(), booking.bikeId, booking.clientId)
+        )
+
+    def bookingRemoved(self, booking):
+        self.write('UPDATE bookings SET active = 0 WHERE id = ?', (booking.id,))
@@ -0,0 +1,245 @@
+import json
+
+DEFAULT_TARIFF_DEFINITION = {
+    'models': [
+        {'name': 'hourly', 'unitSeconds': 3600, 'rate': 5},
+        {'name': 'daily', 'unitSeconds': 86400, 'rate': 25},
+        {'name': 'weekly', 'unitSeconds': 604800, 'rate': 100}
+    ],
+    'familyFactor': 0.7,
+    'familyMin': 3,
+    'familyMax': 5
+}
+
+def unitsBetween(unitMicroseconds, start, end):
+    '''
+    Funcao que calcula a quantidade de unidades de tempo entre duas datas em
+    aritmetica inteira de microssegundos, arredondando para cima e cobrando no
+    minimo uma unidade.
+
+    A divisao inteira e exata para qualquer duracao. A conta antiga em ponto
+    flutuante, ceil(total_seconds() / unitSeconds), so diverge desta quando a
+    sobra de alguns microssegundos depois da ultima unidade inteira se perde no
+    arredondamento, o que acontece apenas em duracoes de seculos (por exemplo,
+    100000 semanas e 1 microssegundo eram cobradas como 100000 semanas).
+
+    Parameters:
+    ----------
+    unitMicroseconds : int
+        Duracao da unidade em microssegundos
+    start : datetime
+        Data de inicio do aluguel
+    end : datetime
+        Data de termino
+
+    Returns
+    -------
+    value (int): Quantidade de unidades
+    '''
+    delta = end - start
+
+    elapsed = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+    if elapsed < 0:
+        raise ValueError('A data de entrega deve ser depois da data de empréstimo.')
+
+    units = -(-elapsed // unitMicroseconds)
+
+    if units < 1:
+        return 1
+    return units
+
+class Tariff(object):
+    def __init__(self, definition):
+        """
+        Constroi uma tabela de precos compilada a partir da sua definicao em dados.
+
+        Cada modelo recebe um codigo inteiro (a sua posicao na lista), e os
+        valores ficam em tuplas indexadas por esse codigo. Um modelo pode ter
+        'weekendRate', cobrado no lugar de 'rate' quando o aluguel comeca no
+        sabado ou no domingo.
+
+        Parameters
+        ----------
+            definition : dict
+                models: lista de {name, unitSeconds, rate, weekendRate opcional}
+                familyFactor: fator aplicado a soma dos alugueis da promocao familia
+                familyMin: minimo de alugueis da promocao familia
+                familyMax: maximo de alugueis da promocao familia
+        """
+
+        models = definition['models']
+
+        if not models:
+            raise ValueError('A tabela de precos deve ter ao menos um modelo.')
+
+        self.names = tuple(model['name'] for model in models)
+        self.codes = {name: code for code, name in enumerate(self.names)}
+        self.unitSeconds = tuple(model['unitSeconds'] for model in models)
+        self.rates = tuple(model['rate'] for model in models)
+        self.weekendRates = tuple(model.get('weekendRate', model['rate']) for model in models)
+        self.hasWeekendRates = self.weekendRates != self.rates
+        self.familyFactor = definition['familyFactor']
+        self.familyMin = definition['familyMin']
+        self.familyMax = definition['familyMax']
+
+        if len(self.codes) != len(self.names):
+            raise ValueError('Modelos de aluguel repetidos na tabela de precos.')
+
+        if any(not isinstance(seconds, int) or seconds < 1 for seconds in self.unitSeconds):
+            raise ValueError('A unidade de tempo deve ser um inteiro positivo de segundos.')
+
+        self.unitMicroseconds = tuple(seconds * 1000000 for seconds in self.unitSeconds)
+
+    def code(self, model):
+        '''
+        Metodo que busca o codigo inteiro de um modelo de aluguel.
+
+        Parameters:
+        ----------
+        model : str
+            Nome do modelo
+
+        Returns
+        -------
+        value (int): Codigo do modelo
+        '''
+        code = self.codes.get(model)
+
+        if code is None:
+            raise ValueError('Tipo de aluguel invalido.')
+
+        return code
+
+    def units(self, code, start, end):
+        '''
+        Metodo que calcula a quantidade de unidades de tempo de um aluguel,
+        arredondando para cima e cobrando no minimo uma unidade, com unitsBetween.
+
+        Parameters:
+        ----------
+        code : int
+            Codigo do modelo
+        start : datetime
+            Data de inicio do aluguel
+        end : datetime
+            Data de termino
+
+        Returns
+        -------
+        value (int): Quantidade de unidades
+        '''
+        return unitsBetween(self.unitMicroseconds[code], start, end)
+
+    def rate(self, code, start):
+        '''
+        Metodo que busca o preco da unidade de um modelo para um aluguel.
+
+        Parameters:
+        ----------
+        code : int
+            Codigo do modelo
+        start : datetime
+            Data de inicio do aluguel
+
+        Returns
+        -------
+        Preco da unidade
+        '''
+        if self.hasWeekendRates and start.weekday() >= 5:
+            return self.weekendRates[code]
+
+        return self.rates[code]
+
+    def quote(self, rentals, end):
+        '''
+        Metodo que calcula o valor de um conjunto de alugueis encerrados em uma data,
+        sem alterar os alugueis. Como a data de termino e a mesma para todos, as
+        unidades de cada (modelo, inicio) sao calculadas uma unica vez por chamada,
+        entao os alugueis de um grupo familia compartilham o calculo.
+
+        Parameters:
+        ----------
+        rentals : iterable
+            Alugueis (Rental) a serem cobrados
+        end : datetime
+            Data de termino usada para todos os alugueis
+
+        Returns
+        -------
+        value (float): Valor dos alugueis
+        '''
+        codes = self.codes
+
+        units = {}
+
+        computed = {}
+
+        for rent in rentals:
+            code = codes[rent.model]
+
+            key = (rent.family, self.rate(code, rent.start))
+
+            count = computed.get((code, rent.start))
+
+            if count is None:
+                count = computed[(code, rent.start)] = self.units(code, rent.start, end)
+
+            units[key] = units.get(key, 0) + count
+
+        return self.total(units)
+
+    def total(self, units):
+        '''
+        Metodo que calcula o valor de unidades de tempo agrupadas por preco. As
+        unidades sao inteiras e os grupos sao somados sempre na mesma ordem, entao
+        o mesmo conjunto de unidades da sempre o mesmo valor, bit a bit, seja ele
+        montado de uma vez (quote) ou incrementalmente (Ledger).
+
+        Parameters:
+        ----------
+        units : dict
+            Quantidade de unidades por (family, rate)
+
+        Returns
+        -------
+        value (float): Valor das unidades
+        '''
+        value = 0
+
+        valueForFamily = 0
+
+        for (family, rate), count in sorted(units.items()):
+            if family:
+                valueForFamily += count * rate
+            else:
+                value += count * rate
+
+        return value + (valueForFamily * self.familyFactor)
+
+compiledTariffs = {}
+
+def compileTariff(definition):
+    '''
+    Funcao que compila uma definicao de precos, reaproveitando a compilacao
+    anterior de uma definicao igual.
+
+    Parameters:
+    ----------
+    definition : dict
+        Definicao da tabela de precos
+
+    Returns
+    -------
+    Tariff compilada
+    '''
+    key = json.dumps(definition, sort_keys=True)
+
+    tariff = compiledTariffs.get(key)
+
+    if tariff is None:
+        tariff = compiledTariffs[key] = Tariff(definition)
+
+    return tariff
+
+DEFAULT_TARIFF = compileTariff(DEFAULT_TARIFF_DEFINITION)
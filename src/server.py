@@ -0,0 +1,138 @@
+from models import Store
+from persistence import SQLiteBackend
+import argparse
+import asyncio
+import json
+
+class StoreServer(object):
+    def __init__(self, store):
+        """
+        Constroi um servidor asyncio que atende varios clientes em uma unica loja.
+
+        O protocolo e de uma linha JSON por requisicao, no formato
+        {"op": "addRental", "args": {"model": "hourly", "email": "...", "quantity": 1}},
+        e uma linha JSON por resposta, {"ok": true, "result": ...} ou
+        {"ok": false, "error": "mensagem"}. Como todas as operacoes rodam no loop
+        de eventos, a loja nunca e acessada por duas requisicoes ao mesmo tempo.
+
+        Parameters
+        ----------
+            store : Store
+                Loja atendida pelo servidor
+        """
+
+        self.store = store
+        self.operations = {
+            'addBike': lambda color: self.store.addBike(color),
+            'addClient': lambda name, email, cpf: self.store.addClient(name, email, cpf),
+            'addRental': lambda model, email, quantity, family=False: self.store.addRental(model, email, quantity, family),
+            'calculateRental': lambda email: self.store.calculateRental(email),
+            'returnBikes': lambda email, bikeIds: self.store.returnBikes(email, bikeIds),
+            'returnRental': lambda rentalId: self.store.returnRental(rentalId),
+            'quote': lambda email: self.store.quote(email),
+            'balance': lambda email: self.store.balance(email),
+            'totalBalance': lambda: self.store.totalBalance(),
+            'metrics': lambda: None if self.store.metrics is None else self.store.metrics.snapshot(),
+            'listBikes': lambda page=1, pageSize=100, available=None, color=None: [
+                bike.asDict() for bike in self.store.listBikes(page, pageSize, available, color)
+            ]
+        }
+
+    def handle(self, line):
+        '''
+        Metodo que executa uma requisicao e monta a resposta.
+
+        Parameters:
+        ----------
+        line : bytes
+            Linha JSON da requisicao
+
+        Returns
+        -------
+        Dicionario com a resposta
+        '''
+        try:
+            request = json.loads(line)
+
+            operation = self.operations[request['op']]
+
+            return {'ok': True, 'result': operation(**request.get('args', {}))}
+        except Exception as error:
+            message = error.args[0] if error.args else type(error).__name__
+
+            return {'ok': False, 'error': str(message)}
+
+    async def serve(self, reader, writer):
+        '''
+        Metodo que atende uma conexao ate o cliente desconectar.
+
+        Parameters:
+        ----------
+        reader : asyncio.StreamReader
+            Leitura da conexao
+        writer : asyncio.StreamWriter
+            Escrita da conexao
+
+        Returns
+        -------
+        None
+        '''
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                writer.write(json.dumps(self.handle(line)).encode() + b'\n')
+
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8000):
+        '''
+        Metodo que abre o socket do servidor.
+
+        Parameters:
+        ----------
+        host : str
+            Endereco de escuta
+        port : int
+            Porta de escuta, 0 escolhe uma porta livre
+
+        Returns
+        -------
+        asyncio.Server
+        '''
+        return await asyncio.start_server(self.serve, host, port)
+
+async def main(arguments):
+    backend = SQLiteBackend(arguments.db, wal=True) if arguments.db else None
+
+    store = Store(arguments.name, arguments.address, backend)
+
+    server = await StoreServer(store).start(arguments.host, arguments.port)
+
+    print(f'Servidor em {arguments.host}:{server.sockets[0].getsockname()[1]}')
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor da loja de bicicletas')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--name', default='Loja de bikes')
+    parser.add_argument('--address', default='')
+    parser.add_argument('--db', help='arquivo SQLite, por default a loja fica em memoria')
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
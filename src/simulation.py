@@ -0,0 +1,174 @@
+from models import Store
+from clock import ManualClock
+from pricing import DEFAULT_TARIFF
+from datetime import datetime, timedelta
+import argparse
+import heapq
+import json
+import random
+import time
+
+MEAN_DURATIONS = {'hourly': 3 * 3600, 'daily': 2 * 86400, 'weekly': 9 * 86400}
+
+class Simulator(object):
+    def __init__(self, clients=1000, bikes=200, days=30, arrivalsPerHour=10, seed=42, familyShare=0.1, modelWeights=(0.6, 0.3, 0.1), start=None):
+        """
+        Constroi uma simulacao de eventos discretos de uma loja com relogio simulado.
+
+        Chegadas de clientes seguem um processo de Poisson; cada chegada tenta
+        alugar bicicletas e, se conseguir, agenda a sua devolucao depois de uma
+        duracao exponencial que depende do modelo. Os eventos sao tirados de um
+        heap em ordem de tempo e o relogio da loja salta direto para cada um,
+        entao dias de movimento rodam tao rapido quanto a CPU permite.
+
+        Parameters
+        ----------
+            clients : int, optional
+                Quantidade de clientes cadastrados
+            bikes : int, optional
+                Quantidade de bicicletas
+            days : int, optional
+                Dias simulados
+            arrivalsPerHour : float, optional
+                Media de chegadas por hora
+            seed : int, optional
+                Semente do gerador
+            familyShare : float, optional
+                Fracao das chegadas que pedem a promocao familia
+            modelWeights : tuple, optional
+                Pesos dos modelos da tabela padrao (hora, dia, semana)
+            start : datetime, optional
+                Inicio da simulacao, por default 2021-03-01
+        """
+
+        self.generator = random.Random(seed)
+        self.days = days
+        self.arrivalRate = arrivalsPerHour / 3600
+        self.familyShare = familyShare
+        self.modelWeights = modelWeights
+        self.start = start if start is not None else datetime(2021, 3, 1)
+        self.clock = ManualClock(self.start)
+        self.store = Store('Loja de bikes', 'Rua Um, 123', clock=self.clock)
+        self.store.addClients((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(clients))
+        self.store.addBikes(['Branco'] * bikes)
+        self.idle = list(range(clients))
+        self.events = []
+        self.sequence = 0
+
+    def schedule(self, moment, kind, data=None):
+        self.sequence += 1
+
+        heapq.heappush(self.events, (moment, self.sequence, kind, data))
+
+    def arrive(self, report):
+        generator = self.generator
+
+        if not self.idle:
+            report['lostArrivals'] += 1
+            return
+
+        family = generator.random() < self.familyShare
+
+        quantity = generator.randint(DEFAULT_TARIFF.familyMin, DEFAULT_TARIFF.familyMax) if family else 1
+
+        model = generator.choices(DEFAULT_TARIFF.names, self.modelWeights)[0]
+
+        index = generator.randrange(len(self.idle))
+
+        client = self.idle[index]
+
+        try:
+            self.store.addRental(model, f'email{client}@mail.com', quantity, family)
+        except KeyError:
+            report['lostArrivals'] += 1
+            return
+
+        self.idle[index] = self.idle[-1]
+        self.idle.pop()
+
+        report['rentals'] += quantity
+
+        self.schedule(self.clock.now() + timedelta(seconds=generator.expovariate(1 / MEAN_DURATIONS[model])), 'return', client)
+
+    def giveBack(self, client, report):
+        report['revenue'] += self.store.calculateRental(f'email{client}@mail.com')
+        report['returns'] += 1
+
+        self.idle.append(client)
+
+    def run(self):
+        '''
+        Metodo que executa a simulacao ate o fim do periodo e fecha os alugueis
+        que ficaram em aberto.
+
+        Returns
+        -------
+        Dicionario com a vazao, a utilizacao da frota e a receita
+        '''
+        end = self.start + timedelta(days=self.days)
+
+        report = {'rentals': 0, 'returns': 0, 'lostArrivals': 0, 'revenue': 0}
+
+        bikes = len(self.store.bikes)
+
+        busy = 0.0
+
+        last = self.start
+
+        self.schedule(self.start + timedelta(seconds=self.generator.expovariate(self.arrivalRate)), 'arrival')
+
+        wall = time.perf_counter()
+
+        events = 0
+
+        while self.events and self.events[0][0] < end:
+            moment, sequence, kind, data = heapq.heappop(self.events)
+
+            busy += self.store.countBikes(available=False) * (moment - last).total_seconds()
+
+            last = moment
+
+            self.clock.set(moment)
+
+            if kind == 'arrival':
+                self.arrive(report)
+
+                self.schedule(moment + timedelta(seconds=self.generator.expovariate(self.arrivalRate)), 'arrival')
+            else:
+                self.giveBack(data, report)
+
+            events += 1
+
+        busy += self.store.countBikes(available=False) * (end - last).total_seconds()
+
+        self.clock.set(end)
+
+        openAtEnd = self.store.settleAll()
+
+        wall = time.perf_counter() - wall
+
+        report['revenue'] += sum(openAtEnd.values())
+        report['settledAtEnd'] = len(openAtEnd)
+        report['events'] = events
+        report['simulatedDays'] = self.days
+        report['wallSeconds'] = wall
+        report['eventsPerSecond'] = events / wall if wall else 0.0
+        report['rentalsPerDay'] = report['rentals'] / self.days if self.days else 0.0
+        report['utilization'] = busy / (bikes * (end - self.start).total_seconds()) if bikes and self.days else 0.0
+        report['revenueByModel'] = self.store.history.revenueByModel(self.store.tariff)
+
+        return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulacao de eventos discretos da loja com relogio simulado')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--bikes', type=int, default=200)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--arrivals', type=float, default=10, help='media de chegadas por hora')
+    parser.add_argument('--seed', type=int, default=42)
+
+    arguments = parser.parse_args()
+
+    simulator = Simulator(arguments.clients, arguments.bikes, arguments.days, arguments.arrivals, arguments.seed)
+
+    print(json.dumps(simulator.run(), indent=2))
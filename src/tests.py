@@ -1,5 +1,39 @@
 import unittest
-from models import Client, Store
+from models import Client, Store, Bike, Rental, Booking, SortedIds
+from validation import isValidEmail, isValidCpf, validateMany
+from importers import importClients, importBikes
+from persistence import SQLiteBackend
+from eventlog import EventLogBackend
+from concurrency import ConcurrentStore
+from server import StoreServer
+from billing import calculateCharges, calculateChargesParallel, toMicroseconds
+from pricing import DEFAULT_TARIFF, DEFAULT_TARIFF_DEFINITION, compileTariff, unitsBetween
+from accounting import Ledger
+from history import RentalHistory, sumRevenue
+from network import StoreNetwork
+from booking import BookingSchedule
+from metrics import Metrics
+from benchmarks import Workload, SCENARIOS, runScenario
+from clock import ManualClock
+from simulation import Simulator
+from contextlib import redirect_stdout, redirect_stderr
+import bikerent
+import subprocess
+import sys
+from unittest import mock
+from datetime import timedelta
+import billing
+import pricing
+import math
+from bisect import insort
+import random
+import asyncio
+import json
+import io
+import threading
+import time
+import tempfile
+import os
 from datetime import datetime
 
 class ClientTests(unittest.TestCase):
@@ -39,6 +73,111 @@ class ClientTests(unittest.TestCase):
         
         self.assertEqual(error.exception.args[0], 'CPF invalido.')
 
+class ValidationTests(unittest.TestCase):
+    def test_email(self):
+        self.assertTrue(isValidEmail('email1@mail.com'))
+        self.assertFalse(isValidEmail('email1mail.com'))
+        self.assertFalse(isValidEmail('email1@mail.c'))
+
+    def test_cpf_format(self):
+        self.assertTrue(isValidCpf('11122233344'))
+        self.assertTrue(isValidCpf('111.222.333-44'))
+        self.assertTrue(isValidCpf('111222.333-44'))
+        self.assertFalse(isValidCpf('111.222.333.44'))
+        self.assertFalse(isValidCpf('11122233vcb'))
+        self.assertFalse(isValidCpf('1112223334'))
+
+    def test_cpf_check_digits(self):
+        self.assertTrue(isValidCpf('529.982.247-25', checkDigits=True))
+        self.assertFalse(isValidCpf('529.982.247-26', checkDigits=True))
+        self.assertFalse(isValidCpf('11111111111', checkDigits=True))
+
+    def test_validate_many(self):
+        rows = [
+            ('Nome1', 'email1@mail.com', '11122233344'),
+            ('Nome2', 'email2mail.com', '11122233344'),
+            (123, 'email3@mail.com', '11122233344'),
+            ('Nome4', 'email4@mail.com', '11122233vcb'),
+            ('Nome5', 'email5@mail.com', '52998224725')
+        ]
+
+        self.assertEqual(validateMany(rows), [
+            (1, 'Email invalido.'),
+            (2, 'O nome do cliente deve ser string.'),
+            (3, 'CPF invalido.')
+        ])
+        self.assertEqual(validateMany(rows, checkDigits=True)[-1], (3, 'CPF invalido.'))
+        self.assertEqual(validateMany(rows, checkDigits=True)[0], (0, 'CPF invalido.'))
+
+    def test_validate_many_reports_malformed_rows(self):
+        rows = [('Nome1', 'email1'), None, ('Nome3', 'email3@mail.com', '11122233344')]
+
+        self.assertEqual(validateMany(rows), [(0, 'Linha invalida.'), (1, 'Linha invalida.')])
+
+class RecordTests(unittest.TestCase):
+    def test_bike_read_api(self):
+        bike = Bike(1, 'Branco')
+
+        self.assertEqual(bike['id'], 1)
+        self.assertEqual(bike['color'], 'Branco')
+        self.assertTrue(bike['available'])
+        self.assertEqual(bike.asDict(), {'id': 1, 'color': 'Branco', 'available': True})
+
+        bike['available'] = False
+
+        self.assertFalse(bike.available)
+
+    def test_rental_read_api(self):
+        start = datetime(2021, 3, 1)
+
+        rent = Rental(1, 'daily', True, start, None, 2, 3)
+
+        self.assertEqual(rent['model'], 'daily')
+        self.assertEqual(rent['start'], start)
+        self.assertEqual(rent.get('end'), None)
+        self.assertEqual(list(rent.keys()), ['id', 'model', 'family', 'start', 'end', 'bikeId', 'clientId'])
+
+        with self.assertRaises(KeyError):
+            rent['color']
+
+    def test_records_have_no_dict(self):
+        self.assertFalse(hasattr(Bike(1, 'Branco'), '__dict__'))
+        self.assertFalse(hasattr(Rental(1, 'daily', False, None, None, 1, 1), '__dict__'))
+        self.assertFalse(hasattr(Client(1, 'Nome1', 'email1@mail.com', '11122233344'), '__dict__'))
+
+class SortedIdsTests(unittest.TestCase):
+    def test_matches_sorted_list(self):
+        generator = random.Random(5)
+
+        ids = SortedIds()
+
+        ids.LOAD = 4
+
+        expected = []
+
+        for i in range(3000):
+            if expected and generator.random() < 0.45:
+                id = generator.choice(expected)
+
+                ids.discard(id)
+                expected.remove(id)
+            else:
+                id = generator.randrange(10 ** 6)
+
+                if id in expected:
+                    continue
+
+                ids.add(id)
+                insort(expected, id)
+
+            start = generator.randrange(len(expected) + 2)
+
+            self.assertEqual(ids.slice(start, start + 5), expected[start:start + 5])
+
+        self.assertEqual(list(ids), expected)
+        self.assertEqual(len(ids), len(expected))
+        self.assertTrue(all(len(block) <= 2 * ids.LOAD for block in ids.blocks))
+
 class StoreTests(unittest.TestCase):
     def setUp(self):
         self.store = Store('Loja de bikes', 'Rua Um, 123')
@@ -247,7 +386,241 @@ class StoreTests(unittest.TestCase):
             bikes = self.store.getAvailableBikes(i + 1)
 
             self.assertEqual(len(bikes), i + 1)
-    
+
+    def test_available_count(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        for i in range(5):
+            self.store.addBike('Branco')
+
+        self.assertEqual(self.store.availableCount(), 5)
+
+        self.store.addRental('daily', 'email1@mail.com', 3)
+
+        self.assertEqual(self.store.availableCount(), 2)
+        self.assertEqual([bike['id'] for bike in self.store.getAvailableBikes(5)], [4, 5])
+
+        self.store.calculateRental('email1@mail.com')
+
+        self.assertEqual(self.store.availableCount(), 5)
+        self.assertEqual(len(self.store.getAvailableBikes(5)), 5)
+
+    def test_list_bikes(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.store.addBikes(['Branco', 'Preto', 'Branco', 'Azul', 'Branco'])
+
+        self.store.addRental('daily', 'email1@mail.com', 2)
+
+        self.assertEqual([bike.id for bike in self.store.iterBikes()], [1, 2, 3, 4, 5])
+        self.assertEqual([bike.id for bike in self.store.iterBikes(available=True)], [3, 4, 5])
+        self.assertEqual([bike.id for bike in self.store.iterBikes(available=False)], [1, 2])
+        self.assertEqual([bike.id for bike in self.store.iterBikes(available=True, color='Branco')], [3, 5])
+        self.assertEqual([bike.id for bike in self.store.listBikes(1, 2)], [1, 2])
+        self.assertEqual([bike.id for bike in self.store.listBikes(3, 2)], [5])
+        self.assertEqual(self.store.listBikes(4, 2), [])
+        self.assertEqual([bike.id for bike in self.store.listBikes(2, 1, color='Branco')], [3])
+
+        with self.assertRaises(ValueError) as error:
+            self.store.listBikes(0)
+
+        self.assertEqual(error.exception.args[0], 'A pagina e o tamanho da pagina devem ser inteiros positivos.')
+
+    def test_fleet_indexes_match_scan(self):
+        generator = random.Random(3)
+
+        self.store.addClients((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(20))
+
+        self.store.addBikes([generator.choice(['Branco', 'Preto', 'Azul']) for i in range(60)])
+
+        for i in range(200):
+            email = f'email{generator.randrange(20)}@mail.com'
+
+            try:
+                if generator.random() < 0.6:
+                    self.store.addRental('hourly', email, generator.randint(1, 3))
+                else:
+                    self.store.calculateRental(email)
+            except KeyError:
+                pass
+
+            available = generator.choice([None, True, False])
+            color = generator.choice([None, 'Branco', 'Preto', 'Azul', 'Verde'])
+
+            expected = [bike.id for bike in self.store.bikes if (available is None or bike.available == available) and color in (None, bike.color)]
+
+            self.assertEqual([bike.id for bike in self.store.iterBikes(available, color)], expected)
+            self.assertEqual([bike.id for bike in self.store.listBikes(2, 7, available, color)], expected[7:14])
+
+    def test_fleet_stats(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.store.addBike('Vermelho')
+        self.store.addBikes(['Branco', 'Vermelho', 'Branco'])
+
+        self.store.addRental('hourly', 'email1@mail.com', 3)
+
+        self.assertEqual(self.store.countBikes(), 4)
+        self.assertEqual(self.store.countBikes(available=True), 1)
+        self.assertEqual(self.store.countBikes(available=False, color='Vermelho'), 2)
+        self.assertEqual(self.store.countBikes(available=True, color='Branco'), 1)
+        self.assertEqual(self.store.countBikes(color='Azul'), 0)
+        self.assertEqual([bike.id for bike in self.store.iterBikes(available=False)], [1, 2, 3])
+        self.assertEqual(self.store.stats(), {
+            'bikes': 4,
+            'available': 1,
+            'rented': 3,
+            'byColor': {
+                'Vermelho': {'bikes': 2, 'available': 0, 'rented': 2},
+                'Branco': {'bikes': 2, 'available': 1, 'rented': 1}
+            },
+            'clients': 1,
+            'openRentals': 3
+        })
+
+        self.store.calculateRental('email1@mail.com')
+
+        self.assertEqual(self.store.countBikes(available=True, color='Vermelho'), 2)
+        self.assertEqual(self.store.stats()['rented'], 0)
+        self.assertEqual(self.store.stats()['openRentals'], 0)
+
+    def test_archive_closed_rentals(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.store.addClient('Nome2', 'email2@mail.com', '11122233355')
+
+        self.store.addBikes(['Branco'] * 5)
+
+        self.store.addRental('hourly', 'email1@mail.com', 2)
+        self.store.addRental('daily', 'email2@mail.com', 1)
+
+        self.store.calculateRental('email1@mail.com')
+
+        self.assertEqual(self.store.archive(before=datetime(2000, 1, 1)), 0)
+        self.assertEqual(self.store.archive(), 2)
+        self.assertEqual([rent.id for rent in self.store.rentals], [3])
+        self.assertEqual([rent.id for rent in self.store.history], [1, 2, 3])
+        self.assertEqual([rent.id for rent in self.store.history.forClient(1)], [1, 2])
+        self.assertEqual(self.store.calculateRental('email2@mail.com'), 25)
+
+    def test_book_and_pick_up(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.store.addClient('Nome2', 'email2@mail.com', '11122233355')
+
+        self.store.addBikes(['Branco'] * 3)
+
+        now = datetime.today()
+
+        ids = self.store.bookBikes('daily', 'email1@mail.com', 2, now + timedelta(minutes=30), now + timedelta(days=1))
+
+        self.assertEqual([self.store.schedule.bookings[id].bikeId for id in ids], [1, 2])
+
+        with self.assertRaises(KeyError) as error:
+            self.store.bookBikes('daily', 'email2@mail.com', 2, now + timedelta(hours=5), now + timedelta(hours=6))
+
+        self.assertEqual(error.exception.args[0], 'Bicicleta indisponivel.')
+
+        with self.assertRaises(KeyError) as error:
+            self.store.addRental('hourly', 'email2@mail.com', 2)
+
+        self.assertEqual(error.exception.args[0], 'Bicicleta indisponivel.')
+
+        self.store.addRental('hourly', 'email2@mail.com', 1)
+
+        self.assertEqual(next(iter(self.store.openRentals[2].values())).bikeId, 3)
+
+        self.assertEqual(self.store.pickUpBooking(ids[0]), 1)
+
+        self.assertEqual([(rent.bikeId, rent.model) for rent in self.store.openRentals[1].values()], [(1, 'daily')])
+        self.assertEqual(len(self.store.schedule), 1)
+
+        self.store.cancelBooking(ids[1])
+
+        self.assertEqual(len(self.store.schedule), 0)
+
+        with self.assertRaises(KeyError) as error:
+            self.store.pickUpBooking(ids[1])
+
+        self.assertEqual(error.exception.args[0], 'Reserva nao cadastrada.')
+
+    def test_pick_up_swaps_bike_still_rented(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.store.addClient('Nome2', 'email2@mail.com', '11122233355')
+
+        self.store.addBikes(['Branco'] * 2)
+
+        self.store.addRental('hourly', 'email2@mail.com', 1)
+
+        now = datetime.today()
+
+        id, = self.store.bookBikes('hourly', 'email1@mail.com', 1, now, now + timedelta(hours=2))
+
+        self.assertEqual(self.store.schedule.bookings[id].bikeId, 1)
+        self.assertEqual(self.store.pickUpBooking(id), 2)
+
+        id, = self.store.bookBikes('hourly', 'email1@mail.com', 1, now + timedelta(hours=3), now + timedelta(hours=4))
+
+        with self.assertRaises(KeyError) as error:
+            self.store.pickUpBooking(id)
+
+        self.assertEqual(error.exception.args[0], 'Bicicleta indisponivel.')
+        self.assertIn(id, self.store.schedule.bookings)
+
+    def test_book_invalid_window(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.store.addBikes(['Branco'] * 5)
+
+        now = datetime.today()
+
+        with self.assertRaises(ValueError) as error:
+            self.store.bookBikes('daily', 'email1@mail.com', 1, now, now)
+
+        self.assertEqual(error.exception.args[0], 'A data de entrega deve ser depois da data de empréstimo.')
+
+        with self.assertRaises(ValueError) as error:
+            self.store.bookBikes('daily', 'email1@mail.com', 2, now, now + timedelta(days=1), True)
+
+        self.assertEqual(error.exception.args[0], 'Aluguel para familia deve ser de 3 a 5 emprestimos.')
+
+        with self.assertRaises(KeyError) as error:
+            self.store.bookBikes('daily', 'email2@mail.com', 1, now, now + timedelta(days=1))
+
+        self.assertEqual(error.exception.args[0], 'Cliente nao cadastrado.')
+
+    def test_show_bikes_formats(self):
+        self.store.addBikes(['Branco', 'Preto', 'Branco'])
+
+        output = io.StringIO()
+
+        self.store.showBikes(format='plain', color='Branco', file=output)
+
+        self.assertEqual(output.getvalue(), 'id\tcolor\tavailable\n1\tBranco\tTrue\n3\tBranco\tTrue\n')
+
+        output = io.StringIO()
+
+        self.store.showBikes(page=2, pageSize=2, format='jsonl', file=output)
+
+        self.assertEqual([json.loads(line) for line in output.getvalue().splitlines()], [{'id': 3, 'color': 'Branco', 'available': True}])
+
+        output = io.StringIO()
+
+        self.store.showBikes(page=1, pageSize=1, file=output)
+
+        self.assertIn('Branco', output.getvalue())
+        self.assertNotIn('Preto', output.getvalue())
+
+        output = io.StringIO()
+
+        with mock.patch.object(self.store, 'listBikes', side_effect=AssertionError), mock.patch.object(self.store, 'iterBikes', side_effect=AssertionError):
+            self.store.showBikes(format='plain', file=output, bikes=self.store.bikes[1:2])
+
+        self.assertEqual(output.getvalue(), 'id\tcolor\tavailable\n2\tPreto\tTrue\n')
+
+        with self.assertRaises(ValueError) as error:
+            self.store.showBikes(format='csv')
+
+        self.assertEqual(error.exception.args[0], 'Formato de saida invalido.')
+
     def test_find_client_by_email(self):
         self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
 
@@ -257,7 +630,123 @@ class StoreTests(unittest.TestCase):
         self.assertEqual(client.email, "email1@mail.com")
         self.assertEqual(client.cpf, "11122233344")
         self.assertEqual(client.id, 1)
-    
+
+    def test_find_client_by_cpf_and_id(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '111.222.333-44')
+
+        self.assertEqual(self.store.findClientByCpf('11122233344').email, 'email1@mail.com')
+        self.assertEqual(self.store.findClientByCpf('111.222.333-44').email, 'email1@mail.com')
+        self.assertEqual(self.store.findClientById(1).email, 'email1@mail.com')
+        self.assertEqual(self.store.findClientById(2), None)
+
+    def test_cpf_already_added(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        with self.assertRaises(TypeError) as error:
+            self.store.addClient('Nome2', 'email2@mail.com', '111.222.333-44')
+
+        self.assertEqual(error.exception.args[0], 'CPF ja cadastrado.')
+        self.assertEqual(len(self.store.clients), 1)
+
+    def test_add_clients(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        rejected = self.store.addClients([
+            ('Nome2', 'email2@mail.com', '22233344455'),
+            ('Nome3', 'email1@mail.com', '33344455566'),
+            ('Nome4', 'email4@mail.com', '222.333.444-55'),
+            ('Nome5', 'email5mail.com', '55566677788'),
+            ('Nome6', 'email6@mail.com'),
+            ('Nome7', 'email7@mail.com', '77788899900')
+        ])
+
+        self.assertEqual(rejected, [
+            (1, 'Cliente ja cadastrado.'),
+            (2, 'CPF ja cadastrado.'),
+            (3, 'Email invalido.'),
+            (4, 'Linha invalida.')
+        ])
+        self.assertEqual([client.id for client in self.store.clients], [1, 2, 3])
+        self.assertEqual(self.store.findClientByEmail('email7@mail.com').id, 3)
+
+        self.store.addClient('Nome8', 'email8@mail.com', '88899900011')
+
+        self.assertEqual(self.store.findClientByEmail('email8@mail.com').id, 4)
+
+    def test_add_bikes(self):
+        self.store.addBike('Branco')
+
+        self.store.addBikes(['Azul', 'Preto'])
+
+        self.assertEqual([bike.id for bike in self.store.bikes], [1, 2, 3])
+        self.assertEqual(self.store.bikes[2].color, 'Preto')
+        self.assertEqual(self.store.availableCount(), 3)
+
+    def test_import_from_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            clientsPath = os.path.join(directory, 'clients.csv')
+
+            with open(clientsPath, 'w') as file:
+                file.write('name,email,cpf\nNome1,email1@mail.com,11122233344\nNome2,email2mail.com,22233344455\n')
+
+            bikesPath = os.path.join(directory, 'bikes.jsonl')
+
+            with open(bikesPath, 'w') as file:
+                file.write('{"color": "Branco"}\n{"cor": "Verde"}\n{"color": "Azul"}\nnao e json\n')
+
+            self.assertEqual(importClients(self.store, clientsPath), [(1, 'Email invalido.')])
+
+            self.assertEqual(importBikes(self.store, bikesPath), [(1, 'Linha invalida.'), (3, 'Linha invalida.')])
+
+        self.assertEqual(len(self.store.clients), 1)
+        self.assertEqual([bike.color for bike in self.store.bikes], ['Branco', 'Azul'])
+
+    def test_update_client(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.store.addClient('Nome2', 'email2@mail.com', '55566677788')
+
+        self.store.updateClient('email1@mail.com', name='Nome3', newEmail='email3@mail.com', cpf='99988877766')
+
+        client = self.store.findClientByEmail('email3@mail.com')
+
+        self.assertEqual(client.name, 'Nome3')
+        self.assertEqual(self.store.findClientByEmail('email1@mail.com'), None)
+        self.assertEqual(self.store.findClientByCpf('11122233344'), None)
+        self.assertIs(self.store.findClientByCpf('99988877766'), client)
+
+        with self.assertRaises(TypeError) as error:
+            self.store.updateClient('email3@mail.com', newEmail='email2@mail.com')
+
+        self.assertEqual(error.exception.args[0], 'Cliente ja cadastrado.')
+        self.assertIs(self.store.findClientByEmail('email3@mail.com'), client)
+
+    def test_remove_client(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.store.addClient('Nome2', 'email2@mail.com', '55566677788')
+
+        self.store.removeClient('email1@mail.com')
+
+        self.assertEqual(self.store.findClientByEmail('email1@mail.com'), None)
+        self.assertEqual(self.store.findClientByCpf('11122233344'), None)
+        self.assertEqual(self.store.findClientById(1), None)
+        self.assertEqual(len(self.store.clients), 1)
+
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.assertEqual(self.store.findClientByEmail('email1@mail.com').id, 3)
+
+    def test_remove_client_with_open_rentals(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.store.addBike('Branco')
+
+        self.store.addRental('hourly', 'email1@mail.com', 1)
+
+        with self.assertRaises(ValueError) as error:
+            self.store.removeClient('email1@mail.com')
+
+        self.assertEqual(error.exception.args[0], 'Cliente possui alugueis em aberto.')
+
     def test_calculate_hourly_rental(self):
         self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
 
@@ -354,7 +843,39 @@ class StoreTests(unittest.TestCase):
         self.store.addRental('hourly', 'email1@mail.com', 5)
 
         self.assertEqual(self.store.calculateRental('email1@mail.com'), (25 * 3) + (100 * 4) + (5 * 5))
-    
+
+    def test_calculate_rental_releases_only_open_rentals(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.store.addClient('Nome2', 'email2@mail.com', '55566677788')
+
+        self.store.addBike('Branco')
+
+        self.store.addRental('daily', 'email1@mail.com', 1)
+        self.store.calculateRental('email1@mail.com')
+
+        self.store.addRental('daily', 'email2@mail.com', 1)
+
+        self.store.addBike('Branco')
+
+        self.store.addRental('daily', 'email1@mail.com', 1)
+
+        self.assertEqual(self.store.calculateRental('email1@mail.com'), 25)
+        self.assertFalse(self.store.bikes[0]['available'])
+        self.assertTrue(self.store.bikes[1]['available'])
+        self.assertEqual(self.store.openRentals.get(1), None)
+        self.assertEqual(len(self.store.openRentals[2]), 1)
+
+    def test_calculate_rental_without_open_rentals(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.assertEqual(self.store.calculateRental('email1@mail.com'), 0)
+
+    def test_calculate_rental_of_client_not_registered(self):
+        with self.assertRaises(KeyError) as error:
+            self.store.calculateRental('email1@mail.com')
+
+        self.assertEqual(error.exception.args[0], 'Cliente nao cadastrado.')
+
     def test_calculate_time(self):
         date1 = datetime(2021, 3, 1, 0, 0, 0, 0)
         
@@ -377,5 +898,1471 @@ class StoreTests(unittest.TestCase):
         
         self.assertEqual(error.exception.args[0], 'A data de entrega deve ser depois da data de empréstimo.')        
 
+    def test_partial_family_return(self):
+        self.store.clock = ManualClock(datetime(2021, 3, 1))
+
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.store.addBikes(['Branco'] * 5)
+
+        self.store.addRental('daily', 'email1@mail.com', 4, True)
+
+        self.store.clock.advance(days=1, hours=1)
+
+        self.assertAlmostEqual(self.store.returnBikes('email1@mail.com', [1, 2]), 2 * 2 * 25 * 0.7)
+
+        self.assertEqual(list(self.store.openRentals[1]), [3, 4])
+        self.assertEqual([rent.bikeId for rent in self.store.openRentals[1].values()], [3, 4])
+        self.assertEqual(self.store.availableCount(), 3)
+        self.assertEqual(self.store.findRentalById(1).end, datetime(2021, 3, 2, 1))
+        self.assertAlmostEqual(self.store.balance('email1@mail.com'), 2 * 2 * 25 * 0.7)
+
+        self.store.clock.advance(days=2)
+
+        self.assertAlmostEqual(self.store.returnRental(3), 4 * 25 * 0.7)
+        self.assertAlmostEqual(self.store.calculateRental('email1@mail.com'), 4 * 25 * 0.7)
+
+        self.assertEqual(self.store.openRentals, {})
+        self.assertEqual(self.store.openByBike, {})
+        self.assertEqual(self.store.stats()['rented'], 0)
+        self.assertEqual(self.store.totalBalance(), 0)
+
+    def test_return_rental_errors(self):
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.store.addClient('Nome2', 'email2@mail.com', '55566677788')
+
+        self.store.addBikes(['Branco'] * 2)
+
+        self.store.addRental('hourly', 'email1@mail.com', 1)
+        self.store.addRental('hourly', 'email2@mail.com', 1)
+
+        with self.assertRaises(KeyError) as error:
+            self.store.returnBikes('email1@mail.com', [1, 2])
+
+        self.assertEqual(error.exception.args[0], 'Bicicleta nao alugada pelo cliente.')
+        self.assertEqual(len(self.store.openRentals[1]), 1)
+
+        with self.assertRaises(KeyError) as error:
+            self.store.returnBikes('email3@mail.com', [1])
+
+        self.assertEqual(error.exception.args[0], 'Cliente nao cadastrado.')
+
+        with self.assertRaises(KeyError) as error:
+            self.store.returnRental(3)
+
+        self.assertEqual(error.exception.args[0], 'Aluguel nao cadastrado.')
+
+        self.assertEqual(self.store.returnRental(2), 5)
+
+        with self.assertRaises(ValueError) as error:
+            self.store.returnRental(2)
+
+        self.assertEqual(error.exception.args[0], 'Aluguel ja encerrado.')
+        self.assertEqual(self.store.openRentals.get(2), None)
+
+class SQLiteStoreTests(StoreTests):
+    def setUp(self):
+        self.store = Store('Loja de bikes', 'Rua Um, 123', SQLiteBackend(batchSize=3))
+
+    def tearDown(self):
+        self.store.close()
+
+class SQLitePersistenceTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        self.path = os.path.join(self.directory.name, 'store.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self):
+        return Store('Loja de bikes', 'Rua Um, 123', SQLiteBackend(self.path, wal=True))
+
+    def test_reload_store(self):
+        store = self.open()
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        store.addClient('Nome2', 'email2@mail.com', '55566677788')
+
+        for i in range(5):
+            store.addBike('Branco')
+
+        store.addRental('daily', 'email1@mail.com', 3, True)
+        store.addRental('hourly', 'email2@mail.com', 1)
+        store.calculateRental('email2@mail.com')
+        store.removeClient('email2@mail.com')
+        store.updateClient('email1@mail.com', name='Nome3')
+
+        store.close()
+
+        store = self.open()
+
+        self.assertEqual([client.name for client in store.clients], ['Nome3'])
+        self.assertEqual(store.findClientByCpf('11122233344').email, 'email1@mail.com')
+        self.assertEqual(len(store.rentals), 4)
+        self.assertEqual(len(store.openRentals[1]), 3)
+        self.assertEqual(store.availableCount(), 2)
+        self.assertTrue(store.rentals[3].family is False and store.rentals[3].end is not None)
+
+        store.addClient('Nome4', 'email4@mail.com', '99988877766')
+
+        self.assertEqual(store.findClientByEmail('email4@mail.com').id, 3)
+        self.assertEqual(store.calculateRental('email1@mail.com'), 25 * 3 * 0.7)
+
+        store.addRental('weekly', 'email4@mail.com', 1)
+
+        self.assertEqual(store.rentals[-1].id, 5)
+
+    def test_reload_after_partial_return(self):
+        store = self.open()
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        store.addBikes(['Branco'] * 4)
+
+        store.addRental('daily', 'email1@mail.com', 4, True)
+        store.returnBikes('email1@mail.com', [2, 3])
+
+        store.close()
+
+        store = self.open()
+
+        self.assertEqual([rent.bikeId for rent in store.openRentals[1].values()], [1, 4])
+        self.assertEqual(sorted(store.openByBike), [1, 4])
+        self.assertEqual(store.availableCount(), 2)
+        self.assertEqual(store.findRentalById(2).end is not None, True)
+        self.assertAlmostEqual(store.returnRental(4), 25 * 0.7)
+        self.assertAlmostEqual(store.calculateRental('email1@mail.com'), 25 * 0.7)
+
+        store.close()
+
+    def test_reload_bookings(self):
+        store = self.open()
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        store.addBikes(['Branco'] * 4)
+
+        start = datetime.now() + timedelta(days=1)
+
+        self.assertEqual(store.bookBikes('daily', 'email1@mail.com', 2, start, start + timedelta(days=2)), [1, 2])
+        self.assertEqual(store.bookBikes('hourly', 'email1@mail.com', 1, start, start + timedelta(hours=3)), [3])
+
+        store.cancelBooking(1)
+        store.pickUpBooking(3)
+
+        store.close()
+
+        store = self.open()
+
+        self.assertEqual(list(store.schedule.bookings), [2])
+        self.assertEqual(store.schedule.bookings[2].end, start + timedelta(days=2))
+        self.assertEqual(store.nextBookingId, 4)
+        self.assertEqual(len(store.openRentals[1]), 1)
+
+        store.cancelBooking(2)
+
+        store.close()
+
+        store = self.open()
+
+        self.assertEqual(len(store.schedule), 0)
+        self.assertEqual(store.bookBikes('daily', 'email1@mail.com', 1, start, start + timedelta(days=1)), [4])
+
+        store.close()
+
+    def test_batch_is_written_on_close(self):
+        store = Store('Loja de bikes', 'Rua Um, 123', SQLiteBackend(self.path, batchSize=100))
+
+        store.addBikes(['Branco', 'Azul'])
+
+        self.assertEqual(len(store.backend.pending), 2)
+
+        store.close()
+
+        store = self.open()
+
+        self.assertEqual(len(store.bikes), 2)
+
+        store.close()
+
+class EventLogStoreTests(StoreTests):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        self.store = Store('Loja de bikes', 'Rua Um, 123', EventLogBackend(self.directory.name, snapshotEvery=7))
+
+    def tearDown(self):
+        self.store.close()
+
+        self.directory.cleanup()
+
+class EventLogPersistenceTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, snapshotEvery=None):
+        return Store('Loja de bikes', 'Rua Um, 123', EventLogBackend(self.directory.name, syncEvery=2, snapshotEvery=snapshotEvery))
+
+    def populate(self, store):
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        store.addClient('Nome2', 'email2@mail.com', '55566677788')
+
+        store.addBikes(['Branco'] * 5)
+
+        store.addRental('daily', 'email1@mail.com', 3, True)
+        store.addRental('hourly', 'email2@mail.com', 1)
+        store.calculateRental('email2@mail.com')
+        store.removeClient('email2@mail.com')
+        store.updateClient('email1@mail.com', name='Nome3')
+
+    def assertRestored(self, store):
+        self.assertEqual([client.name for client in store.clients], ['Nome3'])
+        self.assertEqual(len(store.rentals), 4)
+        self.assertEqual(len(store.openRentals[1]), 3)
+        self.assertEqual(store.availableCount(), 2)
+        self.assertEqual(store.stats()['rented'], 3)
+        self.assertEqual([bike.available for bike in store.bikes], [False, False, False, True, True])
+        self.assertEqual(store.calculateRental('email1@mail.com'), 25 * 3 * 0.7)
+
+    def test_replay_log(self):
+        store = self.open()
+
+        self.populate(store)
+
+        store.close()
+
+        self.assertRestored(self.open())
+
+    def test_reload_bookings(self):
+        for snapshotEvery in (None, 1, 3):
+            with self.subTest(snapshotEvery=snapshotEvery):
+                self.directory.cleanup()
+
+                self.directory = tempfile.TemporaryDirectory()
+
+                store = self.open(snapshotEvery)
+
+                store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+                store.addBikes(['Branco'] * 4)
+
+                start = datetime.now() + timedelta(days=1)
+
+                store.bookBikes('daily', 'email1@mail.com', 2, start, start + timedelta(days=2))
+                store.bookBikes('hourly', 'email1@mail.com', 1, start, start + timedelta(hours=3))
+                store.cancelBooking(1)
+                store.pickUpBooking(3)
+
+                store.close()
+
+                store = self.open(snapshotEvery)
+
+                self.assertEqual(list(store.schedule.bookings), [2])
+                self.assertEqual(store.schedule.bookings[2].start, start)
+                self.assertEqual(store.nextBookingId, 4)
+                self.assertEqual(len(store.openRentals[1]), 1)
+
+                store.cancelBooking(2)
+
+                store.close()
+
+                store = self.open(snapshotEvery)
+
+                self.assertEqual(len(store.schedule), 0)
+                self.assertEqual(store.nextBookingId, 4)
+
+                store.close()
+
+    def test_restore_from_snapshot_and_tail(self):
+        for snapshotEvery in (1, 3, 5, 100):
+            with self.subTest(snapshotEvery=snapshotEvery):
+                self.directory.cleanup()
+
+                self.directory = tempfile.TemporaryDirectory()
+
+                store = self.open(snapshotEvery)
+
+                self.populate(store)
+
+                store.close()
+
+                self.assertRestored(self.open())
+
+    def test_snapshot_drops_old_segments(self):
+        store = self.open()
+
+        self.populate(store)
+
+        store.backend.snapshot()
+
+        store.addBike('Azul')
+
+        store.close()
+
+        self.assertEqual(store.backend.segments(), [2])
+
+        store = self.open()
+
+        self.assertEqual(len(store.bikes), 6)
+        self.assertEqual(store.bikes[5].color, 'Azul')
+
+        store.close()
+
+    def test_snapshot_keeps_archived_rentals(self):
+        store = self.open()
+
+        self.populate(store)
+
+        store.archive()
+
+        store.backend.snapshot()
+
+        store.close()
+
+        self.assertRestored(self.open())
+
+    def test_torn_last_event_is_discarded(self):
+        store = self.open()
+
+        store.addBikes(['Branco', 'Azul'])
+
+        store.close()
+
+        with open(store.backend.segmentPath(1), 'a') as file:
+            file.write('["bikeAdded",3,"Pre')
+
+        store = self.open()
+
+        self.assertEqual(len(store.bikes), 2)
+
+        store.addBike('Preto')
+
+        store.close()
+
+        self.assertEqual([bike.color for bike in self.open().bikes], ['Branco', 'Azul', 'Preto'])
+
+class SlowConcurrentStore(ConcurrentStore):
+    def getAvailableBikes(self, quantity, until=None):
+        bikes = super().getAvailableBikes(quantity, until)
+
+        time.sleep(0.0001)
+
+        return bikes
+
+class ConcurrentStoreTests(StoreTests):
+    def setUp(self):
+        self.store = ConcurrentStore('Loja de bikes', 'Rua Um, 123')
+
+    def test_no_double_booking_under_contention(self):
+        store = SlowConcurrentStore('Loja de bikes', 'Rua Um, 123')
+
+        threads = 8
+
+        rounds = 200
+
+        for i in range(threads):
+            store.addClient(f'Nome{i}', f'email{i}@mail.com', f'{i:011d}')
+
+        store.addBikes(['Branco'] * 10)
+
+        rented = {}
+
+        errors = []
+
+        lock = threading.Lock()
+
+        def worker(i):
+            email = f'email{i}@mail.com'
+
+            for r in range(rounds):
+                try:
+                    store.addRental('hourly', email, 1 + r % 3)
+                except KeyError:
+                    continue
+
+                bikes = [rent.bikeId for rent in store.openRentals[i + 1].values()]
+
+                with lock:
+                    for bike in bikes:
+                        if rented.get(bike) not in (None, i):
+                            errors.append(bike)
+
+                        rented[bike] = i
+
+                time.sleep(0.0001)
+
+                with lock:
+                    for bike in bikes:
+                        del rented[bike]
+
+                store.calculateRental(email)
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+
+        for thread in workers:
+            thread.start()
+
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(store.availableCount(), 10)
+        self.assertEqual(len(set(rent.id for rent in store.rentals)), len(store.rentals))
+        self.assertTrue(all(rent.end is not None for rent in store.rentals))
+
+    def test_settle_all_does_not_lose_concurrent_rentals(self):
+        store = ConcurrentStore('Loja de bikes', 'Rua Um, 123')
+
+        store.addClients((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(4000))
+
+        store.addBikes(['Branco'] * 4000)
+
+        for i in range(2000):
+            store.addRental('hourly', f'email{i}@mail.com', 1)
+
+        def worker():
+            for i in range(2000, 4000):
+                store.addRental('hourly', f'email{i}@mail.com', 1)
+
+        interval = sys.getswitchinterval()
+
+        sys.setswitchinterval(1e-6)
+
+        try:
+            thread = threading.Thread(target=worker)
+
+            thread.start()
+
+            store.settleAll()
+
+            thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        listed = {rent.id for rentals in store.openRentals.values() for rent in rentals.values()}
+
+        self.assertEqual({rent.id for rent in store.rentals if rent.end is None}, listed)
+        self.assertEqual(store.countBikes(available=False), len(listed))
+
+    def test_quote_while_client_rents_and_returns(self):
+        store = ConcurrentStore('Loja de bikes', 'Rua Um, 123')
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        store.addBikes(['Branco'] * 200)
+
+        store.addRental('hourly', 'email1@mail.com', 100)
+
+        done = threading.Event()
+
+        errors = []
+
+        def worker():
+            try:
+                for i in range(2000):
+                    store.addRental('hourly', 'email1@mail.com', 1)
+
+                    store.returnRental(store.nextRentalId - 1)
+            finally:
+                done.set()
+
+        interval = sys.getswitchinterval()
+
+        sys.setswitchinterval(1e-6)
+
+        try:
+            thread = threading.Thread(target=worker)
+
+            thread.start()
+
+            while not done.is_set():
+                try:
+                    store.quote('email1@mail.com')
+                except (RuntimeError, ValueError) as error:
+                    errors.append(error)
+
+            thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(store.openRentals[1]), 100)
+
+class StoreServerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.store = Store('Loja de bikes', 'Rua Um, 123')
+
+        self.server = await StoreServer(self.store).start(port=0)
+
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+
+        await self.server.wait_closed()
+
+    async def request(self, reader, writer, op, **args):
+        writer.write(json.dumps({'op': op, 'args': args}).encode() + b'\n')
+
+        await writer.drain()
+
+        return json.loads(await reader.readline())
+
+    async def test_operations(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+
+        self.assertEqual(await self.request(reader, writer, 'addClient', name='Nome1', email='email1@mail.com', cpf='11122233344'), {'ok': True, 'result': None})
+        self.assertEqual(await self.request(reader, writer, 'addBike', color='Branco'), {'ok': True, 'result': None})
+        self.assertEqual(await self.request(reader, writer, 'addRental', model='daily', email='email1@mail.com', quantity=1), {'ok': True, 'result': None})
+        self.assertEqual(await self.request(reader, writer, 'listBikes'), {'ok': True, 'result': [{'id': 1, 'color': 'Branco', 'available': False}]})
+        self.assertEqual(await self.request(reader, writer, 'calculateRental', email='email1@mail.com'), {'ok': True, 'result': 25})
+        self.assertEqual(await self.request(reader, writer, 'addRental', model='daily', email='email2@mail.com', quantity=1), {'ok': False, 'error': 'Cliente nao cadastrado.'})
+        self.assertEqual(await self.request(reader, writer, 'removeBike'), {'ok': False, 'error': 'removeBike'})
+
+        writer.close()
+
+    async def test_list_bikes_returns_a_page(self):
+        self.store.addBikes(['Branco'] * 250)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+
+        response = await self.request(reader, writer, 'listBikes')
+
+        self.assertEqual([bike['id'] for bike in response['result']], list(range(1, 101)))
+
+        response = await self.request(reader, writer, 'listBikes', page=3, available=True)
+
+        self.assertEqual([bike['id'] for bike in response['result']], list(range(201, 251)))
+        self.assertEqual(await self.request(reader, writer, 'listBikes', page=None), {'ok': False, 'error': 'A pagina e o tamanho da pagina devem ser inteiros positivos.'})
+
+        writer.close()
+
+        await writer.wait_closed()
+
+    async def test_concurrent_connections(self):
+        self.store.addBikes(['Branco'] * 10)
+
+        async def terminal(i):
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+
+            email = f'email{i}@mail.com'
+
+            await self.request(reader, writer, 'addClient', name=f'Nome{i}', email=email, cpf=f'{i:011d}')
+
+            for r in range(20):
+                await self.request(reader, writer, 'addRental', model='hourly', email=email, quantity=1)
+
+                self.assertEqual(await self.request(reader, writer, 'calculateRental', email=email), {'ok': True, 'result': 5})
+
+            writer.close()
+
+            await writer.wait_closed()
+
+        await asyncio.gather(*(terminal(i) for i in range(10)))
+
+        self.assertEqual(len(self.store.rentals), 200)
+        self.assertEqual(self.store.availableCount(), 10)
+
+class PricingTests(unittest.TestCase):
+    def weekendDefinition(self):
+        return {
+            'models': [
+                {'name': 'hourly', 'unitSeconds': 3600, 'rate': 5, 'weekendRate': 8},
+                {'name': 'daily', 'unitSeconds': 86400, 'rate': 25},
+                {'name': 'monthly', 'unitSeconds': 2592000, 'rate': 300}
+            ],
+            'familyFactor': 0.5,
+            'familyMin': 2,
+            'familyMax': 4
+        }
+
+    def test_compile_is_cached(self):
+        self.assertIs(compileTariff(dict(DEFAULT_TARIFF_DEFINITION)), DEFAULT_TARIFF)
+        self.assertIs(compileTariff(self.weekendDefinition()), compileTariff(self.weekendDefinition()))
+
+    def test_default_table(self):
+        self.assertEqual(DEFAULT_TARIFF.codes, {'hourly': 0, 'daily': 1, 'weekly': 2})
+        self.assertEqual(DEFAULT_TARIFF.unitSeconds, (3600, 86400, 604800))
+        self.assertEqual(DEFAULT_TARIFF.rates, (5, 25, 100))
+        self.assertFalse(DEFAULT_TARIFF.hasWeekendRates)
+
+    def test_invalid_definition(self):
+        with self.assertRaises(ValueError):
+            compileTariff({'models': [], 'familyFactor': 0.7, 'familyMin': 3, 'familyMax': 5})
+
+        with self.assertRaises(ValueError):
+            compileTariff({'models': [{'name': 'hourly', 'unitSeconds': 0, 'rate': 5}], 'familyFactor': 0.7, 'familyMin': 3, 'familyMax': 5})
+
+    def test_integer_units_match_float_units(self):
+        generator = random.Random(42)
+
+        end = datetime(2021, 3, 1)
+
+        for i in range(20000):
+            code = generator.randrange(3)
+
+            start = end - timedelta(microseconds=generator.randrange(3 * 604800 * 1000000))
+
+            if i % 4 == 0:
+                start = end - timedelta(seconds=DEFAULT_TARIFF.unitSeconds[code] * generator.randrange(1, 50), microseconds=generator.choice((-1, 0, 1)))
+
+            expected = max(1, math.ceil((end - start).total_seconds() / DEFAULT_TARIFF.unitSeconds[code]))
+
+            self.assertEqual(DEFAULT_TARIFF.units(code, start, end), expected)
+
+    def test_integer_units_fix_float_edge_case(self):
+        start = datetime(1, 1, 1)
+
+        end = start + timedelta(weeks=100000, microseconds=1)
+
+        self.assertEqual(math.ceil((end - start).total_seconds() / 604800), 100000)
+        self.assertEqual(DEFAULT_TARIFF.units(2, start, end), 100001)
+
+        microseconds = [billing.toMicroseconds(start)], [billing.toMicroseconds(end)], [2]
+
+        for numpyModule in (billing.numpy, None):
+            with mock.patch.object(billing, 'numpy', numpyModule):
+                self.assertEqual(list(billing.calculateUnits(*microseconds)), [100001])
+
+    def test_units_computed_once_per_family_group(self):
+        clock = ManualClock(datetime(2021, 3, 1))
+
+        store = Store('Loja de bikes', 'Rua Um, 123', clock=clock)
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        store.addBikes(['Branco'] * 4)
+
+        store.addRental('daily', 'email1@mail.com', 4, True)
+
+        clock.advance(days=3, seconds=7)
+
+        self.assertEqual(len({rent.start for rent in store.openRentals[1].values()}), 1)
+
+        with mock.patch.object(pricing, 'unitsBetween', wraps=unitsBetween) as units:
+            self.assertAlmostEqual(store.quote('email1@mail.com'), 4 * 4 * 25 * 0.7)
+
+            self.assertEqual(units.call_count, 1)
+
+            self.assertAlmostEqual(store.quote('email1@mail.com'), 4 * 4 * 25 * 0.7)
+
+            self.assertEqual(units.call_count, 2)
+
+    def test_weekend_rate(self):
+        tariff = compileTariff(self.weekendDefinition())
+
+        saturday = datetime(2021, 3, 6, 10)
+
+        monday = datetime(2021, 3, 8, 10)
+
+        self.assertEqual(tariff.rate(0, saturday), 8)
+        self.assertEqual(tariff.rate(0, monday), 5)
+        self.assertEqual(tariff.rate(1, saturday), 25)
+
+        rentals = [
+            Rental(1, 'hourly', False, saturday, None, 1, 1),
+            Rental(2, 'hourly', True, monday, None, 2, 1),
+            Rental(3, 'hourly', True, monday, None, 3, 1)
+        ]
+
+        end = datetime(2021, 3, 8, 12)
+
+        self.assertEqual(tariff.quote(rentals, end), 50 * 8 + (2 * 5 + 2 * 5) * 0.5)
+
+        for numpyModule in (billing.numpy, None):
+            with mock.patch.object(billing, 'numpy', numpyModule):
+                charges = calculateCharges(
+                    [1, 1, 1],
+                    [toMicroseconds(rent.start) for rent in rentals],
+                    [toMicroseconds(end)] * 3,
+                    [0, 0, 0],
+                    [False, True, True],
+                    tariff
+                )
+
+            self.assertEqual(charges, {1: tariff.quote(rentals, end)})
+
+    def test_store_with_custom_tariff(self):
+        store = Store('Loja de bikes', 'Rua Um, 123', tariff=compileTariff(self.weekendDefinition()))
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        store.addBikes(['Branco'] * 5)
+
+        with self.assertRaises(ValueError) as error:
+            store.addRental('weekly', 'email1@mail.com', 1)
+
+        self.assertEqual(error.exception.args[0], 'Tipo de aluguel invalido.')
+
+        with self.assertRaises(ValueError) as error:
+            store.addRental('daily', 'email1@mail.com', 5, True)
+
+        self.assertEqual(error.exception.args[0], 'Aluguel para familia deve ser de 2 a 4 emprestimos.')
+
+        store.addRental('monthly', 'email1@mail.com', 2, True)
+
+        self.assertEqual(store.calculateRental('email1@mail.com'), 300 * 2 * 0.5)
+
+    def test_quote_does_not_close_rentals(self):
+        store = Store('Loja de bikes', 'Rua Um, 123')
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        store.addBikes(['Branco'] * 5)
+
+        store.addRental('daily', 'email1@mail.com', 3, True)
+        store.addRental('weekly', 'email1@mail.com', 1)
+
+        self.assertEqual(store.quote('email1@mail.com'), 100 + (25 * 3 * 0.7))
+        self.assertEqual(store.quote('email1@mail.com'), 100 + (25 * 3 * 0.7))
+        self.assertEqual(len(store.openRentals[1]), 4)
+        self.assertEqual(store.availableCount(), 1)
+        self.assertTrue(all(rent.end is None for rent in store.rentals))
+        self.assertEqual(store.calculateRental('email1@mail.com'), 100 + (25 * 3 * 0.7))
+        self.assertEqual(store.quote('email1@mail.com'), 0)
+
+class LedgerTests(unittest.TestCase):
+    def test_matches_quote_while_time_passes(self):
+        generator = random.Random(7)
+
+        base = datetime(2021, 3, 1)
+
+        ledger = Ledger(DEFAULT_TARIFF)
+
+        openRentals = {}
+
+        now = base
+
+        for id in range(1, 2001):
+            now += timedelta(microseconds=generator.choice([0, 1, generator.randrange(10 ** 9), generator.randrange(10 ** 11)]))
+
+            rent = Rental(id, generator.choice(['hourly', 'daily', 'weekly']), generator.random() < 0.3, now, None, id, generator.randrange(20))
+
+            ledger.open(rent)
+
+            openRentals[id] = rent
+
+            if generator.random() < 0.3:
+                closed = openRentals.pop(generator.choice(list(openRentals)))
+
+                ledger.close(closed)
+
+            if id % 50 == 0:
+                balances = []
+
+                for clientId in range(20):
+                    rentals = [rent for rent in openRentals.values() if rent.clientId == clientId]
+
+                    balances.append(DEFAULT_TARIFF.quote(rentals, now))
+
+                    self.assertEqual(ledger.balance(clientId, now), balances[-1])
+
+                self.assertAlmostEqual(ledger.total(now), sum(balances))
+
+    def test_unit_boundaries(self):
+        ledger = Ledger(DEFAULT_TARIFF)
+
+        start = datetime(2021, 3, 1)
+
+        ledger.open(Rental(1, 'hourly', False, start, None, 1, 1))
+
+        self.assertEqual(ledger.balance(1, start), 5)
+        self.assertEqual(ledger.balance(1, start + timedelta(hours=1)), 5)
+        self.assertEqual(ledger.balance(1, start + timedelta(hours=1, microseconds=1)), 10)
+        self.assertEqual(ledger.balance(1, start + timedelta(hours=5)), 25)
+        self.assertEqual(ledger.total(start + timedelta(hours=5)), 25)
+        self.assertEqual(ledger.balance(2, start), 0)
+
+    def test_fractional_rates_match_quote_exactly(self):
+        definition = dict(DEFAULT_TARIFF_DEFINITION)
+
+        definition['models'] = [
+            {'name': 'hourly', 'unitSeconds': 3600, 'rate': 0.1, 'weekendRate': 0.3},
+            {'name': 'daily', 'unitSeconds': 86400, 'rate': 2.7}
+        ]
+
+        tariff = compileTariff(definition)
+
+        generator = random.Random(11)
+
+        ledger = Ledger(tariff)
+
+        openRentals = {}
+
+        now = datetime(2021, 3, 1)
+
+        for id in range(1, 3001):
+            now += timedelta(seconds=generator.randrange(20000))
+
+            rent = Rental(id, generator.choice(tariff.names), generator.random() < 0.3, now, None, id, generator.randrange(5))
+
+            ledger.open(rent)
+
+            openRentals[id] = rent
+
+            if generator.random() < 0.5:
+                ledger.close(openRentals.pop(generator.choice(list(openRentals))))
+
+            if id % 15 == 0:
+                for clientId in range(5):
+                    rentals = [rent for rent in openRentals.values() if rent.clientId == clientId]
+
+                    self.assertEqual(ledger.balance(clientId, now), tariff.quote(rentals, now))
+
+        for rent in openRentals.values():
+            ledger.close(rent)
+
+        self.assertEqual(ledger.clients, {})
+        self.assertEqual(ledger.totals, {})
+        self.assertEqual(ledger.total(now), 0)
+
+    def test_closed_rentals_do_not_accumulate_in_heap(self):
+        ledger = Ledger(DEFAULT_TARIFF)
+
+        start = datetime(2021, 3, 1)
+
+        for id in range(1, 10001):
+            rent = Rental(id, 'hourly', False, start, None, 1, 1)
+
+            ledger.open(rent)
+            ledger.close(rent)
+
+        self.assertLessEqual(len(ledger.boundaries), 2)
+        self.assertEqual(ledger.clients, {})
+
+    def test_store_balance_matches_calculate_rental(self):
+        store = Store('Loja de bikes', 'Rua Um, 123')
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        store.addClient('Nome2', 'email2@mail.com', '11122233355')
+
+        store.addBikes(['Branco'] * 6)
+
+        store.addRental('daily', 'email1@mail.com', 3, True)
+        store.addRental('weekly', 'email1@mail.com', 1)
+        store.addRental('hourly', 'email2@mail.com', 2)
+
+        self.assertEqual(store.balance('email1@mail.com'), 100 + (25 * 3 * 0.7))
+        self.assertEqual(store.balance('email2@mail.com'), 10)
+        self.assertEqual(store.totalBalance(), 10 + 100 + (25 * 3 * 0.7))
+
+        balance = store.balance('email1@mail.com')
+
+        self.assertEqual(store.calculateRental('email1@mail.com'), balance)
+        self.assertEqual(store.balance('email1@mail.com'), 0)
+        self.assertEqual(store.totalBalance(), 10)
+
+        store.settleAll()
+
+        self.assertEqual(store.totalBalance(), 0)
+
+        with self.assertRaises(KeyError) as error:
+            store.balance('email3@mail.com')
+
+        self.assertEqual(error.exception.args[0], 'Cliente nao cadastrado.')
+
+class HistoryTests(unittest.TestCase):
+    def setUp(self):
+        self.history = RentalHistory()
+
+        base = datetime(2021, 3, 1, 8)
+
+        rows = [
+            (1, 'hourly', False, base, base + timedelta(hours=2), 1, 1),
+            (2, 'daily', True, base + timedelta(days=1), base + timedelta(days=2), 2, 1),
+            (3, 'hourly', False, base + timedelta(hours=3), base + timedelta(hours=4), 1, 2),
+            (4, 'weekly', False, base + timedelta(days=2), None, 3, 2),
+            (5, 'daily', True, base + timedelta(days=1), base + timedelta(days=1, hours=1), 3, 1)
+        ]
+
+        for row in rows:
+            self.history.add(Rental(*row))
+
+    def test_ordered_by_start(self):
+        self.assertEqual([rent.id for rent in self.history], [1, 3, 2, 5, 4])
+        self.assertEqual(len(self.history), 5)
+
+    def test_range_queries(self):
+        day = datetime(2021, 3, 2)
+
+        self.assertEqual([rent.id for rent in self.history.between(day, day + timedelta(days=1))], [2, 5])
+        self.assertEqual([rent.id for rent in self.history.between(end=day)], [1, 3])
+        self.assertEqual([rent.id for rent in self.history.between(day + timedelta(days=1))], [4])
+        self.assertEqual([rent.id for rent in self.history.forBike(3)], [5, 4])
+        self.assertEqual([rent.id for rent in self.history.forBike(1, start=datetime(2021, 3, 1, 9))], [3])
+        self.assertEqual([rent.id for rent in self.history.forClient(1, end=day)], [1])
+        self.assertEqual(list(self.history.forClient(9)), [])
+
+    def test_revenue(self):
+        self.assertEqual(self.history.revenueByDay(DEFAULT_TARIFF), {
+            datetime(2021, 3, 1).date(): 10 + 5,
+            datetime(2021, 3, 2).date(): 25 * 0.7 + 25 * 0.7
+        })
+        self.assertEqual(self.history.revenueByModel(DEFAULT_TARIFF), {'hourly': 15, 'daily': 25 * 0.7 + 25 * 0.7})
+        self.assertEqual(self.history.revenueByFamily(DEFAULT_TARIFF, end=datetime(2021, 3, 2)), {'regular': 15})
+        self.assertEqual(self.history.revenueByFamily(DEFAULT_TARIFF), {'regular': 15, 'family': 25 * 0.7 + 25 * 0.7})
+
+class StoreNetworkTests(unittest.TestCase):
+    def setUp(self):
+        self.network = StoreNetwork(processes=2)
+
+        for name in ('Centro', 'Praia', 'Parque'):
+            self.network.addStore(name, 'Rua Um, 123')
+
+            self.network.store(name).addBikes(['Branco'] * 5)
+
+    def tearDown(self):
+        self.network.close()
+
+    def test_shared_client_directory(self):
+        self.network.addClient('Nome1', 'email1@mail.com', '11122233344')
+        self.network.store('Praia').addClient('Nome2', 'email2@mail.com', '11122233355')
+
+        self.assertEqual(self.network.findClientByEmail('email2@mail.com').id, 2)
+        self.assertEqual(self.network.store('Parque').findClientByCpf('111.222.333-44').id, 1)
+
+        with self.assertRaises(TypeError) as error:
+            self.network.store('Centro').addClient('Nome3', 'email3@mail.com', '11122233355')
+
+        self.assertEqual(error.exception.args[0], 'CPF ja cadastrado.')
+
+        self.network.addRental('Centro', 'hourly', 'email1@mail.com', 1)
+        self.network.addRental('Praia', 'daily', 'email1@mail.com', 2)
+
+        self.assertEqual(self.network.balance('email1@mail.com'), 5 + 50)
+        self.assertEqual(self.network.stats(), {'stores': 3, 'bikes': 15, 'available': 12, 'rented': 3, 'clients': 2, 'openRentals': 3})
+
+        with self.assertRaises(ValueError) as error:
+            self.network.removeClient('email1@mail.com')
+
+        self.assertEqual(error.exception.args[0], 'Cliente possui alugueis em aberto.')
+
+        self.assertEqual(self.network.calculateRental('Praia', 'email1@mail.com'), 50)
+        self.assertEqual(self.network.calculateRental('Centro', 'email1@mail.com'), 5)
+
+        self.network.removeClient('email1@mail.com')
+
+        self.assertIsNone(self.network.store('Parque').findClientByEmail('email1@mail.com'))
+
+    def test_unknown_store(self):
+        with self.assertRaises(KeyError) as error:
+            self.network.addBike('Serra', 'Azul')
+
+        self.assertEqual(error.exception.args[0], 'Loja nao cadastrada.')
+
+        with self.assertRaises(TypeError) as error:
+            self.network.addStore('Centro', 'Rua Dois, 456')
+
+        self.assertEqual(error.exception.args[0], 'Loja ja cadastrada.')
+
+    def test_parallel_revenue(self):
+        self.network.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.network.addRental('Centro', 'hourly', 'email1@mail.com', 1)
+        self.network.addRental('Praia', 'daily', 'email1@mail.com', 3, True)
+        self.network.addRental('Parque', 'weekly', 'email1@mail.com', 1)
+
+        for name in ('Centro', 'Praia'):
+            self.network.calculateRental(name, 'email1@mail.com')
+
+        self.assertEqual(self.network.revenueByStore(), {'Centro': {'hourly': 5}, 'Praia': {'daily': 25 * 0.7 * 3}, 'Parque': {}})
+        self.assertEqual(self.network.revenueByModel(), {'hourly': 5, 'daily': 25 * 0.7 * 3})
+        self.assertEqual(self.network.revenueByModel(end=datetime(2000, 1, 1)), {})
+
+class MetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.store = Store('Loja de bikes', 'Rua Um, 123')
+
+        self.store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        self.store.addBikes(['Branco'] * 5)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(self.store.metrics)
+        self.assertNotIn('addRental', self.store.__dict__)
+
+        self.store.addRental('hourly', 'email1@mail.com', 2)
+
+        self.assertEqual(self.store.calculateRental('email1@mail.com'), 10)
+
+    def test_counts_and_scanned_rows(self):
+        metrics = self.store.enableMetrics()
+
+        self.store.addRental('hourly', 'email1@mail.com', 2)
+        self.store.addRental('daily', 'email1@mail.com', 1)
+        self.store.calculateRental('email1@mail.com')
+
+        with self.assertRaises(KeyError):
+            self.store.calculateRental('email2@mail.com')
+
+        snapshot = metrics.snapshot()
+
+        self.assertEqual(snapshot['addRental']['count'], 2)
+        self.assertEqual(snapshot['calculateRental']['count'], 2)
+        self.assertEqual(snapshot['calculateRental']['scannedRows'], 3)
+        self.assertEqual(snapshot['getAvailableBikes']['count'], 2)
+        self.assertEqual(snapshot['getAvailableBikes']['scannedRows'], 2 + 1)
+        self.assertEqual(snapshot['findClientByEmail']['count'], 4)
+        self.assertEqual(snapshot['addRental']['buckets']['+Inf'], 2)
+        self.assertEqual(json.loads(metrics.json()), snapshot)
+
+        self.store.disableMetrics()
+
+        self.store.addRental('hourly', 'email1@mail.com', 1)
+
+        self.assertIsNone(self.store.metrics)
+        self.assertEqual(metrics.snapshot()['addRental']['count'], 2)
+
+    def test_histogram_buckets(self):
+        metrics = Metrics(buckets=(0.001, 0.01))
+
+        for seconds in (0.0005, 0.001, 0.005, 0.5):
+            metrics.observe('addRental', seconds)
+
+        metrics.scanned('getAvailableBikes', 7)
+
+        self.assertEqual(metrics.snapshot()['addRental']['buckets'], {'0.001': 2, '0.01': 3, '+Inf': 4})
+
+        text = metrics.prometheus()
+
+        self.assertIn('bikestore_operation_seconds_bucket{operation="addRental",le="0.01"} 3', text)
+        self.assertIn('bikestore_operation_seconds_count{operation="addRental"} 4', text)
+        self.assertIn('bikestore_scanned_rows_total{operation="getAvailableBikes"} 7', text)
+        self.assertIn('# TYPE bikestore_operation_seconds histogram', text)
+
+class WorkloadTests(unittest.TestCase):
+    def test_seeded_and_valid(self):
+        workload = Workload(50, 40, 2000, seed=7)
+
+        self.assertEqual(workload.operationList, Workload(50, 40, 2000, seed=7).operationList)
+        self.assertNotEqual(workload.operationList, Workload(50, 40, 2000, seed=8).operationList)
+        self.assertEqual(len(workload), 2000)
+
+        rents = [operation for operation in workload.operationList if operation[0] == 'rent']
+
+        self.assertEqual({operation[1] for operation in rents}, {'hourly', 'daily', 'weekly'})
+        self.assertTrue(any(operation[4] for operation in rents))
+
+        store = workload.buildStore()
+
+        workload.replay(store)
+
+        self.assertEqual(len(store.rentals), sum(operation[3] for operation in rents))
+
+    def test_scenarios(self):
+        for name in SCENARIOS:
+            result = runScenario(name, 20, repeat=1)
+
+            self.assertEqual(result['scenario'], name)
+            self.assertEqual(result['scale'], 20)
+            self.assertGreater(result['operations'], 0)
+            self.assertGreaterEqual(result['best'], 0)
+
+class BookingScheduleTests(unittest.TestCase):
+    def test_intervals(self):
+        schedule = BookingSchedule()
+
+        base = datetime(2021, 3, 1)
+
+        def hours(value):
+            return base + timedelta(hours=value)
+
+        for id, (start, end) in enumerate([(2, 4), (8, 10), (5, 6)], 1):
+            schedule.add(Booking(id, 'hourly', False, hours(start), hours(end), 1, 1))
+
+        self.assertEqual(schedule.starts[1], [hours(2), hours(5), hours(8)])
+        self.assertTrue(schedule.isFree(1, hours(0), hours(2)))
+        self.assertTrue(schedule.isFree(1, hours(4), hours(5)))
+        self.assertTrue(schedule.isFree(1, hours(10), hours(20)))
+        self.assertFalse(schedule.isFree(1, hours(3), hours(3.5)))
+        self.assertFalse(schedule.isFree(1, hours(0), hours(20)))
+        self.assertFalse(schedule.isFree(1, hours(5.5), hours(7)))
+        self.assertTrue(schedule.isFree(2, hours(0), hours(20)))
+        self.assertEqual(schedule.nextBooking(1, hours(4)).id, 3)
+        self.assertIsNone(schedule.nextBooking(1, hours(10)))
+
+        with self.assertRaises(KeyError):
+            schedule.add(Booking(4, 'hourly', False, hours(9), hours(11), 1, 1))
+
+        schedule.remove(2)
+
+        self.assertTrue(schedule.isFree(1, hours(6), hours(20)))
+        self.assertEqual(len(schedule), 2)
+
+    def test_matches_brute_force(self):
+        generator = random.Random(3)
+
+        schedule = BookingSchedule()
+
+        base = datetime(2021, 3, 1)
+
+        intervals = {bikeId: [] for bikeId in range(1, 21)}
+
+        for bikeId in intervals:
+            schedule.addBike(bikeId)
+
+        bookings = {}
+
+        for id in range(1, 2001):
+            start = base + timedelta(hours=generator.randrange(2000))
+            end = start + timedelta(hours=generator.randrange(1, 48))
+
+            expected = [bikeId for bikeId in intervals if all(end <= other[0] or other[1] <= start for other in intervals[bikeId])]
+
+            free = schedule.findFree(20, start, end)
+
+            self.assertEqual(sorted(free), expected)
+            self.assertEqual(schedule.findFree(3, start, end), free[:3])
+
+            if expected:
+                bikeId = generator.choice(expected)
+
+                schedule.add(Booking(id, 'hourly', False, start, end, bikeId, 1))
+
+                intervals[bikeId].append((start, end))
+
+                bookings[id] = (bikeId, (start, end))
+
+            if bookings and generator.random() < 0.2:
+                bikeId, interval = bookings.pop(generator.choice(list(bookings)))
+
+                schedule.remove(next(id for id, booking in schedule.bookings.items() if booking.bikeId == bikeId and (booking.start, booking.end) == interval))
+
+                intervals[bikeId].remove(interval)
+
+        self.assertEqual(set(schedule.unbooked) | set(schedule.starts), set(intervals))
+        self.assertEqual(set(schedule.unbooked) & set(schedule.starts), set())
+
+class BillingTests(unittest.TestCase):
+    def scalarCharges(self, rentals):
+        store = Store('Loja de bikes', 'Rua Um, 123')
+
+        rates = {'hourly': 5, 'daily': 25, 'weekly': 100}
+
+        values = {}
+
+        for clientId, model, family, start, end in rentals:
+            value, valueForFamily = values.get(clientId, (0, 0))
+
+            charge = store.calculateTime(model, start, end) * rates[model]
+
+            values[clientId] = (value, valueForFamily + charge) if family else (value + charge, valueForFamily)
+
+        return {clientId: value + (valueForFamily * 0.7) for clientId, (value, valueForFamily) in values.items()}
+
+    def test_batch_revenue_matches_history(self):
+        definition = dict(DEFAULT_TARIFF_DEFINITION)
+
+        definition['models'] = [dict(model, weekendRate=model['rate'] * 2) for model in DEFAULT_TARIFF_DEFINITION['models']]
+
+        for tariff in (DEFAULT_TARIFF, compileTariff(definition)):
+            rentals = [Rental(id, model, family, start, end, 1, clientId) for id, (clientId, model, family, start, end) in enumerate(self.randomRentals(2000))]
+
+            expected = sumRevenue(rentals, tariff, lambda rent: tariff.codes[rent.model])
+
+            columns = (
+                [billing.toMicroseconds(rent.start) for rent in rentals],
+                [billing.toMicroseconds(rent.end) for rent in rentals],
+                [tariff.codes[rent.model] for rent in rentals],
+                [rent.family for rent in rentals]
+            )
+
+            for numpyModule in (billing.numpy, None):
+                with mock.patch.object(billing, 'numpy', numpyModule):
+                    self.assertEqual(billing.calculateRevenue(*columns, tariff), expected)
+
+    def randomRentals(self, count):
+        generator = random.Random(42)
+
+        base = datetime(2021, 3, 1)
+
+        rentals = []
+
+        for i in range(count):
+            start = base + timedelta(microseconds=generator.randrange(10 ** 12))
+
+            end = start + timedelta(microseconds=generator.choice([0, 1, 3600 * 10 ** 6, 86400 * 10 ** 6, generator.randrange(10 ** 13)]))
+
+            rentals.append((generator.randrange(50), generator.choice(['hourly', 'daily', 'weekly']), generator.random() < 0.3, start, end))
+
+        return rentals
+
+    def batchCharges(self, rentals):
+        return calculateCharges(
+            [rent[0] for rent in rentals],
+            [toMicroseconds(rent[3]) for rent in rentals],
+            [toMicroseconds(rent[4]) for rent in rentals],
+            [DEFAULT_TARIFF.codes[rent[1]] for rent in rentals],
+            [rent[2] for rent in rentals]
+        )
+
+    def test_batch_matches_scalar(self):
+        rentals = self.randomRentals(5000)
+
+        self.assertEqual(self.batchCharges(rentals), self.scalarCharges(rentals))
+
+    def test_batch_without_numpy_matches_scalar(self):
+        rentals = self.randomRentals(2000)
+
+        with mock.patch.object(billing, 'numpy', None):
+            self.assertEqual(self.batchCharges(rentals), self.scalarCharges(rentals))
+
+    def test_end_before_start(self):
+        with self.assertRaises(ValueError) as error:
+            calculateCharges([1], [10], [5], [0], [False])
+
+        self.assertEqual(error.exception.args[0], 'A data de entrega deve ser depois da data de empréstimo.')
+
+    def test_empty_batch(self):
+        self.assertEqual(calculateCharges([], [], [], [], []), {})
+
+    def test_settle_all(self):
+        store = Store('Loja de bikes', 'Rua Um, 123')
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+        store.addClient('Nome2', 'email2@mail.com', '55566677788')
+        store.addClient('Nome3', 'email3@mail.com', '99988877766')
+
+        store.addBikes(['Branco'] * 10)
+
+        store.addRental('daily', 'email1@mail.com', 3, True)
+        store.addRental('weekly', 'email1@mail.com', 1)
+        store.addRental('hourly', 'email2@mail.com', 2)
+
+        self.assertEqual(store.settleAll(), {1: 100 + (25 * 3 * 0.7), 2: 10.0})
+        self.assertEqual(store.availableCount(), 10)
+        self.assertEqual(store.openRentals, {})
+        self.assertTrue(all(rent.end is not None for rent in store.rentals))
+        self.assertEqual(store.calculateRental('email1@mail.com'), 0)
+
+    def fractionalStore(self):
+        tariff = compileTariff({
+            'models': [
+                {'name': 'hourly', 'unitSeconds': 3600, 'rate': 1.1, 'weekendRate': 1.35},
+                {'name': 'daily', 'unitSeconds': 86400, 'rate': 12.3},
+                {'name': 'weekly', 'unitSeconds': 604800, 'rate': 70.15, 'weekendRate': 66.6}
+            ],
+            'familyFactor': 0.7,
+            'familyMin': 3,
+            'familyMax': 5
+        })
+
+        generator = random.Random(7)
+
+        clock = ManualClock(datetime(2021, 3, 1))
+
+        store = Store('Loja de bikes', 'Rua Um, 123', tariff=tariff, clock=clock)
+
+        store.addClients((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(40))
+
+        store.addBikes(['Branco'] * 2000)
+
+        for i in range(300):
+            clock.advance(seconds=generator.randrange(20000))
+
+            family = generator.random() < 0.3
+
+            store.addRental(generator.choice(tariff.names), f'email{generator.randrange(40)}@mail.com', 3 if family else 1, family)
+
+        clock.advance(days=3, seconds=17)
+
+        return store
+
+    def test_settle_all_matches_quote_with_fractional_rates(self):
+        store = self.fractionalStore()
+
+        expected = {client.id: store.quote(client.email) for client in store.clients if client.id in store.openRentals}
+
+        self.assertTrue(any(value != round(value, 2) for value in expected.values()))
+
+        for numpyModule in (billing.numpy, None):
+            with mock.patch.object(billing, 'numpy', numpyModule):
+                self.assertEqual(self.fractionalStore().settleAll(), expected)
+                self.assertEqual(self.fractionalStore().settleAll(processes=2), expected)
+
+    def test_parallel_matches_serial(self):
+        rentals = self.randomRentals(5000)
+
+        for numpyModule in (billing.numpy, None):
+            with mock.patch.object(billing, 'numpy', numpyModule):
+                serial = self.batchCharges(rentals)
+
+                for processes in (1, 3):
+                    parallel = calculateChargesParallel(
+                        [rent[0] for rent in rentals],
+                        [toMicroseconds(rent[3]) for rent in rentals],
+                        [toMicroseconds(rent[4]) for rent in rentals],
+                        [DEFAULT_TARIFF.codes[rent[1]] for rent in rentals],
+                        [rent[2] for rent in rentals],
+                        processes=processes
+                    )
+
+                    self.assertEqual(parallel, serial)
+                    self.assertEqual(list(parallel), sorted(serial))
+
+    def test_parallel_settle_all(self):
+        stores = []
+
+        for i in range(2):
+            store = Store('Loja de bikes', 'Rua Um, 123')
+
+            store.addClients((f'Nome{i}', f'email{i}@mail.com', f'{i:011d}') for i in range(20))
+
+            store.addBikes(['Branco'] * 60)
+
+            for i in range(20):
+                store.addRental(['hourly', 'daily', 'weekly'][i % 3], f'email{i}@mail.com', 3, i % 2 == 0)
+
+            stores.append(store)
+
+        self.assertEqual(stores[0].settleAll(processes=4), stores[1].settleAll())
+        self.assertEqual(stores[0].availableCount(), 60)
+        self.assertEqual(stores[0].openRentals, {})
+        self.assertEqual(stores[0].totalBalance(), 0)
+
+    def test_failed_settle_all_keeps_rentals_open(self):
+        store = Store('Loja de bikes', 'Rua Um, 123')
+
+        store.addClient('Nome1', 'email1@mail.com', '11122233344')
+
+        store.addBikes(['Branco'] * 3)
+
+        store.addRental('daily', 'email1@mail.com', 3)
+
+        with mock.patch('models.calculateCharges', side_effect=MemoryError):
+            with self.assertRaises(MemoryError):
+                store.settleAll()
+
+        self.assertEqual(len(store.openRentals[1]), 3)
+        self.assertEqual(store.availableCount(), 0)
+        self.assertEqual(store.settleAll(), {1: 75})
+
+class ClockTests(unittest.TestCase):
+    def test_manual_clock_advances(self):
+        clock = ManualClock(datetime(2021, 3, 1))
+
+        clock.advance(hours=1, minutes=30)
+        clock.advance(30)
+
+        self.assertEqual(clock.now(), datetime(2021, 3, 1, 1, 30, 30))
+
+        clock.set(datetime(2021, 3, 2))
+
+        self.assertEqual(clock.now(), datetime(2021, 3, 2))
+
+        with self.assertRaises(ValueError):
+            clock.set(datetime(2021, 3, 1))
+
+    def test_billing_across_unit_boundary(self):
+        clock = ManualClock(datetime(2021, 3, 1))
+
+        store = Store('Loja de bikes', 'Rua Um, 123', clock=clock)
+
+        store.addClients([('Nome1', 'email1@mail.com', '11122233344'), ('Nome2', 'email2@mail.com', '11122233345')])
+
+        store.addBikes(['Branco'] * 2)
+
+        store.addRental('hourly', 'email1@mail.com', 1)
+        store.addRental('hourly', 'email2@mail.com', 1)
+
+        clock.advance(hours=1)
+
+        self.assertEqual(store.balance('email1@mail.com'), 5)
+        self.assertEqual(store.calculateRental('email1@mail.com'), 5)
+
+        clock.advance(microseconds=1)
+
+        self.assertEqual(store.calculateRental('email2@mail.com'), 10)
+
+    def test_simulation_is_deterministic(self):
+        reports = [Simulator(100, 30, 3, 10, seed=7).run() for i in range(2)]
+
+        for report in reports:
+            for key in ('wallSeconds', 'eventsPerSecond'):
+                del report[key]
+
+        self.assertEqual(reports[0], reports[1])
+
+    def test_simulation_report(self):
+        report = Simulator(100, 30, 3, 10, seed=7).run()
+
+        self.assertGreater(report['rentals'], 0)
+        self.assertEqual(report['events'], 2 * report['returns'] + report['settledAtEnd'] + report['lostArrivals'])
+        self.assertTrue(0 < report['utilization'] <= 1)
+        self.assertAlmostEqual(report['revenue'], sum(report['revenueByModel'].values()))
+
+class CommandLineTests(unittest.TestCase):
+    def run_main(self, *argv):
+        output = io.StringIO()
+        errors = io.StringIO()
+
+        with redirect_stdout(output), redirect_stderr(errors):
+            code = bikerent.main(list(argv))
+
+        return code, output.getvalue(), errors.getvalue()
+
+    def test_subcommands_share_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, 'loja.db')
+
+            self.assertEqual(self.run_main('--db', database, 'addClient', 'Nome1', 'email1@mail.com', '52998224725')[0], 0)
+            self.assertEqual(self.run_main('--db', database, 'addBike', 'Azul')[0], 0)
+            self.assertEqual(self.run_main('--db', database, 'addRental', 'hourly', 'email1@mail.com', '1')[0], 0)
+
+            code, output, errors = self.run_main('--db', database, 'stats')
+
+            self.assertEqual(json.loads(output)['rented'], 1)
+
+            code, output, errors = self.run_main('--db', database, 'calculateRental', 'email1@mail.com')
+
+            self.assertEqual(float(output), 5)
+
+            code, output, errors = self.run_main('--db', database, 'calculateRental', 'email2@mail.com')
+
+            self.assertEqual(code, 1)
+            self.assertEqual(errors.strip(), 'Cliente nao cadastrado.')
+
+    def test_batch_mixes_commands_and_jsonl(self):
+        script = '\n'.join([
+            '# comentario',
+            'addClient Nome1 email1@mail.com 52998224725',
+            'addBike Azul',
+            '{"op": "addBike", "args": {"color": "Verde"}}',
+            'addRental hourly email1@mail.com 1',
+            '{"op": "quote", "args": {"email": "email1@mail.com"}}',
+            '{"op": "removeBike"}',
+            'showBikes --rented --format plain',
+            'bogus'
+        ])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'script.txt')
+
+            with open(path, 'w') as file:
+                file.write(script)
+
+            code, output, errors = self.run_main('--batch', path)
+
+        lines = output.splitlines()
+
+        self.assertEqual(code, 1)
+        self.assertEqual(json.loads(lines[0]), {'ok': True, 'result': None})
+        self.assertEqual(json.loads(lines[1]), {'ok': True, 'result': 5})
+        self.assertEqual(json.loads(lines[2]), {'ok': False, 'error': 'Operacao nao cadastrada.'})
+        self.assertEqual(lines[3:], ['id\tcolor\tavailable', '1\tAzul\tFalse'])
+        self.assertTrue(errors.startswith('linha 9:'))
+
+    def test_import_does_not_load_tabulate(self):
+        code = 'import sys, bikerent; bikerent.main(["stats"]); print("tabulate" in sys.modules, "numpy" in sys.modules, "concurrent.futures" in sys.modules)'
+
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(bikerent.__file__)))
+
+        self.assertEqual(result.stdout.splitlines()[-1], 'False False False')
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
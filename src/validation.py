@@ -0,0 +1,139 @@
+import re
+
+EMAIL_PATTERN = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}')
+
+CPF_PATTERN = re.compile(r'[0-9]{3}\.?[0-9]{3}\.?[0-9]{3}-?[0-9]{2}')
+
+def isValidEmail(email):
+    '''
+    Funcao que verifica o formato de um email.
+
+    Parameters:
+    ----------
+    email : str
+        Email a ser verificado
+
+    Returns
+    -------
+    True se o email for valido
+    '''
+    return EMAIL_PATTERN.fullmatch(email) is not None
+
+def hasValidCheckDigits(digits):
+    '''
+    Funcao que confere os digitos verificadores de um CPF.
+
+    Parameters:
+    ----------
+    digits : str
+        Os 11 digitos do CPF
+
+    Returns
+    -------
+    True se os digitos verificadores conferirem
+    '''
+    numbers = [ord(digit) - 48 for digit in digits]
+
+    if numbers.count(numbers[0]) == 11:
+        return False
+
+    for size in (9, 10):
+        total = 0
+
+        for i in range(size):
+            total += numbers[i] * (size + 1 - i)
+
+        if total * 10 % 11 % 10 != numbers[size]:
+            return False
+
+    return True
+
+def isValidCpf(cpf, checkDigits=False):
+    '''
+    Funcao que verifica um CPF.
+
+    Parameters:
+    ----------
+    cpf : str
+        CPF a ser verificado
+    checkDigits : boolean, optional
+        Confere tambem os digitos verificadores, por default e falso
+
+    Returns
+    -------
+    True se o CPF for valido
+    '''
+    if CPF_PATTERN.fullmatch(cpf) is None:
+        return False
+
+    return not checkDigits or hasValidCheckDigits(cpf.replace('.', '').replace('-', ''))
+
+def clientError(name, email, cpf, checkDigits=False):
+    '''
+    Funcao que valida os dados de um cliente sem lancar excecao.
+
+    Parameters:
+    ----------
+    name : str
+        Nome do cliente
+    email : str
+        Email do cliente
+    cpf : str
+        CPF do cliente
+    checkDigits : boolean, optional
+        Confere tambem os digitos verificadores do CPF, por default e falso
+
+    Returns
+    -------
+    Mensagem do primeiro erro encontrado ou None se os dados forem validos
+    '''
+    if not isinstance(name, str):
+        return 'O nome do cliente deve ser string.'
+
+    if not isinstance(email, str):
+        return 'O email do cliente deve ser string.'
+
+    if not isinstance(cpf, str):
+        return 'O CPF do cliente deve ser string.'
+
+    if EMAIL_PATTERN.fullmatch(email) is None:
+        return 'Email invalido.'
+
+    if CPF_PATTERN.fullmatch(cpf) is None:
+        return 'CPF invalido.'
+
+    if checkDigits and not hasValidCheckDigits(cpf.replace('.', '').replace('-', '')):
+        return 'CPF invalido.'
+
+    return None
+
+def validateMany(rows, checkDigits=False):
+    '''
+    Funcao que valida varios clientes de uma vez.
+
+    Parameters:
+    ----------
+    rows : iterable
+        Tuplas (name, email, cpf) com os dados de cada cliente
+    checkDigits : boolean, optional
+        Confere tambem os digitos verificadores do CPF, por default e falso
+
+    Returns
+    -------
+    Lista de tuplas (indice, mensagem) com os erros de cada linha invalida
+    '''
+    errors = []
+
+    for index, row in enumerate(rows):
+        try:
+            name, email, cpf = row
+        except (TypeError, ValueError):
+            errors.append((index, 'Linha invalida.'))
+            continue
+
+        error = clientError(name, email, cpf, checkDigits)
+
+        if error is not None:
+            errors.append((index, error))
+
+    return errors